@@ -0,0 +1,185 @@
+"""
+准入控制
+按优先级类别（交互、预测、批量、旧版接口）分别限制并发与排队，批量请求涌入时交互请求不再排在它们后面：
+- 每类有并发上限、排队上限与排队时间预算；排队满或等待超过预算立即拒绝（Overloaded，附建议重试秒数）
+- 有空位时按截止时间最早优先放行，已超过截止时间的等待者直接淘汰，不再占用计算
+- 统计各类运行数、排队数、放行数、拒绝数与平均处理时间
+"""
+
+import heapq
+import itertools
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional
+
+# 环境变量：各类限额，如 "interactive=8/12/1000,batch=2/2/5000"（并发/排队/排队预算毫秒）
+ENV = "BAZI_ADMISSION"
+
+INTERACTIVE = "interactive"
+PREDICTION = "prediction"
+BATCH = "batch"
+LEGACY = "legacy"
+
+# 平均处理时间的平滑系数
+EWMA_ALPHA = 0.2
+
+
+class ClassLimits(NamedTuple):
+    """一类请求的并发上限、排队上限、排队时间预算（毫秒）"""
+    concurrency: int
+    max_queue: int
+    budget_ms: float
+
+
+# 默认限额合计 40，与 FastAPI 同步接口的线程池大小一致，排队的请求不会占满线程池
+DEFAULT_LIMITS = {
+    INTERACTIVE: ClassLimits(8, 12, 1000),
+    PREDICTION: ClassLimits(4, 6, 2000),
+    BATCH: ClassLimits(2, 2, 5000),
+    LEGACY: ClassLimits(2, 4, 2000),
+}
+
+
+class Overloaded(Exception):
+    """请求被拒绝，retry_after 为建议的重试等待秒数"""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class _Waiter:
+    __slots__ = ("deadline", "event", "granted", "cancelled")
+
+    def __init__(self, deadline: float):
+        self.deadline = deadline
+        self.event = threading.Event()
+        self.granted = False
+        self.cancelled = False
+
+
+class _Class:
+    """一类请求的状态（由控制器的锁保护）"""
+
+    def __init__(self, limits: ClassLimits):
+        self.limits = limits
+        self.running = 0
+        self.waiters: List[tuple] = []
+        self.queued = 0
+        self.admitted = 0
+        self.shed_queue_full = 0
+        self.shed_timeout = 0
+        self.service_time = 0.0
+
+
+class AdmissionController:
+    """
+    线程安全的准入控制器（同步接口在线程池中执行，排队时阻塞当前线程）
+    """
+
+    def __init__(self, limits: Optional[Dict[str, ClassLimits]] = None):
+        self._classes = {name: _Class(value) for name, value in (limits or DEFAULT_LIMITS).items()}
+        self._lock = threading.Lock()
+        self._sequence = itertools.count()
+
+    def _retry_after(self, state: _Class) -> int:
+        """按平均处理时间估算排队清空所需秒数（至少 1 秒）"""
+        backlog = (state.queued + state.running) * state.service_time / max(state.limits.concurrency, 1)
+        return max(1, math.ceil(backlog))
+
+    def acquire(self, name: str, budget_ms: Optional[float] = None) -> None:
+        """取得一个运行名额，排队满或超过排队预算时抛出 Overloaded"""
+        state = self._classes[name]
+        budget = state.limits.budget_ms if budget_ms is None else min(budget_ms, state.limits.budget_ms)
+        with self._lock:
+            if state.running < state.limits.concurrency and not state.queued:
+                state.running += 1
+                state.admitted += 1
+                return
+            if state.queued >= state.limits.max_queue:
+                state.shed_queue_full += 1
+                raise Overloaded("服务繁忙，请稍后重试", self._retry_after(state))
+            waiter = _Waiter(time.monotonic() + budget / 1000)
+            heapq.heappush(state.waiters, (waiter.deadline, next(self._sequence), waiter))
+            state.queued += 1
+
+        waiter.event.wait(max(0.0, waiter.deadline - time.monotonic()))
+        with self._lock:
+            if waiter.granted:
+                return
+            # 超时：留在堆中的条目由放行时跳过；已被放行时淘汰的不再重复计数
+            if not waiter.cancelled:
+                waiter.cancelled = True
+                state.queued -= 1
+                state.shed_timeout += 1
+            raise Overloaded("排队超时，请稍后重试", self._retry_after(state))
+
+    def release(self, name: str, elapsed: float) -> None:
+        """归还名额，并按截止时间最早优先放行一个仍在期限内的等待者"""
+        state = self._classes[name]
+        with self._lock:
+            state.service_time = elapsed if not state.service_time else \
+                state.service_time + EWMA_ALPHA * (elapsed - state.service_time)
+            now = time.monotonic()
+            while state.waiters:
+                _, _, waiter = heapq.heappop(state.waiters)
+                if waiter.cancelled:
+                    continue
+                if waiter.deadline <= now:
+                    # 已过截止时间：立即移出排队计数（后来的请求不必排在它后面），等待者醒来后直接超时退出
+                    waiter.cancelled = True
+                    state.queued -= 1
+                    state.shed_timeout += 1
+                    waiter.event.set()
+                    continue
+                waiter.granted = True
+                state.queued -= 1
+                state.admitted += 1
+                waiter.event.set()
+                return
+            state.running -= 1
+
+    @contextmanager
+    def admit(self, name: str, budget_ms: Optional[float] = None) -> Iterator[None]:
+        """在名额内执行"""
+        self.acquire(name, budget_ms)
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(name, time.monotonic() - start)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                name: {
+                    "concurrency": state.limits.concurrency,
+                    "maxQueue": state.limits.max_queue,
+                    "budgetMs": state.limits.budget_ms,
+                    "running": state.running,
+                    "queued": state.queued,
+                    "admitted": state.admitted,
+                    "shedQueueFull": state.shed_queue_full,
+                    "shedTimeout": state.shed_timeout,
+                    "avgServiceMs": state.service_time * 1000,
+                }
+                for name, state in self._classes.items()
+            }
+
+
+def parse_limits(value: str) -> Dict[str, ClassLimits]:
+    """解析 "类别=并发/排队/预算毫秒,..."，未列出的类别用默认限额"""
+    limits = dict(DEFAULT_LIMITS)
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        name, _, spec = item.partition("=")
+        concurrency, max_queue, budget = spec.split("/")
+        limits[name.strip()] = ClassLimits(int(concurrency), int(max_queue), float(budget))
+    return limits
+
+
+def get_admission_controller() -> AdmissionController:
+    """按环境变量创建准入控制器"""
+    return AdmissionController(parse_limits(os.environ.get(ENV, "")))
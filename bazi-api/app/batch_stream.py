@@ -0,0 +1,121 @@
+"""
+批量排盘流式响应
+请求体为 JSON 数组或 NDJSON（每行一个请求对象），一次解析后按段计算，每算完一段就以 NDJSON 写回：
+- 每行结果为 {"index": 序号, "data": ...} 或 {"index": 序号, "error": ...}，单条出错不影响其余条目
+- 每段在线程池中计算，段与段之间交还事件循环；客户端断开时响应任务被取消，后续段不再计算
+"""
+
+import json
+import os
+from typing import IO, Any, AsyncIterator, Callable, Iterator, List
+
+from starlette.concurrency import run_in_threadpool
+
+from .disk_cache import encode
+
+# 环境变量：每段条数
+CHUNK_ENV = "BAZI_BATCH_CHUNK"
+DEFAULT_CHUNK = 256
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# 流式解析 JSON 数组时每次读取的字符数、单条的字符数上限（格式错误时不会把剩余内容整体读入内存）
+READ_BLOCK = 1 << 16
+MAX_ITEM_CHARS = 1 << 20
+
+
+class BadItem(Exception):
+    """无法解析的 NDJSON 行"""
+
+
+def parse_line(line: bytes) -> Any:
+    """解析一行 NDJSON，无法解析时返回 BadItem（按条报错）"""
+    try:
+        return json.loads(line)
+    except ValueError as e:
+        return BadItem(f"无法解析的 JSON: {e}")
+
+
+def parse_batch_body(body: bytes, content_type: str = "") -> List[Any]:
+    """
+    解析批量请求体：JSON 数组或 NDJSON
+    NDJSON 中无法解析的行以 BadItem 代替（按条报错），JSON 数组整体不合法时抛出 ValueError
+    """
+    stripped = body.lstrip()
+    if "ndjson" not in content_type and stripped[:1] == b"[":
+        items = json.loads(stripped)
+        if not isinstance(items, list):
+            raise ValueError("请求体应为 JSON 数组或 NDJSON")
+        return items
+    return [parse_line(line) for line in body.splitlines() if line.strip()]
+
+
+def iter_json_array(file: IO[str], block_size: int = READ_BLOCK) -> Iterator[Any]:
+    """
+    逐条解析文本流中的 JSON 数组（按块读取，内存中只保留尚未解析的部分）
+    不是 JSON 数组或格式不合法时抛出 ValueError
+    """
+    decoder = json.JSONDecoder()
+    buffer, pos = "", 0
+
+    def fill() -> bool:
+        # 丢弃已解析部分并追加一块，流结束时返回 False
+        nonlocal buffer, pos
+        block = file.read(block_size)
+        if block:
+            buffer, pos = buffer[pos:] + block, 0
+        return bool(block)
+
+    def peek() -> str:
+        # 跳过空白，返回下一个字符（流结束时为空串）
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n":
+                pos += 1
+            if pos < len(buffer) or not fill():
+                return buffer[pos:pos + 1]
+
+    if peek() != "[":
+        raise ValueError("内容应为 JSON 数组")
+    pos += 1
+    if peek() == "]":
+        pos += 1
+    else:
+        while True:
+            peek()
+            while True:
+                try:
+                    item, end = decoder.raw_decode(buffer, pos)
+                except ValueError:
+                    if len(buffer) - pos > MAX_ITEM_CHARS:
+                        raise ValueError(f"JSON 数组单条超过 {MAX_ITEM_CHARS} 个字符")
+                    if fill():
+                        continue
+                    raise
+                # 数字可能被块边界截断（如 "1500." 之后还有 "0"），后面跟着非数字字符才算解析完整
+                if end < len(buffer) and buffer[end] not in "0123456789.eE+-" or not fill():
+                    break
+            pos = end
+            yield item
+            separator = peek()
+            pos += 1
+            if separator == "]":
+                break
+            if separator != ",":
+                raise ValueError("JSON 数组元素之间缺少逗号")
+    if peek():
+        raise ValueError("JSON 数组之后有多余内容")
+
+
+def item_line(index: int, data: Any = None, error: str = None) -> bytes:
+    """一行 NDJSON 结果"""
+    line = {"index": index, "error": error} if error is not None else {"index": index, "data": data}
+    return encode(line) + b"\n"
+
+
+async def stream_batch(items: List[Any], process_chunk: Callable[[int, List[Any]], bytes],
+                       chunk_size: int = 0) -> AsyncIterator[bytes]:
+    """按段在线程池中计算，process_chunk(起始序号, 条目) 返回该段的 NDJSON 字节"""
+    chunk_size = chunk_size or int(os.environ.get(CHUNK_ENV, DEFAULT_CHUNK))
+    for start in range(0, len(items), chunk_size):
+        yield await run_in_threadpool(process_chunk, start, items[start:start + chunk_size])
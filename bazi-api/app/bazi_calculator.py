@@ -4,24 +4,47 @@
 """
 
 from datetime import datetime
-from typing import Dict, Any
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, NamedTuple, Tuple
 from .data_models import (
     PillarData, DateTimeInfo, FestivalInfo, PillarFestival,
-    ElementInfo, TbRelation, StartTend, WeighBone, BookInfo
+    TbRelation, StartTend, WeighBone, BookInfo
 )
 from .lunar_calculator import LunarCalculator
 from .shishen_calculator import ShishenCalculator
 from .dayun_calculator import DayunCalculator
+from . import ganzhi
+from .chart_memo import ChartMemo
+from .jieqi_table import get_jieqi_table
+
+# 分析片段缓存默认内存上限
+ANALYSIS_CACHE_BYTES = 16 << 20
+
+
+class PillarAnalysis(NamedTuple):
+    """只由四柱决定的分析片段"""
+    tai_yuan: str
+    gods: Tuple[str, ...]
+    gods_detail: Mapping[str, Mapping[str, Any]]
+    wuxing_count: Mapping[str, int]
+    gan_distribution: Mapping[str, int]
+    day_master: str
+    relation: Tuple[str, ...]
+    pro_decl: Tuple[str, ...]
+    include: Tuple[str, ...]
+    ninclude: Tuple[str, ...]
 
 class BaziCalculator:
     """
     八字计算主类
     """
     
-    def __init__(self):
+    def __init__(self, analysis_cache_bytes: int = ANALYSIS_CACHE_BYTES):
         self.lunar_calc = LunarCalculator()
         self.shishen_calc = ShishenCalculator()
         self.dayun_calc = DayunCalculator(self.shishen_calc)
+        # 按四柱编码缓存的分析片段（六十甲子四柱组合约 52 万种，按估算内存限制容量）
+        self.analysis_cache = ChartMemo(maxsize=60 * 12 * 60 * 12, max_bytes=analysis_cache_bytes)
     
     def calculate_bazi_info(self, dt: datetime, gender: int, sect: int, realname: str) -> Dict[str, Any]:
         """
@@ -136,107 +159,25 @@ class BaziCalculator:
         
         # 计算胎元和命宫（已有lunar和bazi实例）
         
-        # 胎元计算：月干进一位，月支进三位
-        tg_list = ["甲", "乙", "丙", "丁", "戊", "己", "庚", "辛", "壬", "癸"]
-        dz_list = ["子", "丑", "寅", "卯", "辰", "巳", "午", "未", "申", "酉", "戌", "亥"]
-        
-        month_gan_idx = tg_list.index(month_gan) if month_gan in tg_list else 0
-        month_zhi_idx = dz_list.index(month_zhi) if month_zhi in dz_list else 0
-        
-        tai_yuan_gan = tg_list[(month_gan_idx + 1) % 10]
-        tai_yuan_zhi = dz_list[(month_zhi_idx + 3) % 12]
-        tai_yuan = tai_yuan_gan + tai_yuan_zhi
+        # 胎元、十神、五行统计与分析文字只由四柱决定，按四柱编码查缓存
+        pillars = tuple(ganzhi.PILLAR_INDEX[p] for p in (
+            bazi.getYear(), bazi.getMonth(), bazi.getDay(), bazi.getTime()
+        ))
+        analysis = self.analysis_cache.get_or_compute(pillars, lambda: self._pillar_analysis(pillars))
+        tai_yuan, gods, gods_detail = analysis.tai_yuan, analysis.gods, analysis.gods_detail
         
         # 命宫
         ming_gong = bazi.getMingGong()
         
-        # 十神关系（详细分析，包含所有藏干）
-        gods_detail = {
-            "天干十神": {
-                "年干": self.shishen_calc.get_relation(day_gan, year_gan),
-                "月干": self.shishen_calc.get_relation(day_gan, month_gan),
-                "日干": "日主",
-                "时干": self.shishen_calc.get_relation(day_gan, time_gan)
-            },
-            "地支藏干十神": {
-                "年支": [],
-                "月支": [],
-                "日支": [],
-                "时支": []
-            }
-        }
-        
-        # 计算地支藏干的十神（参考图片中的详细分析）
-        # 根据传统命理学，每个地支都有固定的藏干
-        zhi_hide_gan = {
-            "子": ["癸"], "丑": ["己", "辛", "癸"], "寅": ["甲", "丙", "戊"],
-            "卯": ["乙"], "辰": ["戊", "乙", "癸"], "巳": ["丙", "庚", "戊"],
-            "午": ["丁", "己"], "未": ["己", "丁", "乙"], "申": ["庚", "壬", "戊"],
-            "酉": ["辛"], "戌": ["戊", "辛", "丁"], "亥": ["壬", "甲"]
-        }
-        
-        # 计算各柱地支藏干的十神
-        for zhi_name, zhi_value in [("年支", year_zhi), ("月支", month_zhi), 
-                                   ("日支", day_zhi), ("时支", time_zhi)]:
-            if zhi_value in zhi_hide_gan:
-                for hide_gan in zhi_hide_gan[zhi_value]:
-                    shishen = self.shishen_calc.get_relation(day_gan, hide_gan)
-                    gods_detail["地支藏干十神"][zhi_name].append(f"{hide_gan}{shishen}")
-        
-        # 保持原有的gods列表用于兼容性
-        gods = [
-            self.shishen_calc.get_relation(day_gan, year_gan),   # 年干十神
-            self.shishen_calc.get_relation(day_gan, month_gan),  # 月干十神
-            self.shishen_calc.get_relation(day_gan, time_gan),   # 时干十神
-        ]
-        
-        # 五行分析（实际计算）
-        all_gans = [year_gan, month_gan, day_gan, time_gan]
-        all_zhis = [year_zhi, month_zhi, day_zhi, time_zhi]
-        
-        # 计算五行强弱关系
-        wuxing_count = {
-            "金": 0, "木": 0, "水": 0, "火": 0, "土": 0
-        }
-        
-        # 统计天干五行
-        for gan in all_gans:
-            element_type = self._get_element(gan)
-            if element_type in wuxing_count:
-                wuxing_count[element_type] += 1
-        
-        # 统计地支五行  
-        for zhi in all_zhis:
-            element_type = self._get_zhi_element(zhi)
-            if element_type in wuxing_count:
-                wuxing_count[element_type] += 1
-                
-        # 找出缺失的五行
-        missing_elements = [k for k, v in wuxing_count.items() if v == 0]
-        
-        element = ElementInfo(
-            relation=["相生", "相克", "同类", "异类"],
-            pro_decl=[
-                f"日主{day_gan}({self._get_element(day_gan)})，八字偏{self._analyze_strength(day_gan, all_gans, all_zhis)}",
-                f"五行分布：{self._format_wuxing_distribution(wuxing_count)}",
-                f"用神建议：{self._suggest_yongshen(day_gan, wuxing_count)}",
-                f"喜忌分析：{self._analyze_xiji(day_gan)}",
-                f"运势总评：命局{self._overall_luck_analysis(wuxing_count)}"
-            ],
-            include=all_gans + all_zhis,
-            ninclude=missing_elements if missing_elements else ["无"]
-        )
-        
         # 日期时间信息
         datetime_info = DateTimeInfo(
             solar=dt.strftime("%Y年%m月%d日 %H时%M分"),
-            lunar=f"{dt.year}年{dt.month}月{dt.day}日"  # 简化的农历显示
+            lunar=f"{lunar.getYear()}年{lunar.getMonthInChinese()}月{lunar.getDayInChinese()}日"
         )
         
-        # 节气信息（简化）
-        festival = PillarFestival(
-            pre=FestivalInfo(label="立春", time="2024-02-04"),
-            next=FestivalInfo(label="雨水", time="2024-02-19")
+        # 节气信息（查预生成节气表）
+        festival = get_jieqi_table().get_festival(dt) or PillarFestival(
+            pre=FestivalInfo(), next=FestivalInfo()
         )
         
         # 起运信息（简化）
@@ -399,16 +340,16 @@ class BaziCalculator:
             
             # 五行分析
             "五行": {
-                "关系": element.relation,
-                "专业解读": ["日主偏强", "喜用神为水木", "忌神为火土", "财运中等", "事业运佳"],
-                "包含": element.include,
-                "缺失": element.ninclude if element.ninclude else ["无"]
+                "关系": analysis.relation,
+                "专业解读": list(analysis.pro_decl),
+                "包含": analysis.include,
+                "缺失": analysis.ninclude
             },
             "element": {
-                "relation": element.relation,
-                "pro_decl": ["日主偏强", "喜用神为水木", "忌神为火土", "财运中等", "事业运佳"],
-                "include": element.include,
-                "ninclude": element.ninclude if element.ninclude else ["无"]
+                "relation": analysis.relation,
+                "pro_decl": list(analysis.pro_decl),
+                "include": analysis.include,
+                "ninclude": analysis.ninclude
             },
             
             # 自坐十神
@@ -452,7 +393,10 @@ class BaziCalculator:
             # 十神
             "十神": gods,
             "gods": gods,
-            "十神详细": gods_detail,
+            "十神详细": {
+                "天干十神": dict(gods_detail["天干十神"]),
+                "地支藏干十神": {name: list(hide) for name, hide in gods_detail["地支藏干十神"].items()}
+            },
             
             # 起运时间
             "起运时间": {
@@ -485,15 +429,9 @@ class BaziCalculator:
                     "婚姻": "晚婚较好"
                 },
                 "wuxing_analysis": {
-                    "日主": f"{day_gan}({self._get_element(day_gan)})",
+                    "日主": analysis.day_master,
                     "强弱": "偏强",
-                    "五行分布": {
-                        "金": len([x for x in [year_gan, month_gan, day_gan, time_gan] if self._get_element(x) == "金"]),
-                        "木": len([x for x in [year_gan, month_gan, day_gan, time_gan] if self._get_element(x) == "木"]),
-                        "水": len([x for x in [year_gan, month_gan, day_gan, time_gan] if self._get_element(x) == "水"]),
-                        "火": len([x for x in [year_gan, month_gan, day_gan, time_gan] if self._get_element(x) == "火"]),
-                        "土": len([x for x in [year_gan, month_gan, day_gan, time_gan] if self._get_element(x) == "土"])
-                    }
+                    "五行分布": dict(analysis.gan_distribution)
                 },
                 "lunar_info": {
                     "农历": lunar.toString(),
@@ -512,6 +450,73 @@ class BaziCalculator:
             }
         }
     
+    def _pillar_analysis(self, pillars: tuple) -> PillarAnalysis:
+        """
+        由四柱编码生成胎元、十神、五行统计与分析文字（结果缓存共享，只含元组、字符串与只读映射，响应中复制后输出）
+        """
+        year_gan, month_gan, day_gan, time_gan = (ganzhi.TIAN_GAN[p % 10] for p in pillars)
+        year_zhi, month_zhi, day_zhi, time_zhi = (ganzhi.DI_ZHI[p % 12] for p in pillars)
+        day_gan_idx = ganzhi.GAN_INDEX[day_gan]
+        
+        # 胎元计算：月干进一位，月支进三位
+        tai_yuan = ganzhi.TIAN_GAN[(pillars[1] + 1) % 10] + ganzhi.DI_ZHI[(pillars[1] + 3) % 12]
+        
+        # 十神关系（详细分析，包含所有藏干）
+        hide_gods = {}
+        for zhi_name, zhi_value in [("年支", year_zhi), ("月支", month_zhi),
+                                   ("日支", day_zhi), ("时支", time_zhi)]:
+            hide_gods[zhi_name] = tuple(
+                f"{ganzhi.TIAN_GAN[hide_gan]}{ganzhi.SHI_SHEN_NAMES[ganzhi.gan_shi_shen(day_gan_idx, hide_gan)]}"
+                for hide_gan in ganzhi.ZHI_HIDE_GAN[ganzhi.ZHI_INDEX[zhi_value]]
+            )
+        gods_detail = MappingProxyType({
+            "天干十神": MappingProxyType({
+                "年干": self.shishen_calc.get_relation(day_gan, year_gan),
+                "月干": self.shishen_calc.get_relation(day_gan, month_gan),
+                "日干": "日主",
+                "时干": self.shishen_calc.get_relation(day_gan, time_gan)
+            }),
+            "地支藏干十神": MappingProxyType(hide_gods)
+        })
+        
+        # 保持原有的gods列表用于兼容性
+        gods = (
+            self.shishen_calc.get_relation(day_gan, year_gan),   # 年干十神
+            self.shishen_calc.get_relation(day_gan, month_gan),  # 月干十神
+            self.shishen_calc.get_relation(day_gan, time_gan),   # 时干十神
+        )
+        
+        # 五行统计
+        all_gans = [year_gan, month_gan, day_gan, time_gan]
+        all_zhis = [year_zhi, month_zhi, day_zhi, time_zhi]
+        wuxing_count = {"金": 0, "木": 0, "水": 0, "火": 0, "土": 0}
+        gan_distribution = dict(wuxing_count)
+        for gan in all_gans:
+            wuxing_count[self._get_element(gan)] += 1
+            gan_distribution[self._get_element(gan)] += 1
+        for zhi in all_zhis:
+            wuxing_count[self._get_zhi_element(zhi)] += 1
+        missing_elements = tuple(k for k, v in wuxing_count.items() if v == 0)
+        
+        return PillarAnalysis(
+            tai_yuan=tai_yuan,
+            gods=gods,
+            gods_detail=gods_detail,
+            wuxing_count=MappingProxyType(wuxing_count),
+            gan_distribution=MappingProxyType(gan_distribution),
+            day_master=f"{day_gan}({self._get_element(day_gan)})",
+            relation=("相生", "相克", "同类", "异类"),
+            pro_decl=(
+                f"日主{day_gan}({self._get_element(day_gan)})，八字偏{self._analyze_strength(day_gan, all_gans, all_zhis)}",
+                f"五行分布：{self._format_wuxing_distribution(wuxing_count)}",
+                f"用神建议：{self._suggest_yongshen(day_gan, wuxing_count)}",
+                f"喜忌分析：{self._analyze_xiji(day_gan)}",
+                f"运势总评：命局{self._overall_luck_analysis(wuxing_count)}"
+            ),
+            include=tuple(all_gans + all_zhis),
+            ninclude=missing_elements or ("无",)
+        )
+    
     def _get_shishen_for_pillar(self, day_gan: str, pillar: str) -> str:
         """
         计算干支柱的十神关系
@@ -525,27 +530,19 @@ class BaziCalculator:
         """
         获取天干的五行属性
         """
-        element_map = {
-            "甲": "木", "乙": "木",
-            "丙": "火", "丁": "火", 
-            "戊": "土", "己": "土",
-            "庚": "金", "辛": "金",
-            "壬": "水", "癸": "水"
-        }
-        return element_map.get(gan, "未知")
+        gan_idx = ganzhi.GAN_INDEX.get(gan)
+        if gan_idx is None:
+            return "未知"
+        return ganzhi.ELEMENT_NAMES[ganzhi.GAN_ELEMENT[gan_idx]]
     
     def _get_zhi_element(self, zhi: str) -> str:
         """
         获取地支的五行属性
         """
-        element_map = {
-            "子": "水", "亥": "水",
-            "寅": "木", "卯": "木",
-            "巳": "火", "午": "火",
-            "申": "金", "酉": "金",
-            "辰": "土", "戌": "土", "丑": "土", "未": "土"
-        }
-        return element_map.get(zhi, "未知")
+        zhi_idx = ganzhi.ZHI_INDEX.get(zhi)
+        if zhi_idx is None:
+            return "未知"
+        return ganzhi.ELEMENT_NAMES[ganzhi.ZHI_ELEMENT[zhi_idx]]
     
     def _analyze_strength(self, day_gan: str, gans: list, zhis: list) -> str:
         """
@@ -647,7 +644,7 @@ class BaziCalculator:
             self.lunar_calc.get_gan_zhi_from_date(dt)
         
         # 计算大运流年
-        tend_data = self.dayun_calc.calculate_dayun(dt, gender, sect, day_gan)
+        tend_data = self.dayun_calc.calculate_dayun(dt, gender, sect, day_gan + day_zhi, year_gan + year_zhi)
         
         return {
             "dayunList": [
@@ -655,7 +652,10 @@ class BaziCalculator:
                     "startYear": item.startYear,
                     "startAge": item.startAge,
                     "pillar": item.pillar,
-                    "shishen": item.shishen
+                    "shishen": item.shishen,
+                    "changSheng": item.changSheng,
+                    "taisui": item.taisui,
+                    "relations": item.relations
                 } for item in tend_data.dayunList
             ],
             "yearList": [
@@ -663,7 +663,10 @@ class BaziCalculator:
                     "year": item.year,
                     "pillar": item.pillar,
                     "age": item.age,
-                    "shishen": item.shishen
+                    "shishen": item.shishen,
+                    "changSheng": item.changSheng,
+                    "taisui": item.taisui,
+                    "relations": item.relations
                 } for item in tend_data.yearList
             ],
             "monthList": [
@@ -673,7 +676,10 @@ class BaziCalculator:
                     "date": item.date,
                     "nextJieqiDate": item.nextJieqiDate,
                     "pillar": item.pillar,
-                    "shishen": item.shishen
+                    "shishen": item.shishen,
+                    "changSheng": item.changSheng,
+                    "taisui": item.taisui,
+                    "relations": item.relations
                 } for item in tend_data.monthList
             ],
             "dayList": [],
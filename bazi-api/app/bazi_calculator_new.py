@@ -4,72 +4,124 @@
 """
 
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Dict, Any, List, NamedTuple, Optional
 import lunar_python
+from . import ganzhi, pillar_relation, solar_longitude
+from .jieqi_table import get_jieqi_table
+from .chart_table import get_chart_table
+from .chart_memo import ChartMemo, chart_key, freeze, thaw
+from .disk_cache import DiskCache
+from .shared_cache import SharedChartCache
+from .luck_cycle import CHILD_PILLAR, LuckCycle
+from .lunar_table import LunarDate, get_lunar_table
+
+# 启动时从磁盘缓存预热的排盘分段条目数
+WARM_CHART_ENTRIES = 20000
+
+class PreparedChart(NamedTuple):
+    """一次排盘的中间结果（排盘分段结果、起运），基本信息与大运流年预测共用"""
+    dt: datetime
+    gender: int
+    sect: int
+    chart_info: tuple
+    luck: Optional[LuckCycle]
 
 class BaziCalculator:
     """
     八字计算主类 - 完全按照前端逻辑重构
     """
     
-    def __init__(self):
+    def __init__(self, disk_cache: Optional[DiskCache] = None, shared_cache: Optional[SharedChartCache] = None):
         # 前端配置映射
         self.SHI_SHEN_SIMPLIFIE = {
             "比肩": "比", "劫财": "劫", "食神": "食", "伤官": "伤", 
             "偏财": "才", "正财": "财", "七杀": "杀", "正官": "官",
             "偏印": "枭", "正印": "印"
         }
+        # 排盘分段记忆表
+        self.chart_memo = ChartMemo()
+        # 可选的跨 worker 共享内存缓存
+        self.shared_cache = shared_cache
+        # 可选的磁盘缓存：启动时把最近访问的排盘分段结果批量载入记忆表
+        self.disk_cache = disk_cache
+        if disk_cache is not None:
+            for key, value in disk_cache.load_recent("chart", WARM_CHART_ENTRIES):
+                self.chart_memo.put(tuple(key), freeze(value))
     
     def calculate_bazi_info(self, dt: datetime, gender: int, sect: int, realname: str) -> Dict[str, Any]:
         """
         计算八字基本信息 - 完全按照前端逻辑
+        四柱派生部分按排盘分段归一化后查记忆表，只有时间戳、大运按出生时刻逐次计算
         """
-        # 1. 使用 lunar-javascript 逻辑进行农历计算
-        solar = lunar_python.Solar.fromYmdHms(dt.year, dt.month, dt.day, dt.hour, dt.minute, 0)
-        lunar = solar.getLunar()
-        bazi = lunar.getEightChar()
-        
-        # 2. 获取八字四柱（先转阴历再输出）
-        year_gan = bazi.getYearGan()
-        year_zhi = bazi.getYearZhi()
-        month_gan = bazi.getMonthGan()
-        month_zhi = bazi.getMonthZhi()
-        day_gan = bazi.getDayGan()
-        day_zhi = bazi.getDayZhi()
-        time_gan = bazi.getTimeGan()
-        time_zhi = bazi.getTimeZhi()
-        
-        # 3. 获取十神关系
-        gods = self._get_gods_list(day_gan, year_gan, month_gan, time_gan, year_zhi, month_zhi, day_zhi, time_zhi)
-        
-        # 4. 获取农历信息
-        lunar_info = {
-            "year": lunar.getYear(),
-            "month": lunar.getMonth(),
-            "day": lunar.getDay(),
-            "isLeap": False,  # 简化处理
-            "lunar_str": f"{lunar.getYear()}年{lunar.getMonthInChinese()}月{lunar.getDayInChinese()}日"
-        }
+        return self.info_from_chart(self.prepare_chart(dt, gender, sect), realname)
+    
+    def prepare_chart(self, dt: datetime, gender: int, sect: int) -> PreparedChart:
+        """排盘：四柱、农历、节气等查记忆表，起运按出生时刻（到分）计算"""
+        key = chart_key(dt, sect)
+        chart_info = self.chart_memo.get_or_compute(key, lambda: self._cached_chart_info(key, dt, sect))
+        return PreparedChart(dt, gender, sect, chart_info, self._minute_luck_cycle(dt, gender, sect))
+    
+    def calculate_bazi_full(self, dt: datetime, gender: int, sect: int, realname: str) -> Dict[str, Any]:
+        """同一次排盘同时给出基本信息与大运流年预测"""
+        prepared = self.prepare_chart(dt, gender, sect)
+        return {"info": self.info_from_chart(prepared, realname), "prediction": self.prediction_from_chart(prepared)}
+    
+    def prediction_from_chart(self, prepared: PreparedChart) -> Dict[str, Any]:
+        """由已排好的盘计算大运流年预测（出生时刻不含秒时直接复用起运结果）"""
+        dt, gender, sect = prepared.dt, prepared.gender, prepared.sect
+        luck = prepared.luck if dt.second == 0 and dt.microsecond == 0 else None
+        return self.calculate_bazi_prediction(dt, gender, sect, luck)
+    
+    def calculate_bazi_info_batch(self, requests: List[tuple]) -> List[Dict[str, Any]]:
+        """
+        批量计算八字基本信息：requests 为 [(出生时刻, 性别, 流派, 姓名)]
+        记忆表未命中的条目用一次向量化查表取得四柱，其余步骤与单条相同
+        """
+        keys = [chart_key(dt, sect) for dt, _, sect, _ in requests]
+        charts = [self.chart_memo.get(key) if key is not None else None for key in keys]
+        missing = [i for i, chart in enumerate(charts) if chart is None]
+        if missing:
+            dts, sects = [requests[i][0] for i in missing], [requests[i][2] for i in missing]
+            pillars = get_chart_table().lookup_many(dts, sects)
+            # 分段表范围外的条目按推算节气一次向量化排盘
+            outside = [j for j, row in enumerate(pillars) if row is None]
+            if outside:
+                extended = solar_longitude.lookup_many([dts[j] for j in outside], [sects[j] for j in outside])
+                for j, row in zip(outside, extended):
+                    pillars[j] = row
+            for i, row in zip(missing, pillars):
+                dt, _, sect, _ = requests[i]
+                row = tuple(row) if row is not None else None
+                charts[i] = self._cached_chart_info(keys[i], dt, sect, row) if keys[i] is not None \
+                    else freeze(self._chart_info(dt, sect, row))
+                if keys[i] is not None:
+                    self.chart_memo.put(keys[i], charts[i])
+        return [
+            self.info_from_chart(
+                PreparedChart(dt, gender, sect, chart, self._minute_luck_cycle(dt, gender, sect)), realname
+            )
+            for (dt, gender, sect, realname), chart in zip(requests, charts)
+        ]
+    
+    def info_from_chart(self, prepared: PreparedChart, realname: str) -> Dict[str, Any]:
+        """由已排好的盘组装基本信息响应"""
+        dt, gender, sect, (day_p, datetime_info, chart), luck = prepared
         
-        # 5. 计算大运信息
-        yun = bazi.getYun(gender, sect)
-        dayun_list = yun.getDaYun()
+        # 2. 大运信息（原生起运计算，超出推算节气范围回退 lunar_python）
+        if luck is not None:
+            dayun_list = luck.da_yun()
+        else:
+            bazi = lunar_python.Solar.fromYmdHms(dt.year, dt.month, dt.day, dt.hour, dt.minute, 0).getLunar().getEightChar()
+            dayun_list = self._lunar_dayun(bazi.getYun(gender, sect).getDaYun())
         
         # 处理大运数据
-        dayun_result = []
+        dayun_result = self._dayun_items(day_p % 10, dayun_list)
         start_age = 8  # 默认起运年龄
-        for item in dayun_list:
-            pillar = item.getGanZhi() or '童限'
-            if item.getStartAge() > 0:
-                start_age = item.getStartAge()
-            dayun_result.append({
-                "startYear": item.getStartYear(),
-                "startAge": item.getStartAge(),
-                "pillar": pillar,
-                "shishen": self._get_shishen_by_pillar(day_gan, pillar)
-            })
+        for item in dayun_result:
+            if item["startAge"] > 0:
+                start_age = item["startAge"]
         
-        # 6. 构造返回数据 - 完全按照前端格式
+        # 3. 构造返回数据 - 完全按照前端格式
         result = {
             # 基本信息
             "realname": realname,
@@ -77,15 +129,106 @@ class BaziCalculator:
             "timestamp": int(dt.timestamp() * 1000),
             "sect": sect,
             
-            # 时间信息
+            # 时间信息（排盘分段结果在记忆表中只读共享，复制后输出）
             "datetime": {
                 "solar": dt.strftime("%Y年%m月%d日 %H时%M分"),
-                "lunar": lunar_info["lunar_str"]
+                **thaw(datetime_info)
+            },
+            **thaw(chart),
+            
+            # 大运信息
+            "startAge": start_age,
+            "dayunList": dayun_result
+        }
+        
+        return result
+    
+    def _cached_chart_info(self, key: tuple, dt: datetime, sect: int, pillars: Optional[tuple] = None) -> tuple:
+        """
+        记忆表未命中时依次查共享内存、磁盘缓存，都未命中再计算；
+        结果写回共享内存供其他 worker 使用，新算出的结果异步写入磁盘，返回只读结构（freeze）
+        """
+        value = None
+        if self.shared_cache is not None:
+            value = self.shared_cache.get("chart", key)
+            if value is not None:
+                return freeze(value)
+        if self.disk_cache is not None:
+            value = self.disk_cache.get("chart", key)
+        if value is None:
+            value = self._chart_info(dt, sect, pillars)
+            if self.disk_cache is not None:
+                self.disk_cache.put("chart", key, value)
+        if self.shared_cache is not None:
+            self.shared_cache.put("chart", key, value)
+        return freeze(value)
+    
+    def _chart_info(self, dt: datetime, sect: int, pillars: Optional[tuple] = None) -> tuple:
+        """
+        只由排盘分段决定的部分：（日柱编码, 农历信息, 节气/星座生肖/四柱/纳音/十神/藏干/空亡）
+        pillars: 已批量查得的四柱编码，为 None 时在此查表
+        """
+        # 1. 查排盘分段表取四柱编码（一次二分，不经 lunar_python），范围外按推算节气排盘
+        if pillars is None:
+            pillars = self._lookup_pillars(dt, sect)
+        
+        # 超出推算节气、农历月表范围时回退 lunar-javascript 逻辑
+        lunar_table = get_lunar_table()
+        lunar = None
+        if pillars is None or not lunar_table.covers(dt):
+            solar = lunar_python.Solar.fromYmdHms(dt.year, dt.month, dt.day, dt.hour, dt.minute, 0)
+            lunar = solar.getLunar()
+        if pillars is None:
+            bazi = lunar.getEightChar()
+            bazi.setSect(sect)
+            pillars = tuple(ganzhi.PILLAR_INDEX[p] for p in (
+                bazi.getYear(), bazi.getMonth(), bazi.getDay(), bazi.getTime()
+            ))
+        year_p, month_p, day_p, time_p = pillars
+        
+        # 2. 八字四柱（仅在此转为字符串）
+        year_gan, year_zhi = ganzhi.TIAN_GAN[year_p % 10], ganzhi.DI_ZHI[year_p % 12]
+        month_gan, month_zhi = ganzhi.TIAN_GAN[month_p % 10], ganzhi.DI_ZHI[month_p % 12]
+        day_gan, day_zhi = ganzhi.TIAN_GAN[day_p % 10], ganzhi.DI_ZHI[day_p % 12]
+        time_gan, time_zhi = ganzhi.TIAN_GAN[time_p % 10], ganzhi.DI_ZHI[time_p % 12]
+        
+        # 3. 获取十神关系
+        gods = self._get_gods_list(day_gan, year_gan, month_gan, time_gan, year_zhi, month_zhi, day_zhi, time_zhi)
+        
+        # 4. 获取农历信息（查农历月表）
+        if lunar is None:
+            lunar_date = lunar_table.to_lunar(dt)
+        else:
+            lunar_date = LunarDate(lunar.getYear(), abs(lunar.getMonth()), lunar.getDay(), lunar.getMonth() < 0)
+        datetime_info = {
+            "lunar": str(lunar_date),
+            "lunarDate": {
+                "year": lunar_date.year,
+                "month": lunar_date.month,
+                "day": lunar_date.day,
+                "isLeap": lunar_date.leap
+            }
+        }
+        
+        # 5. 上一个与下一个节气（查预生成节气表）
+        festival = get_jieqi_table().get_festival(dt)
+        
+        chart = {
+            # 节气信息
+            "festival": {
+                "pre": {
+                    "label": festival.pre.label if festival else "",
+                    "time": festival.pre.time if festival else ""
+                },
+                "next": {
+                    "label": festival.next.label if festival else "",
+                    "time": festival.next.time if festival else ""
+                }
             },
             
             # 星座生肖
             "constellation": self._get_constellation(dt.month, dt.day),
-            "zodiac": lunar.getYearShengXiao(),
+            "zodiac": lunar_date.zodiac,
             
             # 八字四柱
             "top": {
@@ -103,10 +246,10 @@ class BaziCalculator:
             
             # 纳音
             "nayin": {
-                "year": bazi.getYearNaYin(),
-                "month": bazi.getMonthNaYin(),
-                "day": bazi.getDayNaYin(),
-                "time": bazi.getTimeNaYin()
+                "year": ganzhi.NAYIN_NAMES[ganzhi.PILLAR_NAYIN[year_p]],
+                "month": ganzhi.NAYIN_NAMES[ganzhi.PILLAR_NAYIN[month_p]],
+                "day": ganzhi.NAYIN_NAMES[ganzhi.PILLAR_NAYIN[day_p]],
+                "time": ganzhi.NAYIN_NAMES[ganzhi.PILLAR_NAYIN[time_p]]
             },
             
             # 十神
@@ -124,57 +267,71 @@ class BaziCalculator:
             "empty": {
                 "year": "",
                 "month": "",
-                "day": lunar.getDayXunKong()[0] if lunar.getDayXunKong() else "",
-                "time": lunar.getDayXunKong()[1] if len(lunar.getDayXunKong()) > 1 else ""
-            },
-            
-            # 大运信息
-            "startAge": start_age,
-            "dayunList": dayun_result
+                "day": ganzhi.DI_ZHI[ganzhi.PILLAR_XUN_KONG[day_p][0]],
+                "time": ganzhi.DI_ZHI[ganzhi.PILLAR_XUN_KONG[day_p][1]]
+            }
         }
-        
-        return result
+        return day_p, datetime_info, chart
     
-    def calculate_bazi_prediction(self, dt: datetime, gender: int, sect: int) -> Dict[str, Any]:
+    def calculate_bazi_prediction(self, dt: datetime, gender: int, sect: int,
+                                  luck: Optional[LuckCycle] = None) -> Dict[str, Any]:
         """
         计算大运流年预测 - 完全按照前端逻辑
+        配置磁盘缓存时按（出生时刻到秒, 性别, 流派）缓存整个结果
+        luck: 已按同一出生时刻（到秒）算好的起运结果
         """
-        # 1. 使用 lunar-javascript 逻辑进行农历计算
-        solar = lunar_python.Solar.fromDate(dt)
-        lunar = solar.getLunar()
-        bazi = lunar.getEightChar()
-        
-        # 2. 获取日干作为十神计算基准
-        day_gan = bazi.getDayGan()
-        
-        # 3. 计算大运
-        yun = bazi.getYun(gender, sect)
-        dayun_list = yun.getDaYun()
-        
-        # 4. 处理大运数据
-        dayun_result = []
-        for item in dayun_list:
-            pillar = item.getGanZhi() or '童限'
-            dayun_result.append({
-                "startYear": item.getStartYear(),
-                "startAge": item.getStartAge(),
-                "pillar": pillar,
-                "shishen": self._get_shishen_by_pillar(day_gan, pillar)
-            })
+        if self.disk_cache is None:
+            return self._calculate_prediction(dt, gender, sect, luck)
+        key = (dt.replace(microsecond=0).isoformat(), gender, sect)
+        result = self.disk_cache.get("prediction", key)
+        if result is None:
+            result = self._calculate_prediction(dt, gender, sect, luck)
+            self.disk_cache.put("prediction", key, result)
+        return result
+    
+    def _calculate_prediction(self, dt: datetime, gender: int, sect: int,
+                              luck: Optional[LuckCycle] = None) -> Dict[str, Any]:
+        """大运流年预测计算"""
+        # 1. 原生起运计算（出生时刻精确到秒）
+        if luck is None:
+            luck = self._get_luck_cycle(dt.replace(microsecond=0), gender, sect)
+        pillars = self._lookup_pillars(dt, 2)
+        if luck is not None and pillars is not None:
+            # 2. 本命日柱（十神、长生、冲合基准）与年柱（太岁基准）
+            year_p, day_p = pillars[0], pillars[2]
+            
+            # 3. 计算大运
+            dayun_list = luck.da_yun()
+            
+            # 4. 流年（第一个大运的流年，取前20年）
+            liunian_list = luck.liu_nian(0)[:20]
+        else:
+            # 超出推算节气范围时回退 lunar-javascript 逻辑
+            bazi = lunar_python.Solar.fromDate(dt).getLunar().getEightChar()
+            year_p, day_p = ganzhi.PILLAR_INDEX[bazi.getYear()], ganzhi.PILLAR_INDEX[bazi.getDay()]
+            yun_list = bazi.getYun(gender, sect).getDaYun()
+            dayun_list = self._lunar_dayun(yun_list)
+            liunian_list = [
+                (item.getYear(), item.getAge(), ganzhi.PILLAR_INDEX[item.getGanZhi()])
+                for item in yun_list[0].getLiuNian()[:20]
+            ] if yun_list else []
         
-        # 5. 处理流年数据（取第一个大运的流年）
-        year_result = []
-        if dayun_list:
-            first_dayun = dayun_list[0]
-            liunian_list = first_dayun.getLiuNian()
-            for item in liunian_list[:20]:  # 取前20年
-                pillar = item.getGanZhi()
-                year_result.append({
-                    "year": item.getYear(),
-                    "pillar": pillar,
-                    "age": item.getAge(),
-                    "shishen": self._get_shishen_by_pillar(day_gan, pillar)
-                })
+        # 5. 大运、流年的十神、长生、太岁、冲合：整条时间线一次从柱对关系表取出
+        cells = pillar_relation.annotate(
+            day_p, year_p, [pillar for _, _, pillar in dayun_list] + [pillar for _, _, pillar in liunian_list]
+        )
+        dayun_result = [{
+            "startYear": start_year,
+            "startAge": start_age,
+            "pillar": '童限' if pillar == CHILD_PILLAR else ganzhi.PILLAR_NAMES[pillar],
+            **cell
+        } for (start_year, start_age, pillar), cell in zip(dayun_list, cells)]
+        year_result = [{
+            "year": year,
+            "pillar": ganzhi.PILLAR_NAMES[pillar],
+            "age": age,
+            **cell
+        } for (year, age, pillar), cell in zip(liunian_list, cells[len(dayun_list):])]
         
         return {
             "dayunList": dayun_result,
@@ -189,6 +346,52 @@ class BaziCalculator:
             "timeIndex": 0
         }
     
+    def _lookup_pillars(self, dt: datetime, sect: int) -> Optional[tuple]:
+        """四柱编码：查排盘分段表，范围外按推算节气计算，都超出时返回 None"""
+        pillars = get_chart_table().lookup(dt, sect)
+        return pillars if pillars is not None else solar_longitude.lookup(dt, sect)
+    
+    def _get_luck_cycle(self, dt: datetime, gender: int, sect: int):
+        """
+        原生大运流年（节气表范围外按推算节气），超出推算范围返回 None
+        """
+        try:
+            return LuckCycle.from_birth(dt, gender, sect)
+        except ValueError:
+            return None
+    
+    def _minute_luck_cycle(self, dt: datetime, gender: int, sect: int):
+        """基本信息中的大运按出生时刻到分计算"""
+        return self._get_luck_cycle(dt.replace(second=0, microsecond=0), gender, sect)
+    
+    def _lunar_dayun(self, yun_list) -> List[tuple]:
+        """
+        lunar_python 大运对象转（起始年, 起始年龄, 干支编码）
+        """
+        return [
+            (item.getStartYear(), item.getStartAge(), ganzhi.PILLAR_INDEX.get(item.getGanZhi(), CHILD_PILLAR))
+            for item in yun_list
+        ]
+    
+    def _dayun_items(self, day_gan: int, dayun_list: List[tuple]) -> List[Dict[str, Any]]:
+        """
+        大运输出格式 - 完全按照前端逻辑
+        """
+        result = []
+        for start_year, start_age, pillar in dayun_list:
+            if pillar == CHILD_PILLAR:
+                name = shishen = '童限'
+            else:
+                name = ganzhi.PILLAR_NAMES[pillar]
+                shishen = ganzhi.pillar_shi_shen_short(day_gan, pillar)
+            result.append({
+                "startYear": start_year,
+                "startAge": start_age,
+                "pillar": name,
+                "shishen": shishen
+            })
+        return result
+    
     def _get_gods_list(self, day_gan: str, year_gan: str, month_gan: str, time_gan: str,
                       year_zhi: str, month_zhi: str, day_zhi: str, time_zhi: str) -> List[str]:
         """
@@ -218,118 +421,44 @@ class BaziCalculator:
         """
         获取天干十神 - 完全按照前端逻辑
         """
-        # 前端使用 LunarUtil.SHI_SHEN_GAN 映射
-        shishen_map = {
-            # 甲日干
-            "甲甲": "比肩", "甲乙": "劫财", "甲丙": "食神", "甲丁": "伤官",
-            "甲戊": "偏财", "甲己": "正财", "甲庚": "七杀", "甲辛": "正官",
-            "甲壬": "偏印", "甲癸": "正印",
-            
-            # 乙日干
-            "乙甲": "劫财", "乙乙": "比肩", "乙丙": "伤官", "乙丁": "食神",
-            "乙戊": "正财", "乙己": "偏财", "乙庚": "正官", "乙辛": "七杀",
-            "乙壬": "正印", "乙癸": "偏印",
-            
-            # 丙日干
-            "丙甲": "偏印", "丙乙": "正印", "丙丙": "比肩", "丙丁": "劫财",
-            "丙戊": "食神", "丙己": "伤官", "丙庚": "偏财", "丙辛": "正财",
-            "丙壬": "七杀", "丙癸": "正官",
-            
-            # 丁日干
-            "丁甲": "正印", "丁乙": "偏印", "丁丙": "劫财", "丁丁": "比肩",
-            "丁戊": "伤官", "丁己": "食神", "丁庚": "正财", "丁辛": "偏财",
-            "丁壬": "正官", "丁癸": "七杀",
-            
-            # 戊日干
-            "戊甲": "七杀", "戊乙": "正官", "戊丙": "偏印", "戊丁": "正印",
-            "戊戊": "比肩", "戊己": "劫财", "戊庚": "食神", "戊辛": "伤官",
-            "戊壬": "偏财", "戊癸": "正财",
-            
-            # 己日干
-            "己甲": "正官", "己乙": "七杀", "己丙": "正印", "己丁": "偏印",
-            "己戊": "劫财", "己己": "比肩", "己庚": "伤官", "己辛": "食神",
-            "己壬": "正财", "己癸": "偏财",
-            
-            # 庚日干
-            "庚甲": "偏财", "庚乙": "正财", "庚丙": "七杀", "庚丁": "正官",
-            "庚戊": "偏印", "庚己": "正印", "庚庚": "比肩", "庚辛": "劫财",
-            "庚壬": "食神", "庚癸": "伤官",
-            
-            # 辛日干
-            "辛甲": "正财", "辛乙": "偏财", "辛丙": "正官", "辛丁": "七杀",
-            "辛戊": "正印", "辛己": "偏印", "辛庚": "劫财", "辛辛": "比肩",
-            "辛壬": "伤官", "辛癸": "食神",
-            
-            # 壬日干
-            "壬甲": "食神", "壬乙": "伤官", "壬丙": "偏财", "壬丁": "正财",
-            "壬戊": "七杀", "壬己": "正官", "壬庚": "偏印", "壬辛": "正印",
-            "壬壬": "比肩", "壬癸": "劫财",
-            
-            # 癸日干
-            "癸甲": "伤官", "癸乙": "食神", "癸丙": "正财", "癸丁": "偏财",
-            "癸戊": "正官", "癸己": "七杀", "癸庚": "正印", "癸辛": "偏印",
-            "癸壬": "劫财", "癸癸": "比肩"
-        }
-        
-        key = day_gan + target_gan
-        return shishen_map.get(key, "未知")
+        day_idx = ganzhi.GAN_INDEX.get(day_gan)
+        gan_idx = ganzhi.GAN_INDEX.get(target_gan)
+        if day_idx is None or gan_idx is None:
+            return "未知"
+        return ganzhi.SHI_SHEN_NAMES[ganzhi.GAN_SHI_SHEN[day_idx * 10 + gan_idx]]
     
     def _get_shishen_by_pillar(self, day_gan: str, pillar: str) -> str:
         """
-        根据干支柱获取十神 - 完全按照前端逻辑
+        根据干支柱获取十神（柱对关系表一次读取）
         """
         if pillar == '童限':
             return '童限'
         
-        if len(pillar) >= 2:
-            gan = pillar[0]
-            zhi = pillar[1]
-            
-            # 获取天干十神
-            gan_shishen = self._get_shishen_gan(day_gan, gan)
-            
-            # 获取地支十神
-            zhi_shishen = self._get_shishen_zhi(day_gan, zhi)
-            
-            # 组合十神
-            gan_simplified = self.SHI_SHEN_SIMPLIFIE.get(gan_shishen, gan_shishen)
-            zhi_simplified = self.SHI_SHEN_SIMPLIFIE.get(zhi_shishen, zhi_shishen)
-            
-            return gan_simplified + zhi_simplified
-        
-        return "未知"
+        day_idx = ganzhi.GAN_INDEX.get(day_gan)
+        pillar_idx = ganzhi.PILLAR_INDEX.get(pillar)
+        if day_idx is None or pillar_idx is None:
+            return "未知"
+        return pillar_relation.SHI_SHEN_PAIR_NAMES[pillar_relation.RELATIONS[day_idx, pillar_idx]["shishen"]]
     
     def _get_shishen_zhi(self, day_gan: str, zhi: str) -> str:
         """
         获取地支十神 - 完全按照前端逻辑
         """
-        # 地支藏干十神映射
-        zhi_hide_gan = {
-            "子": ["癸"], "丑": ["己", "辛", "癸"], "寅": ["甲", "丙", "戊"],
-            "卯": ["乙"], "辰": ["戊", "乙", "癸"], "巳": ["丙", "庚", "戊"],
-            "午": ["丁", "己"], "未": ["己", "丁", "乙"], "申": ["庚", "壬", "戊"],
-            "酉": ["辛"], "戌": ["戊", "辛", "丁"], "亥": ["壬", "甲"]
-        }
-        
-        if zhi in zhi_hide_gan:
-            # 取地支的本气天干
-            main_gan = zhi_hide_gan[zhi][0]
-            return self._get_shishen_gan(day_gan, main_gan)
-        
-        return "未知"
+        day_idx = ganzhi.GAN_INDEX.get(day_gan)
+        zhi_idx = ganzhi.ZHI_INDEX.get(zhi)
+        if day_idx is None or zhi_idx is None:
+            return "未知"
+        # 取地支的本气天干
+        return ganzhi.SHI_SHEN_NAMES[ganzhi.ZHI_SHI_SHEN[day_idx * 12 + zhi_idx]]
     
     def _get_hide_gan(self, zhi: str) -> List[str]:
         """
         获取地支藏干 - 完全按照前端逻辑
         """
-        zhi_hide_gan = {
-            "子": ["癸"], "丑": ["己", "辛", "癸"], "寅": ["甲", "丙", "戊"],
-            "卯": ["乙"], "辰": ["戊", "乙", "癸"], "巳": ["丙", "庚", "戊"],
-            "午": ["丁", "己"], "未": ["己", "丁", "乙"], "申": ["庚", "壬", "戊"],
-            "酉": ["辛"], "戌": ["戊", "辛", "丁"], "亥": ["壬", "甲"]
-        }
-        
-        return zhi_hide_gan.get(zhi, [])
+        zhi_idx = ganzhi.ZHI_INDEX.get(zhi)
+        if zhi_idx is None:
+            return []
+        return [ganzhi.TIAN_GAN[g] for g in ganzhi.ZHI_HIDE_GAN[zhi_idx]]
     
     def _get_constellation(self, month: int, day: int) -> str:
         """
@@ -1,12 +1,13 @@
 # -*- encoding:utf-8 -*- 
 
 import sxtwl, json
-from datetime import datetime, timedelta
-from math import radians, sin, cos
-import math
+from datetime import datetime
 from collections import OrderedDict
 from bidict import bidict
 from lunar_python import Solar, Lunar
+from . import ganzhi, relation_detector, shensha, solar_time
+from .luck_cycle import da_yun_of
+from .city_index import get_city_index
 
 # 基础表
 TG  = ["甲", "乙", "丙", "丁", "戊", "己", "庚", "辛", "壬", "癸"]
@@ -134,64 +135,6 @@ WU_XING_KE = {
     "木": "土", "火": "金", "土": "水", "金": "木", "水": "火"
 }
 
-# 纳音五行
-NAYINS = {
-    ('甲', '子'): '海中金', ('乙', '丑'): '海中金', ('壬', '寅'): '金泊金', ('癸', '卯'): '金泊金',
-    ('庚', '辰'): '白蜡金', ('辛', '巳'): '白蜡金', ('甲', '午'): '砂中金', ('乙', '未'): '砂中金',
-    ('壬', '申'): '剑锋金', ('癸', '酉'): '剑锋金', ('庚', '戌'): '钗钏金', ('辛', '亥'): '钗钏金',
-    ('戊', '子'): '霹雳火', ('己', '丑'): '霹雳火', ('丙', '寅'): '炉中火', ('丁', '卯'): '炉中火',
-    ('甲', '辰'): '覆灯火', ('乙', '巳'): '覆灯火', ('戊', '午'): '天上火', ('己', '未'): '天上火',
-    ('丙', '申'): '山下火', ('丁', '酉'): '山下火', ('甲', '戌'): '山头火', ('乙', '亥'): '山头火',
-    ('壬', '子'): '桑柘木', ('癸', '丑'): '桑柘木', ('庚', '寅'): '松柏木', ('辛', '卯'): '松柏木',
-    ('戊', '辰'): '大林木', ('己', '巳'): '大林木', ('壬', '午'): '杨柳木', ('癸', '未'): '杨柳木',
-    ('庚', '申'): '石榴木', ('辛', '酉'): '石榴木', ('戊', '戌'): '平地木', ('己', '亥'): '平地木',
-    ('庚', '子'): '壁上土', ('辛', '丑'): '壁上土', ('戊', '寅'): '城头土', ('己', '卯'): '城头土',
-    ('丙', '辰'): '砂中土', ('丁', '巳'): '砂中土', ('庚', '午'): '路旁土', ('辛', '未'): '路旁土',
-    ('戊', '申'): '大驿土', ('己', '酉'): '大驿土', ('丙', '戌'): '屋上土', ('丁', '亥'): '屋上土',
-    ('丙', '子'): '涧下水', ('丁', '丑'): '涧下水', ('甲', '寅'): '大溪水', ('乙', '卯'): '大溪水',
-    ('壬', '辰'): '长流水', ('癸', '巳'): '长流水', ('丙', '午'): '天河水', ('丁', '未'): '天河水',
-    ('甲', '申'): '井泉水', ('乙', '酉'): '井泉水', ('壬', '戌'): '大海水', ('癸', '亥'): '大海水'
-}
-
-# 空亡计算
-EMPTIES = {
-    ('甲', '子'): ('戌', '亥'), ('乙', '丑'): ('戌', '亥'), 
-    ('丙', '寅'): ('戌', '亥'), ('丁', '卯'): ('戌', '亥'), 
-    ('戊', '辰'): ('戌', '亥'), ('己', '巳'): ('戌', '亥'),
-    ('庚', '午'): ('戌', '亥'), ('辛', '未'): ('戌', '亥'),
-    ('壬', '申'): ('戌', '亥'), ('癸', '酉'): ('戌', '亥'),
-
-    ('甲', '戌'): ('申', '酉'), ('乙', '亥'): ('申', '酉'),
-    ('丙', '子'): ('申', '酉'), ('丁', '丑'): ('申', '酉'),
-    ('戊', '寅'): ('申', '酉'), ('己', '卯'): ('申', '酉'),
-    ('庚', '辰'): ('申', '酉'), ('辛', '巳'): ('申', '酉'),
-    ('壬', '午'): ('申', '酉'), ('癸', '未'): ('申', '酉'),
-
-    ('甲', '申'): ('午', '未'), ('乙', '酉'): ('午', '未'),
-    ('丙', '戌'): ('午', '未'), ('丁', '亥'): ('午', '未'),
-    ('戊', '子'): ('午', '未'), ('己', '丑'): ('午', '未'), 
-    ('庚', '寅'): ('午', '未'), ('辛', '卯'): ('午', '未'),
-    ('壬', '辰'): ('午', '未'), ('癸', '巳'): ('午', '未'),
-
-    ('甲', '午'): ('辰', '巳'), ('乙', '未'): ('辰', '巳'),
-    ('丙', '申'): ('辰', '巳'), ('丁', '酉'): ('辰', '巳'),
-    ('戊', '戌'): ('辰', '巳'), ('己', '亥'): ('辰', '巳'),
-    ('庚', '子'): ('辰', '巳'), ('辛', '丑'): ('辰', '巳'),
-    ('壬', '寅'): ('辰', '巳'), ('癸', '卯'): ('辰', '巳'),
-
-    ('甲', '辰'): ('寅', '卯'), ('乙', '巳'): ('寅', '卯'),
-    ('丙', '午'): ('寅', '卯'), ('丁', '未'): ('寅', '卯'),
-    ('戊', '申'): ('寅', '卯'), ('己', '酉'): ('寅', '卯'),
-    ('庚', '戌'): ('寅', '卯'), ('辛', '亥'): ('寅', '卯'),
-    ('壬', '子'): ('寅', '卯'), ('癸', '丑'): ('寅', '卯'), 
-
-    ('甲', '寅'): ('子', '丑'), ('乙', '卯'): ('子', '丑'),     
-    ('丙', '辰'): ('子', '丑'), ('丁', '巳'): ('子', '丑'), 
-    ('戊', '午'): ('子', '丑'), ('己', '未'): ('子', '丑'),
-    ('庚', '申'): ('子', '丑'), ('辛', '酉'): ('子', '丑'), 
-    ('壬', '戌'): ('子', '丑'), ('癸', '亥'): ('子', '丑'),    
-}
-
 # 地支关系
 ZHI_ATTS = {
     "子": {"冲": "午", "刑": "卯", "被刑": "卯", "合": ("申", "辰"), "会": ("亥", "丑"), '害': '未', '破': '酉'},
@@ -223,112 +166,36 @@ GAN_HES = {
     ("丁", "壬"): "木", ("戊", "癸"): "火"
 }
 
-# 神煞数据
-SHENSHA_DATA = {
-    '天乙': {"甲": '未丑', "乙": "申子", "丙": "酉亥", "丁": "酉亥", "戊": '未丑', "己": "申子", 
-             "庚": "未丑", "辛": "寅午", "壬": "卯巳", "癸": "卯巳"},
-    '文昌': {"甲": '巳', "乙": "午", "丙": "申", "丁": "酉", "戊": "申", "己": "酉", 
-             "庚": "亥", "辛": "子", "壬": "寅", "癸": "丑"},
-    '将星': {"子": "子", "丑": "酉", "寅": "午", "卯": "卯", "辰": "子", "巳": "酉", 
-             "午": "午", "未": "卯", "申": "子", "酉": "酉", "戌": "午", "亥": "卯"},
-    '华盖': {"子": "辰", "丑": "丑", "寅": "戌", "卯": "未", "辰": "辰", "巳": "丑", 
-             "午": "戌", "未": "未", "申": "辰", "酉": "丑", "戌": "戌", "亥": "未"},
-    '驿马': {"子": "寅", "丑": "亥", "寅": "申", "卯": "巳", "辰": "寅", "巳": "亥", 
-             "午": "申", "未": "巳", "申": "寅", "酉": "亥", "戌": "申", "亥": "巳"},
-    '桃花': {"子": "酉", "丑": "午", "寅": "卯", "卯": "子", "辰": "酉", "巳": "午", 
-             "午": "卯", "未": "子", "申": "酉", "酉": "午", "戌": "卯", "亥": "子"},
-}
-
 # 胎元、命宫计算相关
 YUAN_GONG = {
     "子": "午", "丑": "未", "寅": "申", "卯": "酉", "辰": "戌", "巳": "亥",
     "午": "子", "未": "丑", "申": "寅", "酉": "卯", "戌": "辰", "亥": "巳"
 }
 
-# 城市经纬度数据
-def parse_city_coordinates(file_path: str) -> dict:
-    """从文件解析城市经纬度数据"""
-    city_coordinates = {}
-    try:
-        with open(file_path, 'r', encoding='utf-8') as file:
-            for line in file:
-                parts = line.strip().split()
-                if len(parts) < 4:
-                    continue
-                
-                code = parts[0]
-                name = parts[1]
-                try:
-                    lng = float(parts[2])
-                    lat = float(parts[3])
-                except ValueError:
-                    continue
-                
-                city_coordinates[name] = (lng, lat)
-                
-                # 添加简化名称支持
-                simplified_name = name
-                for suffix in ['市', '省', '自治区', '特别行政区', '县', '区']:
-                    if simplified_name.endswith(suffix):
-                        simplified_name = simplified_name[:-len(suffix)]
-                        city_coordinates[simplified_name] = (lng, lat)
-                        break
-    except FileNotFoundError:
-        # 如果文件不存在，使用默认数据
-        city_coordinates = {
-            "北京": (116.40, 39.90), "上海": (121.47, 31.23),
-            "广州": (113.23, 23.16), "深圳": (114.05, 22.52),
-            "杭州": (120.19, 30.26), "南京": (118.78, 32.04),
-            "武汉": (114.31, 30.52), "成都": (104.06, 30.67),
-            "西安": (108.95, 34.27), "重庆": (106.54, 29.59)
-        }
-    
-    return city_coordinates
-
 # 计算真太阳时
 def calculate_eot(date: datetime) -> float:
-    """计算时差修正值(EoT) - 单位：分钟"""
-    n = date.timetuple().tm_yday
-    b = math.radians((n - 81) * 360 / 365.242)
-    eot = 9.87 * math.sin(2*b) - 7.53 * math.cos(b) - 1.5 * math.sin(b)
-    return eot
+    """计算时差修正值(EoT) - 单位：分钟（按年内日序查表）"""
+    return solar_time.eot_minutes(date.timetuple().tm_yday)
 
 def true_solar_time(city_name: str, local_dt: datetime) -> datetime:
     """计算真太阳时"""
-    city_coordinates = parse_city_coordinates("/app/app/data.txt")
-    
-    # 尝试精确匹配
-    coordinates = city_coordinates.get(city_name)
-    
-    if not coordinates:
-        # 尝试模糊匹配
-        for city, coord in city_coordinates.items():
-            if city_name in city or city in city_name:
-                coordinates = coord
-                break
-    
-    if not coordinates:
-        # 使用北京作为默认
-        coordinates = (116.40, 39.90)
-    
-    lon, lat = coordinates
-    
-    # 计算经度时差
-    lon_diff = (120 - lon) * 4
-    
-    # 计算时差修正值
-    eot = calculate_eot(local_dt)
-    
-    # 计算真太阳时
-    total_correction = timedelta(minutes=(lon_diff + eot))
-    return local_dt + total_correction
+    # 城市坐标索引启动时构建一次（精确、逐级全称、前缀补全，找不到用北京）
+    lon, lat = get_city_index().coordinates(city_name)
+    return solar_time.true_solar_time(local_dt, lon)
 
 # 计算十神关系
 def ten_shen(day_gan, target_gan):
     """使用完整的十神映射关系计算十神"""
-    if day_gan not in TEN_DEITIES:
+    day_idx = ganzhi.GAN_INDEX.get(day_gan)
+    if day_idx is None:
         return "未知"
     
+    gan_idx = ganzhi.GAN_INDEX.get(target_gan)
+    if gan_idx is not None:
+        return ganzhi.SHI_SHEN_SHORT[ganzhi.GAN_SHI_SHEN[day_idx * 10 + gan_idx]]
+    
+    # 长生、库、五行等非天干键仍走完整映射表
+    
     deities_map = TEN_DEITIES[day_gan]
     if target_gan in deities_map:
         return deities_map[target_gan]
@@ -337,13 +204,13 @@ def ten_shen(day_gan, target_gan):
 
 def ten_shen_dz(day_gan, target_dz):
     """根据地支藏干计算十神关系"""
-    if target_dz not in DZ_CANG_GAN:
+    day_idx = ganzhi.GAN_INDEX.get(day_gan)
+    zhi_idx = ganzhi.ZHI_INDEX.get(target_dz)
+    if day_idx is None or zhi_idx is None:
         return "未知"
     
-    # 获取地支藏干主气
-    target_gan = max(DZ_CANG_GAN[target_dz].items(), key=lambda x: x[1])[0]
-    
-    return ten_shen(day_gan, target_gan)
+    # 按地支藏干主气取十神
+    return ganzhi.SHI_SHEN_SHORT[ganzhi.ZHI_SHI_SHEN[day_idx * 12 + zhi_idx]]
 
 # 计算五行强弱
 def calculate_wu_xing_strength(gans, zhis, day_gan):
@@ -383,160 +250,81 @@ def calculate_wu_xing_strength(gans, zhis, day_gan):
     }
 
 # 计算神煞
-def calculate_shensha(gans, zhis, day_gan):
-    """计算神煞"""
-    shensha_list = []
-    
-    # 天乙贵人
-    if day_gan in SHENSHA_DATA['天乙']:
-        tianyi_positions = SHENSHA_DATA['天乙'][day_gan]
-        for zhi in zhis:
-            if zhi in tianyi_positions:
-                shensha_list.append("天乙贵人")
-    
-    # 文昌贵人
-    if day_gan in SHENSHA_DATA['文昌']:
-        wenchang_position = SHENSHA_DATA['文昌'][day_gan]
-        if wenchang_position in zhis:
-            shensha_list.append("文昌贵人")
-    
-    # 将星
-    jiangxing_position = SHENSHA_DATA['将星'].get(zhis[0])  # 年支
-    if jiangxing_position in zhis:
-        shensha_list.append("将星")
-    
-    # 华盖
-    huagai_position = SHENSHA_DATA['华盖'].get(zhis[0])  # 年支
-    if huagai_position in zhis:
-        shensha_list.append("华盖")
-    
-    # 驿马
-    yima_position = SHENSHA_DATA['驿马'].get(zhis[0])  # 年支
-    if yima_position in zhis:
-        shensha_list.append("驿马")
-    
-    # 桃花
-    taohua_position = SHENSHA_DATA['桃花'].get(zhis[0])  # 年支
-    if taohua_position in zhis:
-        shensha_list.append("桃花")
-    
-    return list(set(shensha_list))  # 去重
+def calculate_shensha(gans, zhis):
+    """计算神煞（规则见 shensha.SHENSHA_RULES，日干、年支等锚点取自四柱本身）"""
+    pillars = [ganzhi.PILLAR_INDEX[gan + zhi] for gan, zhi in zip(gans, zhis)]
+    return shensha.chart_star_names(pillars)
 
-# 计算地支关系
+def calculate_pillar_shensha(gans, zhis):
+    """计算各柱神煞"""
+    pillars = [ganzhi.PILLAR_INDEX[gan + zhi] for gan, zhi in zip(gans, zhis)]
+    return dict(zip(shensha.PILLAR_POSITION_NAMES, shensha.chart_stars(pillars)))
+
+# 计算干支关系
 def calculate_zhi_relations(zhis):
-    """计算地支之间的关系"""
-    relations = []
-    
-    for i, zhi1 in enumerate(zhis):
-        for j, zhi2 in enumerate(zhis):
-            if i >= j:
-                continue
-            
-            # 六合
-            if zhi1 + zhi2 in ZHI_6HES:
-                relations.append(f"{zhi1}{zhi2}六合({ZHI_6HES[zhi1+zhi2]})")
-            elif zhi2 + zhi1 in ZHI_6HES:
-                relations.append(f"{zhi1}{zhi2}六合({ZHI_6HES[zhi2+zhi1]})")
-            
-            # 相冲
-            if ZHI_ATTS[zhi1].get("冲") == zhi2:
-                relations.append(f"{zhi1}{zhi2}相冲")
-            
-            # 相刑
-            if ZHI_ATTS[zhi1].get("刑") == zhi2:
-                relations.append(f"{zhi1}{zhi2}相刑")
-            
-            # 相害
-            if ZHI_ATTS[zhi1].get("害") == zhi2:
-                relations.append(f"{zhi1}{zhi2}相害")
-            
-            # 相破
-            if ZHI_ATTS[zhi1].get("破") == zhi2:
-                relations.append(f"{zhi1}{zhi2}相破")
-    
-    # 检查三合
-    for sanhe, element in ZHI_3HES.items():
-        if all(zhi in zhis for zhi in sanhe):
-            relations.append(f"{sanhe}三合{element}")
-    
-    return relations
+    """计算地支之间的关系（六合、冲、刑、害、破、三合、半合、三会、自刑）"""
+    return relation_detector.detect((), [ganzhi.ZHI_INDEX[zhi] for zhi in zhis])
+
+def calculate_gan_relations(gans):
+    """计算天干之间的关系（五合、相冲）"""
+    return relation_detector.detect([ganzhi.GAN_INDEX[gan] for gan in gans], ())
 
 # 计算纳音五行
 def calculate_nayin(gan_zhi):
     """计算纳音五行"""
-    gan, zhi = gan_zhi
-    return NAYINS.get((gan, zhi), "未知")
+    pillar = ganzhi.PILLAR_INDEX.get("".join(gan_zhi))
+    if pillar is None:
+        return "未知"
+    return ganzhi.NAYIN_NAMES[ganzhi.PILLAR_NAYIN[pillar]]
 
 # 计算空亡
 def calculate_empty(gan_zhi):
     """计算空亡"""
-    if gan_zhi in EMPTIES:
-        return EMPTIES[gan_zhi]
-    return []
+    pillar = ganzhi.PILLAR_INDEX.get("".join(gan_zhi))
+    if pillar is None:
+        return []
+    first, second = ganzhi.PILLAR_XUN_KONG[pillar]
+    return (DZ[first], DZ[second])
 
 # 计算大运
 def get_next_gan_zhi(gan_zhi, direction=1):
     """获取下一个干支组合"""
-    gan = gan_zhi[0]
-    zhi = gan_zhi[1]
-    
-    gan_idx = TG.index(gan)
-    zhi_idx = DZ.index(zhi)
-    
-    next_gan_idx = (gan_idx + direction) % 10
-    next_zhi_idx = (zhi_idx + direction) % 12
-    
-    return TG[next_gan_idx] + DZ[next_zhi_idx]
+    pillar = ganzhi.PILLAR_INDEX[gan_zhi]
+    return ganzhi.PILLAR_NAMES[(pillar + direction) % 60]
 
-def calc_da_yun(birth_year, month_gan_zhi, day_gan, gender):
-    """计算大运"""
-    # 判断年干阴阳
-    year_gan = TG[(birth_year - 4) % 10]
-    is_yang_year = YIN_YANG[year_gan]
-    
-    # 确定排运方向
-    if (is_yang_year and gender == "男") or (not is_yang_year and gender == "女"):
-        direction = 1  # 顺排
-    else:
-        direction = -1  # 逆排
+def calc_da_yun(birth_dt, day_gan, gender, sect=1):
+    """计算大运（排运方向、起运年龄与大运干支均按出生时刻与交节精确推算）"""
+    forward, steps = da_yun_of(birth_dt, 1 if gender == "男" else 2, sect, 11)
+    start_age = steps[1][1]
     
-    # 简化起运年龄计算
-    start_age = 8
-    
-    # 计算10步大运
+    # 计算10步大运（跳过童限）
     da_yun = []
-    current_gan_zhi = month_gan_zhi
-    
-    for i in range(10):
-        if i == 0:
-            current_gan_zhi = get_next_gan_zhi(month_gan_zhi, direction)
-        else:
-            current_gan_zhi = get_next_gan_zhi(current_gan_zhi, direction)
-        
-        start_year = start_age + i * 10
-        end_year = start_year + 9
-        
+    day_idx = ganzhi.GAN_INDEX[day_gan]
+    for _, age, pillar in steps[1:]:
         da_yun.append({
-            "干支": current_gan_zhi,
-            "起止年龄": f"{start_year}-{end_year}岁",
-            "十神干": ten_shen(day_gan, current_gan_zhi[0]),
-            "十神支": ten_shen_dz(day_gan, current_gan_zhi[1])
+            "干支": ganzhi.PILLAR_NAMES[pillar],
+            "起止年龄": f"{age}-{age + 9}岁",
+            "十神干": ganzhi.SHI_SHEN_SHORT[ganzhi.gan_shi_shen(day_idx, pillar % 10)],
+            "十神支": ganzhi.SHI_SHEN_SHORT[ganzhi.zhi_shi_shen(day_idx, pillar % 12)]
         })
     
     return {
-        "排运方式": "顺排" if direction == 1 else "逆排",
+        "排运方式": "顺排" if forward else "逆排",
         "起运年龄": f"{start_age}岁",
         "大运": da_yun
     }
 
 # 主计算函数
-def calc_bazi(name, city, gender, year, month, day, hour, minute=0):
-    """计算八字"""
+def calc_bazi(name, city, gender, year, month, day, hour, minute=0, use_true_solar=False, sect=1):
+    """计算八字（use_true_solar 为 True 时按真太阳时排盘，sect 为起运算法流派，同 lunar_python getYun）"""
     # 1. 北京时 -> 当地标准时
     local_dt = datetime(year, month, day, hour, minute)
     
     # 2. 当地标准时 -> 真太阳时
     true_dt = true_solar_time(city, local_dt)
+    if use_true_solar:
+        year, month, day, hour, minute = true_dt.year, true_dt.month, true_dt.day, true_dt.hour, true_dt.minute
+    birth_dt = true_dt if use_true_solar else local_dt
     
     # 3. 计算八字
     day_obj = sxtwl.fromSolar(year, month, day)
@@ -547,20 +335,20 @@ def calc_bazi(name, city, gender, year, month, day, hour, minute=0):
     lunar_day = day_obj.getLunarDay()
     is_leap = bool(day_obj.isLunarLeap())
     
-    # 获取干支
-    yg, mg, dg, hg = (
-        TG[day_obj.getYearGZ().tg] + DZ[day_obj.getYearGZ().dz],
-        TG[day_obj.getMonthGZ().tg] + DZ[day_obj.getMonthGZ().dz],
-        TG[day_obj.getDayGZ().tg] + DZ[day_obj.getDayGZ().dz],
-        TG[day_obj.getHourGZ(hour).tg] + DZ[day_obj.getHourGZ(hour).dz]
-    )
+    # 获取干支编码，字符串只在输出时转换
+    pillars = [
+        ganzhi.pillar_of(gz.tg, gz.dz)
+        for gz in (day_obj.getYearGZ(), day_obj.getMonthGZ(), day_obj.getDayGZ(), day_obj.getHourGZ(hour))
+    ]
+    yg, mg, dg, hg = (ganzhi.PILLAR_NAMES[p] for p in pillars)
     
     # 提取四柱
     gans = [yg[0], mg[0], dg[0], hg[0]]
     zhis = [yg[1], mg[1], dg[1], hg[1]]
     
     # 计算胎元和命宫
-    tai_yuan = TG[(TG.index(mg[0]) + 1) % 10] + DZ[(DZ.index(mg[1]) + 3) % 12]
+    month_p = pillars[1]
+    tai_yuan = TG[(month_p % 10 + 1) % 10] + DZ[(month_p % 12 + 3) % 12]
     
     # 使用lunar_python计算命宫
     solar = Solar.fromYmdHms(year, month, day, hour, minute, 0)
@@ -570,8 +358,10 @@ def calc_bazi(name, city, gender, year, month, day, hour, minute=0):
     
     # 计算各项命理信息
     wu_xing_strength = calculate_wu_xing_strength(gans, zhis, dg[0])
-    shensha = calculate_shensha(gans, zhis, dg[0])
+    shensha_names = calculate_shensha(gans, zhis)
+    pillar_shensha = calculate_pillar_shensha(gans, zhis)
     zhi_relations = calculate_zhi_relations(zhis)
+    gan_relations = calculate_gan_relations(gans)
     
     # 计算纳音五行
     nayins = {
@@ -590,7 +380,7 @@ def calc_bazi(name, city, gender, year, month, day, hour, minute=0):
     }
     
     # 计算大运
-    da_yun_info = calc_da_yun(year, mg, dg[0], gender)
+    da_yun_info = calc_da_yun(birth_dt, dg[0], gender, sect)
     
     # 构建返回结果
     result = {
@@ -624,8 +414,10 @@ def calc_bazi(name, city, gender, year, month, day, hour, minute=0):
             "时干": ten_shen(dg[0], hg[0]),
             "时支": ten_shen_dz(dg[0], hg[1])
         },
+        "天干关系": gan_relations,
         "地支关系": zhi_relations,
-        "神煞": shensha,
+        "神煞": shensha_names,
+        "各柱神煞": pillar_shensha,
         "空亡": empties_info,
         "特殊信息": {
             "胎元": tai_yuan,
@@ -637,11 +429,12 @@ def calc_bazi(name, city, gender, year, month, day, hour, minute=0):
     return result
 
 # API接口函数
-def solar_to_bazi(name: str, city: str, gender: str, year: int, month: int, day: int, hour: int, minute: int = 0):
+def solar_to_bazi(name: str, city: str, gender: str, year: int, month: int, day: int, hour: int, minute: int = 0,
+                  use_true_solar: bool = False, sect: int = 1):
     """API接口函数"""
     json_data = {}
     try:
-        json_data = calc_bazi(name, city, gender, year, month, day, hour, minute)
+        json_data = calc_bazi(name, city, gender, year, month, day, hour, minute, use_true_solar, sect)
     except Exception as e:
         print(f"计算错误: {e}")
         json_data = {"error": str(e)}
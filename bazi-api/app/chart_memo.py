@@ -0,0 +1,133 @@
+"""
+排盘记忆表
+同一排盘分段（同日、同时辰、同在某个节气之后）内的出生时刻四柱、纳音、十神、农历、节气完全相同，
+以（分段序号, 节气序号, 流派）为规范键缓存这部分结果，LRU 淘汰并统计命中率；
+同一 LRU 也按四柱编码缓存只由八字决定的分析片段，可限制估算内存
+"""
+
+import sys
+from collections import OrderedDict
+from datetime import datetime
+from threading import Lock
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from .chart_table import get_chart_table
+from .jieqi_table import get_jieqi_table, to_minutes
+
+DEFAULT_MAXSIZE = 65536
+
+
+def chart_key(dt: datetime, sect: int) -> Optional[Tuple[int, int, int]]:
+    """
+    出生时刻的规范键：排盘分段序号、已交节气序号（含中气）、流派
+    超出排盘分段表范围返回 None（不缓存）
+    """
+    segment = get_chart_table().segment_index(dt)
+    if segment < 0:
+        return None
+    return segment, get_jieqi_table().locate(to_minutes(dt)), sect
+
+
+def freeze(value: Any) -> Any:
+    """缓存值转为只读结构（递归）：dict 转 MappingProxyType，list 转 tuple"""
+    if isinstance(value, (dict, MappingProxyType)):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+def thaw(value: Any) -> Any:
+    """只读缓存值复制为可修改的 dict / list（递归），在响应出口调用"""
+    if isinstance(value, (dict, MappingProxyType)):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [thaw(item) for item in value]
+    return value
+
+
+def deep_sizeof(value: Any) -> int:
+    """估算对象占用字节数（递归计入容器内的元素，共享的短字符串也重复计入）"""
+    size = sys.getsizeof(value)
+    if isinstance(value, (str, bytes, int, float, bool)) or value is None:
+        return size
+    if isinstance(value, dict) or hasattr(value, "items"):
+        return size + sum(deep_sizeof(k) + deep_sizeof(v) for k, v in value.items())
+    if isinstance(value, (tuple, list, set, frozenset)):
+        return size + sum(deep_sizeof(item) for item in value)
+    return size
+
+
+class ChartMemo:
+    """
+    线程安全的 LRU 记忆表
+    maxsize 限制条目数，max_bytes（可选）按 deep_sizeof 估算限制总内存
+    缓存值在多个响应间共享，应先 freeze 为只读结构，输出时 thaw 复制
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE, max_bytes: Optional[int] = None):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.bytes = 0
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._sizes: Dict[Hashable, int] = {}
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """取缓存，命中时移到最近使用端"""
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """写入缓存，超出容量时淘汰最久未用的条目"""
+        size = deep_sizeof(value) if self.max_bytes is not None else 0
+        with self._lock:
+            self.bytes += size - self._sizes.get(key, 0)
+            self._sizes[key] = size
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize or (
+                    self.max_bytes is not None and self.bytes > self.max_bytes and len(self._data) > 1):
+                old_key, _ = self._data.popitem(last=False)
+                self.bytes -= self._sizes.pop(old_key)
+
+    def get_or_compute(self, key: Optional[Hashable], compute: Callable[[], Any]) -> Any:
+        """键为 None 时直接计算不缓存"""
+        if key is None:
+            return compute()
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._sizes.clear()
+            self.hits = self.misses = self.bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """命中、未命中次数与命中率"""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "bytes": self.bytes,
+            "maxBytes": self.max_bytes,
+            "hitRate": self.hits / total if total else 0.0,
+        }
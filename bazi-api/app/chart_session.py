@@ -0,0 +1,94 @@
+"""
+排盘会话
+/8char/get-full 排一次盘后把中间结果（排盘分段结果、起运）与算好的预测放进短期会话，返回不透明的句柄；
+前端随后带句柄调用 /8char/get-info、/8char/get-prediction 时直接复用，不再重新排盘：
+- 句柄只是提示：会话过期、被淘汰或出生时刻/性别/流派不符时照常计算，结果不受影响
+- 会话只在本进程内，多 worker 部署时落到其他 worker 的请求同样照常计算
+"""
+
+import os
+import secrets
+import time
+from collections import OrderedDict
+from datetime import datetime
+from threading import Lock
+from typing import Any, Dict, Optional
+
+from .bazi_calculator_new import PreparedChart
+
+# 环境变量：会话有效期（秒）
+TTL_ENV = "BAZI_SESSION_TTL"
+DEFAULT_TTL = 600
+DEFAULT_MAXSIZE = 10000
+
+
+class ChartSession:
+    """一次排盘的会话：已排好的盘及按需算好的预测"""
+
+    __slots__ = ("chart", "prediction", "expires")
+
+    def __init__(self, chart: PreparedChart, prediction: Optional[Dict[str, Any]], expires: float):
+        self.chart = chart
+        self.prediction = prediction
+        self.expires = expires
+
+
+class ChartSessions:
+    """
+    线程安全的会话表：按有效期过期，超出容量时淘汰最早创建的会话
+    """
+
+    def __init__(self, ttl: float = DEFAULT_TTL, maxsize: int = DEFAULT_MAXSIZE):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[str, ChartSession]" = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def create(self, chart: PreparedChart, prediction: Optional[Dict[str, Any]] = None) -> str:
+        """保存会话，返回句柄"""
+        handle = secrets.token_urlsafe(16)
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            self._data[handle] = ChartSession(chart, prediction, now + self.ttl)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return handle
+
+    def get(self, handle: Optional[str], dt: datetime, gender: int, sect: int) -> Optional[ChartSession]:
+        """取会话：句柄无效、已过期或与请求的出生时刻/性别/流派不符时返回 None"""
+        if not handle:
+            return None
+        with self._lock:
+            session = self._data.get(handle)
+            if session is not None and session.expires <= time.monotonic():
+                del self._data[handle]
+                session = None
+            if session is None or session.chart[:3] != (dt, gender, sect):
+                self.misses += 1
+                return None
+            self.hits += 1
+            return session
+
+    def _expire(self, now: float) -> None:
+        """按创建顺序删除已过期的会话（有效期相同，过期顺序即创建顺序）"""
+        while self._data:
+            handle, session = next(iter(self._data.items()))
+            if session.expires > now:
+                break
+            del self._data[handle]
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {"size": len(self._data), "ttl": self.ttl, "hits": self.hits, "misses": self.misses,
+                "hitRate": self.hits / total if total else 0.0}
+
+
+def get_chart_sessions() -> ChartSessions:
+    """按环境变量创建会话表"""
+    return ChartSessions(float(os.environ.get(TTL_ENV, DEFAULT_TTL)))
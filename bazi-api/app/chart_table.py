@@ -0,0 +1,139 @@
+"""
+排盘分段表
+1900-2100 年间四柱只在时辰交界（奇数整点）、子夜、节的交节时刻发生变化，
+构建时枚举全部分段的起始时刻与四柱编码写入二进制文件，
+运行时 mmap 加载，一次二分即可取得四柱
+"""
+
+import bisect
+import mmap
+import os
+import struct
+from datetime import datetime
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .jieqi_table import get_jieqi_table, to_minutes
+from .pillar_engine import PillarEngine
+
+FIRST_YEAR = 1900
+LAST_YEAR = 2100
+
+# 文件头：魔数、首年、末年、分段数
+HEADER = struct.Struct("<4siii")
+MAGIC = b"CHT1"
+
+# 每个分段的柱字段：年、月、日（流派1）、日（流派2）、时
+RECORD_SIZE = 5
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "chart_segments_1900_2100.bin")
+
+
+def compute_segments(first_year: int = FIRST_YEAR, last_year: int = LAST_YEAR) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    枚举分段起点（int32 分钟偏移）及各分段四柱编码（uint8，每段 5 字节）
+    """
+    start = to_minutes(datetime(first_year, 1, 1))
+    end = to_minutes(datetime(last_year + 1, 1, 1))
+
+    # 每天 13 个候选边界：子夜 0 点及 1、3、...、23 点
+    day_starts = np.arange(start, end, 1440, dtype=np.int64)
+    hour_marks = np.array([0] + list(range(60, 1440, 120)), dtype=np.int64)
+    boundaries = (day_starts[:, None] + hour_marks[None, :]).ravel()
+
+    # 节的交节时刻（小寒、立春、……，偶数位）
+    engine = PillarEngine.from_table(get_jieqi_table())
+    jie = engine.term_minutes[::2]
+    jie = jie[(jie > start) & (jie < end)]
+
+    starts = np.unique(np.concatenate([boundaries, jie]))
+    sect1 = engine.compute(starts, 1)
+    sect2 = engine.compute(starts, 2)
+
+    records = np.stack([
+        sect1["year"], sect1["month"], sect1["day"], sect2["day"], sect1["time"]
+    ], axis=1).astype(np.uint8)
+    return starts.astype(np.int32), records
+
+
+def build_chart_table(path: str = DEFAULT_PATH, first_year: int = FIRST_YEAR,
+                      last_year: int = LAST_YEAR) -> str:
+    """生成排盘分段表文件（先写临时文件再原子替换）"""
+    starts, records = compute_segments(first_year, last_year)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, first_year, last_year, len(starts)))
+        file.write(starts.astype("<i4").tobytes())
+        file.write(records.tobytes())
+    os.replace(tmp_path, path)
+    return path
+
+
+class ChartTable:
+    """
+    排盘分段表（只读 mmap）
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH):
+        self.path = path
+        with open(path, "rb") as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.first_year, self.last_year, count = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"排盘分段表格式错误: {path}")
+        view = memoryview(self._mmap)
+        offset = HEADER.size
+        self.starts = view[offset:offset + 4 * count].cast("i")
+        self.records = view[offset + 4 * count:offset + 4 * count + RECORD_SIZE * count]
+        self.end = to_minutes(datetime(self.last_year + 1, 1, 1))
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def segment_index(self, dt: datetime) -> int:
+        """所在分段序号，超出范围返回 -1"""
+        minutes = to_minutes(dt)
+        if minutes < self.starts[0] or minutes >= self.end:
+            return -1
+        return bisect.bisect_right(self.starts, minutes) - 1
+
+    def lookup(self, dt: datetime, sect: int = 1) -> Optional[Tuple[int, int, int, int]]:
+        """
+        查询四柱编码（年、月、日、时）
+        sect: 1=晚子时日柱算明天, 2=晚子时日柱算当天
+        """
+        index = self.segment_index(dt)
+        if index < 0:
+            return None
+        base = index * RECORD_SIZE
+        year, month, day1, day2, time = self.records[base:base + RECORD_SIZE]
+        return year, month, day2 if sect == 2 else day1, time
+
+    def lookup_many(self, dts: Sequence[datetime], sects: Sequence[int]) -> List[Optional[Tuple[int, int, int, int]]]:
+        """批量查询四柱编码：一次 searchsorted，超出范围的元素为 None"""
+        minutes = np.array([to_minutes(dt) for dt in dts], dtype=np.int64)
+        starts = np.frombuffer(self._mmap, dtype="<i4", count=len(self.starts), offset=HEADER.size)
+        index = np.searchsorted(starts, minutes, side="right") - 1
+        valid = (minutes >= starts[0]) & (minutes < self.end)
+        records = np.frombuffer(self.records, dtype=np.uint8).reshape(-1, RECORD_SIZE)[np.where(valid, index, 0)]
+        day = np.where(np.asarray(sects) == 2, records[:, 3], records[:, 2])
+        rows = np.stack([records[:, 0], records[:, 1], day, records[:, 4]], axis=1).tolist()
+        return [tuple(row) if ok else None for row, ok in zip(rows, valid.tolist())]
+
+
+_table: Optional[ChartTable] = None
+
+
+def get_chart_table(path: str = DEFAULT_PATH) -> ChartTable:
+    """获取进程内共享的排盘分段表，文件不存在时先生成"""
+    global _table
+    if _table is None or _table.path != path:
+        if not os.path.exists(path):
+            build_chart_table(path)
+        _table = ChartTable(path)
+    return _table
+
+
+if __name__ == "__main__":
+    print(build_chart_table())
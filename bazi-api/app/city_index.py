@@ -0,0 +1,211 @@
+"""
+城市坐标索引
+启动时由 data.txt（行政区划代码、名称、经度、纬度）构建一次，请求路径上不再读文件：
+- 全称精确查找为一次字典访问，去掉行政后缀的简称（如“南京”“沛”）经字典树查找
+- “江苏省南京市鼓楼区”这类逐级全称：用字典树剥掉最长的已知地名前缀，在其辖区（代码前缀）内继续匹配
+- 输入只是地名开头时（如“乌鲁木”）按字典树前缀补全，取文件中最靠前的地名
+- 数据文件可配置；文件修改后下次查询时重建索引并整体替换，查询中的请求仍使用旧索引
+"""
+
+import os
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 环境变量：城市数据文件路径
+PATH_ENV = "BAZI_CITY_DATA"
+DEFAULT_PATH = os.path.join(APP_DIR, "data.txt")
+# 检查数据文件是否修改的最小间隔（秒）
+RELOAD_INTERVAL = 5.0
+
+# 行政后缀（长的在前），去掉后作为简称
+SUFFIXES = ("特别行政区", "自治区", "自治州", "自治县", "自治旗", "市辖区", "地区", "新区", "林区",
+            "省", "市", "县", "区", "盟", "旗")
+# 国家名前缀，查找时直接去掉
+COUNTRY_PREFIXES = ("中华人民共和国", "中国")
+COUNTRY_CODE = "100000"
+
+# 未匹配时使用北京
+DEFAULT_COORDINATES = (116.40, 39.90)
+
+# 数据文件不存在时的内置城市
+FALLBACK_CITIES = (
+    ("北京", 116.40, 39.90), ("上海", 121.47, 31.23), ("广州", 113.23, 23.16), ("深圳", 114.05, 22.52),
+    ("杭州", 120.19, 30.26), ("南京", 118.78, 32.04), ("武汉", 114.31, 30.52), ("成都", 104.06, 30.67),
+    ("西安", 108.95, 34.27), ("重庆", 106.54, 29.59),
+)
+
+
+class City(NamedTuple):
+    """城市：行政区划代码、名称、经度、纬度"""
+    code: str
+    name: str
+    lng: float
+    lat: float
+
+
+def short_name(name: str) -> str:
+    """去掉一个行政后缀的简称（至少保留一个字）"""
+    for suffix in SUFFIXES:
+        if name.endswith(suffix) and len(name) > len(suffix):
+            return name[:-len(suffix)]
+    return name
+
+
+def region_prefix(code: str) -> str:
+    """辖区代码前缀：440000 → 44，440300 → 4403（国家不限定辖区）"""
+    if not code or code == COUNTRY_CODE:
+        return ""
+    while len(code) > 2 and code.endswith("00"):
+        code = code[:-2]
+    return code
+
+
+class _Node:
+    __slots__ = ("children", "terminal", "cities")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        # 以该节点为全称或简称的城市下标
+        self.terminal: List[int] = []
+        # 子树内全部城市下标（按文件顺序）
+        self.cities: List[int] = []
+
+
+class CityIndex:
+    """
+    城市坐标索引（构建后只读，可在线程间共享）
+    """
+
+    def __init__(self, cities: List[City], path: Optional[str] = None, mtime: Optional[float] = None):
+        self.cities = cities
+        self.path = path
+        self.mtime = mtime
+        self._names: Dict[str, List[int]] = {}
+        self._root = _Node()
+        for index, city in enumerate(cities):
+            self._names.setdefault(city.name, []).append(index)
+            for key in {city.name, short_name(city.name)}:
+                self._insert(key, index)
+
+    def __len__(self) -> int:
+        return len(self.cities)
+
+    def _insert(self, key: str, index: int) -> None:
+        node = self._root
+        for char in key:
+            node = node.children.setdefault(char, _Node())
+            if not node.cities or node.cities[-1] != index:
+                node.cities.append(index)
+        node.terminal.append(index)
+
+    def _node(self, key: str) -> Optional[_Node]:
+        node = self._root
+        for char in key:
+            node = node.children.get(char)
+            if node is None:
+                return None
+        return node
+
+    def _pick(self, indices: List[int], scope: str) -> Optional[City]:
+        """同名城市取辖区内的最后一个（与按文件顺序覆盖的旧行为一致）"""
+        for index in reversed(indices):
+            if self.cities[index].code.startswith(scope):
+                return self.cities[index]
+        return None
+
+    def get(self, name: str) -> Optional[City]:
+        """全称或简称精确查找"""
+        city = self._pick(self._names.get(name, ()), "")
+        if city is None:
+            node = self._node(short_name(name))
+            city = self._pick(node.terminal, "") if node is not None else None
+        return city
+
+    def lookup(self, name: str) -> Optional[City]:
+        """模糊查找：精确 → 逐级剥前缀 → 前缀补全，找不到返回 None"""
+        name = name.strip()
+        for prefix in COUNTRY_PREFIXES:
+            if name.startswith(prefix) and len(name) > len(prefix):
+                name = name[len(prefix):]
+                break
+        return self._resolve(name, "") if name else None
+
+    def _resolve(self, name: str, scope: str) -> Optional[City]:
+        city = self._pick(self._names.get(name, ()), scope)
+        if city is not None:
+            return city
+        node = self._node(short_name(name))
+        city = self._pick(node.terminal, scope) if node is not None else None
+        if city is not None:
+            return city
+
+        # 剥掉最长的已知地名前缀，在其辖区内匹配剩余部分
+        node, matched = self._root, []
+        for length, char in enumerate(name[:-1], 1):
+            node = node.children.get(char)
+            if node is None:
+                break
+            if node.terminal:
+                matched.append((length, node))
+        for length, prefix_node in reversed(matched):
+            parent = self._pick(prefix_node.terminal, scope)
+            if parent is not None:
+                return self._resolve(name[length:], region_prefix(parent.code)) or parent
+
+        # 前缀补全
+        node = self._node(name)
+        return self._pick(node.cities[::-1], scope) if node is not None else None
+
+    def coordinates(self, name: str) -> Tuple[float, float]:
+        """（经度, 纬度），找不到时用北京"""
+        city = self.lookup(name or "")
+        return (city.lng, city.lat) if city is not None else DEFAULT_COORDINATES
+
+
+def load_city_index(path: str = DEFAULT_PATH) -> CityIndex:
+    """读取数据文件构建索引，文件不存在时使用内置城市"""
+    try:
+        mtime = os.stat(path).st_mtime
+    except FileNotFoundError:
+        return CityIndex([City("", name, lng, lat) for name, lng, lat in FALLBACK_CITIES], path)
+    cities = []
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            parts = line.split()
+            if len(parts) < 4:
+                continue
+            try:
+                cities.append(City(parts[0], parts[1], float(parts[2]), float(parts[3])))
+            except ValueError:
+                continue
+    return CityIndex(cities, path, mtime)
+
+
+_index: Optional[CityIndex] = None
+_checked = 0.0
+_lock = threading.Lock()
+
+
+def get_city_index(path: Optional[str] = None) -> CityIndex:
+    """
+    获取进程内共享的城市索引
+    每 RELOAD_INTERVAL 秒最多检查一次数据文件修改时间，有变化时重建后整体替换
+    """
+    global _index, _checked
+    path = path or os.environ.get(PATH_ENV) or DEFAULT_PATH
+    index = _index
+    now = time.monotonic()
+    if index is not None and index.path == path and now - _checked < RELOAD_INTERVAL:
+        return index
+    with _lock:
+        _checked = now
+        try:
+            mtime = os.stat(path).st_mtime
+        except FileNotFoundError:
+            mtime = None
+        if _index is None or _index.path != path or _index.mtime != mtime:
+            _index = load_city_index(path)
+        return _index
@@ -83,6 +83,9 @@ class DayunItem(BaseModel):
     startAge: int
     pillar: str
     shishen: str
+    changSheng: str = ""   # 日干在该柱地支的十二长生
+    taisui: str = ""       # 与本命年支的太岁关系
+    relations: List[str] = []  # 与本命日柱的冲合刑害
 
 class YearItem(BaseModel):
     """流年项"""
@@ -90,6 +93,9 @@ class YearItem(BaseModel):
     pillar: str
     age: int
     shishen: str
+    changSheng: str = ""   # 日干在该柱地支的十二长生
+    taisui: str = ""       # 与本命年支的太岁关系
+    relations: List[str] = []  # 与本命日柱的冲合刑害
 
 class MonthItem(BaseModel):
     """流月项"""
@@ -99,6 +105,9 @@ class MonthItem(BaseModel):
     nextJieqiDate: str
     pillar: str
     shishen: str
+    changSheng: str = ""   # 日干在该柱地支的十二长生
+    taisui: str = ""       # 与本命年支的太岁关系
+    relations: List[str] = []  # 与本命日柱的冲合刑害
 
 class DayItem(BaseModel):
     """流日项"""
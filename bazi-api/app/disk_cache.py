@@ -0,0 +1,219 @@
+"""
+磁盘结果缓存
+可选的 SQLite 缓存层，保存排盘分段结果与大运流年预测的序列化结果，进程重启、容器重建后仍可直接命中：
+- 键带引擎版本（计算相关源码的哈希），升级后旧结果在打开时整批清除
+- 读取支持批量（一次 SELECT ... IN），启动时按最近访问时间批量预热内存记忆表
+- 写入与访问时间更新交给后台线程批量提交，请求线程不等待磁盘
+- 按估算总字节数淘汰最久未访问的条目
+"""
+
+import glob
+import hashlib
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 环境变量：缓存文件路径（未设置时不启用）、容量上限（字节）
+PATH_ENV = "BAZI_DISK_CACHE"
+MAX_BYTES_ENV = "BAZI_DISK_CACHE_BYTES"
+DEFAULT_MAX_BYTES = 256 << 20
+
+# 后台线程每批最多提交的操作数
+WRITE_BATCH = 512
+# 淘汰时降到上限的比例，避免每次写入都触发淘汰
+EVICT_TARGET = 0.9
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    key TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    version TEXT NOT NULL,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed);
+"""
+
+
+def engine_version() -> str:
+    """引擎版本：app 下非测试源码的哈希（任一计算逻辑改动都会使旧缓存失效）"""
+    digest = hashlib.sha1()
+    for path in sorted(glob.glob(os.path.join(APP_DIR, "*.py"))):
+        name = os.path.basename(path)
+        if name.startswith("test_") or name.endswith("_test.py"):
+            continue
+        digest.update(name.encode())
+        with open(path, "rb") as file:
+            digest.update(file.read())
+    return digest.hexdigest()[:16]
+
+
+def encode(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def decode(blob: bytes) -> Any:
+    return json.loads(blob)
+
+
+class DiskCache:
+    """
+    SQLite 结果缓存（WAL 模式，多个 worker 进程可共享同一文件）
+    """
+
+    def __init__(self, path: str, max_bytes: int = DEFAULT_MAX_BYTES, version: Optional[str] = None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.version = version or engine_version()
+        self._local = threading.local()
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        conn = self._connection()
+        conn.executescript(_SCHEMA)
+        # 引擎升级后清除旧版本结果
+        conn.execute("DELETE FROM cache WHERE version != ?", (self.version,))
+        conn.commit()
+        self.bytes = conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+
+        self._writer = threading.Thread(target=self._write_loop, name="disk-cache-writer", daemon=True)
+        self._writer.start()
+
+    def _connection(self) -> sqlite3.Connection:
+        """每个线程一个连接"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _key(self, kind: str, key: Any) -> str:
+        return f"{kind}:{self.version}:{json.dumps(key, separators=(',', ':'))}"
+
+    def get(self, kind: str, key: Any) -> Optional[Any]:
+        """读取单条，未命中返回 None"""
+        return self.get_many(kind, [key])[0]
+
+    def get_many(self, kind: str, keys: Iterable[Any]) -> List[Optional[Any]]:
+        """批量读取：一次查询取回全部命中条目，按 keys 顺序返回值，未命中为 None"""
+        full_keys = [self._key(kind, key) for key in keys]
+        found = {}
+        conn = self._connection()
+        for start in range(0, len(full_keys), 900):
+            chunk = full_keys[start:start + 900]
+            rows = conn.execute(
+                f"SELECT key, value FROM cache WHERE key IN ({','.join('?' * len(chunk))})", chunk
+            ).fetchall()
+            for full_key, blob in rows:
+                found[full_key] = decode(blob)
+        if found:
+            self._queue.put(("touch", list(found), time.time()))
+        return [found.get(full_key) for full_key in full_keys]
+
+    def load_recent(self, kind: str, limit: int) -> List[Tuple[Any, Any]]:
+        """按最近访问时间取回（键, 值），用于启动时预热内存记忆表"""
+        rows = self._connection().execute(
+            "SELECT key, value FROM cache WHERE kind = ? AND version = ? ORDER BY accessed DESC LIMIT ?",
+            (kind, self.version, limit)
+        ).fetchall()
+        prefix = len(f"{kind}:{self.version}:")
+        return [(json.loads(full_key[prefix:]), decode(blob)) for full_key, blob in rows]
+
+    def put(self, kind: str, key: Any, value: Any) -> None:
+        """异步写入"""
+        blob = encode(value)
+        self._queue.put(("put", (self._key(kind, key), kind, blob), time.time()))
+
+    def flush(self) -> None:
+        """等待已排队的写入全部提交"""
+        self._queue.join()
+
+    def close(self) -> None:
+        self.flush()
+        self._queue.put(None)
+        self._writer.join()
+
+    def _write_loop(self) -> None:
+        conn = self._connection()
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                conn.close()
+                return
+            batch = [item]
+            while len(batch) < WRITE_BATCH:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.put(None)
+                    self._queue.task_done()
+                    break
+                batch.append(item)
+            try:
+                self._apply(conn, batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _apply(self, conn: sqlite3.Connection, batch: List[tuple]) -> None:
+        """一个事务提交一批写入、访问时间更新，必要时淘汰"""
+        with conn:
+            for op, payload, now in batch:
+                if op == "put":
+                    full_key, kind, blob = payload
+                    old = conn.execute("SELECT size FROM cache WHERE key = ?", (full_key,)).fetchone()
+                    conn.execute(
+                        "INSERT OR REPLACE INTO cache (key, kind, version, value, size, accessed) VALUES (?, ?, ?, ?, ?, ?)",
+                        (full_key, kind, self.version, blob, len(blob) + len(full_key), now)
+                    )
+                    self.bytes += len(blob) + len(full_key) - (old[0] if old else 0)
+                else:
+                    conn.executemany("UPDATE cache SET accessed = ? WHERE key = ?", [(now, key) for key in payload])
+            if self.bytes > self.max_bytes:
+                self._evict(conn)
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        """删除最久未访问的条目，直到总量降到上限的 EVICT_TARGET"""
+        target = self.max_bytes * EVICT_TARGET
+        # 多个进程共用文件时各自的计数会偏离，淘汰前以库内总量为准
+        self.bytes = conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+        rows = conn.execute("SELECT key, size FROM cache ORDER BY accessed").fetchall()
+        doomed = []
+        for full_key, size in rows:
+            if self.bytes <= target:
+                break
+            doomed.append((full_key,))
+            self.bytes -= size
+        conn.executemany("DELETE FROM cache WHERE key = ?", doomed)
+
+    def stats(self) -> Dict[str, Any]:
+        count = self._connection().execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        return {"path": self.path, "version": self.version, "size": count,
+                "bytes": self.bytes, "maxBytes": self.max_bytes}
+
+
+_cache: Optional[DiskCache] = None
+
+
+def get_disk_cache() -> Optional[DiskCache]:
+    """按环境变量打开进程内共享的磁盘缓存，未配置时返回 None"""
+    global _cache
+    path = os.environ.get(PATH_ENV)
+    if not path:
+        return None
+    if _cache is None or _cache.path != path:
+        _cache = DiskCache(path, int(os.environ.get(MAX_BYTES_ENV, DEFAULT_MAX_BYTES)))
+    return _cache
@@ -0,0 +1,129 @@
+"""
+干支整数编码核心
+天干编码 0-9，地支编码 0-11，六十甲子编码 0-59
+所有查表均为扁平元组，字符串只在响应边界转换
+"""
+
+from typing import Tuple
+from .data_models import Constants
+
+# 天干地支
+TIAN_GAN: Tuple[str, ...] = tuple(Constants.TIAN_GAN)
+DI_ZHI: Tuple[str, ...] = tuple(Constants.DI_ZHI)
+GAN_INDEX = {name: i for i, name in enumerate(TIAN_GAN)}
+ZHI_INDEX = {name: i for i, name in enumerate(DI_ZHI)}
+
+# 六十甲子：编码 p 的天干为 p % 10，地支为 p % 12
+PILLAR_NAMES: Tuple[str, ...] = tuple(TIAN_GAN[p % 10] + DI_ZHI[p % 12] for p in range(60))
+PILLAR_INDEX = {name: p for p, name in enumerate(PILLAR_NAMES)}
+
+# 五行按相生顺序编码：木0 火1 土2 金3 水4
+ELEMENT_NAMES = ("木", "火", "土", "金", "水")
+GAN_ELEMENT: Tuple[int, ...] = tuple(g // 2 for g in range(10))
+ZHI_ELEMENT: Tuple[int, ...] = (4, 2, 0, 0, 2, 1, 1, 2, 3, 3, 2, 4)
+
+# 十神编码顺序
+SHI_SHEN_NAMES = ("比肩", "劫财", "食神", "伤官", "偏财", "正财", "七杀", "正官", "偏印", "正印")
+SHI_SHEN_SHORT = tuple(Constants.SHI_SHEN_SIMPLIFIE[name] for name in SHI_SHEN_NAMES)
+
+# 天干十神 [日干 * 10 + 目标干]
+# 五行差 k：0 同我，1 我生，2 我克，3 克我，4 生我；阴阳相异取后者
+GAN_SHI_SHEN: Tuple[int, ...] = tuple(
+    2 * ((t // 2 - d // 2) % 5) + ((d + t) & 1)
+    for d in range(10) for t in range(10)
+)
+
+# 地支藏干（本气、中气、余气）
+ZHI_HIDE_GAN: Tuple[Tuple[int, ...], ...] = (
+    (9,), (5, 9, 7), (0, 2, 4), (1,), (4, 1, 9), (2, 6, 4),
+    (3, 5), (5, 3, 1), (6, 8, 4), (7,), (4, 7, 3), (8, 0),
+)
+
+# 地支十神（取本气）[日干 * 12 + 地支]
+ZHI_SHI_SHEN: Tuple[int, ...] = tuple(
+    GAN_SHI_SHEN[d * 10 + ZHI_HIDE_GAN[z][0]]
+    for d in range(10) for z in range(12)
+)
+
+# 十二长生 [日干 * 12 + 地支]，阳干顺行、阴干逆行
+CHANG_SHENG_NAMES = ("长生", "沐浴", "冠带", "临官", "帝旺", "衰", "病", "死", "墓", "绝", "胎", "养")
+_CHANG_SHENG_OFFSET = tuple(Constants.CHANG_SHENG_OFFSET[g] for g in TIAN_GAN)
+CHANG_SHENG: Tuple[int, ...] = tuple(
+    (z + _CHANG_SHENG_OFFSET[d]) % 12 if d % 2 == 0 else (_CHANG_SHENG_OFFSET[d] - z) % 12
+    for d in range(10) for z in range(12)
+)
+
+# 纳音：每两柱共用一个纳音
+NAYIN_NAMES = (
+    "海中金", "炉中火", "大林木", "路旁土", "剑锋金", "山头火",
+    "涧下水", "城头土", "白蜡金", "杨柳木", "泉中水", "屋上土",
+    "霹雳火", "松柏木", "长流水", "沙中金", "山下火", "平地木",
+    "壁上土", "金箔金", "覆灯火", "天河水", "大驿土", "钗钏金",
+    "桑柘木", "大溪水", "沙中土", "天上火", "石榴木", "大海水",
+)
+PILLAR_NAYIN: Tuple[int, ...] = tuple(p // 2 for p in range(60))
+
+# 旬空 [柱]：所在旬的旬首地支后两位
+PILLAR_XUN_KONG: Tuple[Tuple[int, int], ...] = tuple(
+    ((p // 10 * 10 + 10) % 12, (p // 10 * 10 + 11) % 12) for p in range(60)
+)
+
+# 柱的简化十神 [日干 * 60 + 柱]，如"才官"
+PILLAR_SHI_SHEN_SHORT: Tuple[str, ...] = tuple(
+    SHI_SHEN_SHORT[GAN_SHI_SHEN[d * 10 + p % 10]] + SHI_SHEN_SHORT[ZHI_SHI_SHEN[d * 12 + p % 12]]
+    for d in range(10) for p in range(60)
+)
+
+# 天干两两关系 [干 * 10 + 干]
+GAN_HE: Tuple[bool, ...] = tuple(abs(a - b) == 5 for a in range(10) for b in range(10))      # 五合：甲己、乙庚……
+GAN_CHONG: Tuple[bool, ...] = tuple(                                                         # 相冲：甲庚、乙辛、丙壬、丁癸
+    abs(a - b) == 6 and min(a, b) < 4 for a in range(10) for b in range(10)
+)
+
+# 地支两两关系 [支 * 12 + 支]
+ZHI_LIU_HE: Tuple[bool, ...] = tuple((a + b) % 12 == 1 for a in range(12) for b in range(12))   # 子丑、寅亥……
+ZHI_CHONG: Tuple[bool, ...] = tuple((a - b) % 12 == 6 for a in range(12) for b in range(12))    # 子午、丑未……
+ZHI_HAI: Tuple[bool, ...] = tuple((a + b) % 12 == 7 for a in range(12) for b in range(12))      # 子未、丑午……
+ZHI_PO: Tuple[bool, ...] = tuple(                                                              # 子酉、寅亥、辰丑……
+    (a - b) % 12 == (3 if a % 2 == 0 else 9) for a in range(12) for b in range(12)
+)
+# 刑：子卯互刑，寅巳申、丑戌未三刑，辰午酉亥自刑
+ZHI_XING_TARGET: Tuple[int, ...] = (3, 10, 5, 0, 4, 8, 6, 1, 2, 9, 7, 11)
+ZHI_XING: Tuple[bool, ...] = tuple(
+    ZHI_XING_TARGET[a] == b or ZHI_XING_TARGET[b] == a for a in range(12) for b in range(12)
+)
+
+
+def pillar_of(gan: int, zhi: int) -> int:
+    """由天干地支编码求六十甲子编码（阴阳须一致）"""
+    return (6 * gan - 5 * zhi) % 60
+
+
+def pillar_gan(pillar: int) -> int:
+    """柱的天干编码"""
+    return pillar % 10
+
+
+def pillar_zhi(pillar: int) -> int:
+    """柱的地支编码"""
+    return pillar % 12
+
+
+def parse_pillar(name: str) -> int:
+    """干支字符串转柱编码，无效时返回 -1"""
+    return PILLAR_INDEX.get(name, -1)
+
+
+def gan_shi_shen(day_gan: int, gan: int) -> int:
+    """天干十神编码"""
+    return GAN_SHI_SHEN[day_gan * 10 + gan]
+
+
+def zhi_shi_shen(day_gan: int, zhi: int) -> int:
+    """地支十神编码（取本气）"""
+    return ZHI_SHI_SHEN[day_gan * 12 + zhi]
+
+
+def pillar_shi_shen_short(day_gan: int, pillar: int) -> str:
+    """干支柱的简化十神，如"才官" """
+    return PILLAR_SHI_SHEN_SHORT[day_gan * 60 + pillar]
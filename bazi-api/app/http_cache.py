@@ -0,0 +1,60 @@
+"""
+HTTP 缓存协商
+排盘结果只由规范化的输入与引擎版本决定，GET 接口据此生成强 ETag：
+- If-None-Match 命中时直接返回 304，不再计算
+- Cache-Control 允许反向代理 / CDN 长期缓存（带姓名的结果只允许客户端私有缓存）
+"""
+
+import hashlib
+import json
+import os
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlencode
+
+from .disk_cache import engine_version
+
+# 环境变量：缓存有效期（秒）
+MAX_AGE_ENV = "BAZI_HTTP_MAX_AGE"
+DEFAULT_MAX_AGE = 30 * 24 * 3600
+
+
+@lru_cache(maxsize=1)
+def current_version() -> str:
+    """进程启动后引擎版本不变，只计算一次"""
+    return engine_version()
+
+
+def canonical_query(params: Iterable[Tuple[str, Any]]) -> List[Tuple[str, str]]:
+    """规范查询参数：固定顺序、统一格式，空值省略"""
+    return [(name, str(value)) for name, value in params if value not in (None, "")]
+
+
+def canonical_url(path: str, query: List[Tuple[str, str]]) -> str:
+    return f"{path}?{urlencode(query)}"
+
+
+def make_etag(path: str, query: List[Tuple[str, str]]) -> str:
+    """强 ETag：规范输入与引擎版本的哈希"""
+    digest = hashlib.sha1(json.dumps([current_version(), path, query], ensure_ascii=False).encode("utf-8"))
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match 是否包含该 ETag（弱比较，支持 * 与逗号分隔的列表）"""
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or (tag[2:] if tag.startswith("W/") else tag) == etag:
+            return True
+    return False
+
+
+def cache_control(private: bool = False) -> str:
+    max_age = int(os.environ.get(MAX_AGE_ENV, DEFAULT_MAX_AGE))
+    return f"{'private' if private else 'public'}, max-age={max_age}"
+
+
+def cache_headers(etag: str, private: bool = False) -> Dict[str, str]:
+    return {"ETag": etag, "Cache-Control": cache_control(private)}
@@ -0,0 +1,184 @@
+"""
+节气时刻表
+构建时预生成 1900-2100 年（前后各多一年）全部 24 节气的交节时刻，
+以 int64 分钟偏移（排盘用）及秒偏移（起运用）存入二进制文件，运行时 mmap 加载并二分查找
+"""
+
+import bisect
+import mmap
+import os
+import struct
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+from .data_models import FestivalInfo, PillarFestival
+
+# 以小寒为每个公历年的第一个节气
+JIEQI_NAMES = (
+    "小寒", "大寒", "立春", "雨水", "惊蛰", "春分", "清明", "谷雨",
+    "立夏", "小满", "芒种", "夏至", "小暑", "大暑", "立秋", "处暑",
+    "白露", "秋分", "寒露", "霜降", "立冬", "小雪", "大雪", "冬至",
+)
+
+FIRST_YEAR = 1899
+LAST_YEAR = 2101
+
+# 分钟偏移的零点（北京时间）
+EPOCH = datetime(1970, 1, 1)
+
+# 文件头：魔数、首年、年数、保留
+HEADER = struct.Struct("<4siii")
+MAGIC = b"JQT2"
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "jieqi_1900_2100.bin")
+
+
+def to_minutes(dt: datetime) -> int:
+    """日期时间转分钟偏移（秒舍去）"""
+    delta = dt - EPOCH
+    return delta.days * 1440 + delta.seconds // 60
+
+
+def to_seconds(dt: datetime) -> int:
+    """日期时间转秒偏移（微秒舍去）"""
+    delta = dt - EPOCH
+    return delta.days * 86400 + delta.seconds
+
+
+def from_minutes(minutes: int) -> datetime:
+    """分钟偏移转日期时间"""
+    return EPOCH + timedelta(minutes=minutes)
+
+
+def from_seconds(seconds: int) -> datetime:
+    """秒偏移转日期时间"""
+    return EPOCH + timedelta(seconds=int(seconds))
+
+
+def compute_jieqi_seconds(first_year: int = FIRST_YEAR, last_year: int = LAST_YEAR) -> list:
+    """
+    计算各年节气交节时刻（秒偏移）
+    与 lunar_python 一致：儒略日转公历时秒数四舍五入
+    """
+    from lunar_python import LunarYear, Solar
+    from lunar_python.Lunar import Lunar
+
+    terms = {}
+    for lunar_year in range(first_year - 1, last_year + 2):
+        julian_days = LunarYear.fromYear(lunar_year).getJieQiJulianDays()
+        for i, jd in enumerate(julian_days):
+            solar = Solar.fromJulianDay(jd)
+            name = Lunar.JIE_QI[(i - 1) % 24]
+            terms[(solar.getYear(), name)] = to_seconds(datetime(
+                solar.getYear(), solar.getMonth(), solar.getDay(),
+                solar.getHour(), solar.getMinute(), solar.getSecond()))
+
+    result = []
+    for year in range(first_year, last_year + 1):
+        for name in JIEQI_NAMES:
+            result.append(terms[(year, name)])
+    return result
+
+
+def build_jieqi_table(path: str = DEFAULT_PATH, first_year: int = FIRST_YEAR,
+                      last_year: int = LAST_YEAR) -> str:
+    """生成节气表文件（先写临时文件再原子替换）"""
+    seconds = compute_jieqi_seconds(first_year, last_year)
+    # 排盘用分钟偏移与 lunar_python 口径一致：交节时刻取到秒后向上取整到分钟，
+    # 即出生分钟不早于该值时视为已交节
+    minutes = [-(-value // 60) for value in seconds]
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, first_year, last_year - first_year + 1, 0))
+        file.write(struct.pack(f"<{len(minutes)}q", *minutes))
+        file.write(struct.pack(f"<{len(seconds)}q", *seconds))
+    os.replace(tmp_path, path)
+    return path
+
+
+class JieqiTable:
+    """
+    节气时刻表（只读 mmap）
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH):
+        self.path = path
+        with open(path, "rb") as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.first_year, year_count, _ = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"节气表格式错误: {path}")
+        self.last_year = self.first_year + year_count - 1
+        count = year_count * 24
+        view = memoryview(self._mmap)
+        self.minutes = view[HEADER.size:HEADER.size + 8 * count].cast("q")
+        # 精确到秒的交节时刻，供起运计算
+        self.seconds = view[HEADER.size + 8 * count:HEADER.size + 16 * count].cast("q")
+
+    def __len__(self) -> int:
+        return len(self.minutes)
+
+    def name(self, index: int) -> str:
+        """节气名称"""
+        return JIEQI_NAMES[index % 24]
+
+    def instant(self, index: int) -> datetime:
+        """交节时刻（精确到秒；分钟偏移向上取整，只用于交节判断）"""
+        return from_seconds(self.seconds[index])
+
+    def locate(self, minutes: int) -> int:
+        """
+        查找已交的最近一个节气序号
+        早于表首返回 -1
+        """
+        return bisect.bisect_right(self.minutes, minutes) - 1
+
+    def locate_jie(self, minutes: int) -> int:
+        """查找已交的最近一个"节"（月令起点）序号，小寒为偶数位"""
+        index = self.locate(minutes)
+        return index - (index & 1)
+
+    def covers(self, minutes: int) -> bool:
+        """时刻前后节气均在表内"""
+        return self.minutes[0] <= minutes < self.minutes[len(self.minutes) - 1]
+
+    def pre_next(self, dt: datetime) -> Optional[Tuple[int, int]]:
+        """上一个与下一个节气序号，超出表范围返回 None"""
+        minutes = to_minutes(dt)
+        if not self.covers(minutes):
+            return None
+        index = self.locate(minutes)
+        return index, index + 1
+
+    def get_festival(self, dt: datetime) -> Optional[PillarFestival]:
+        """上一个与下一个节气信息"""
+        indices = self.pre_next(dt)
+        if indices is None:
+            return None
+        pre, nxt = indices
+        return PillarFestival(
+            pre=FestivalInfo(label=self.name(pre), time=self.instant(pre).strftime("%Y-%m-%d %H:%M:%S")),
+            next=FestivalInfo(label=self.name(nxt), time=self.instant(nxt).strftime("%Y-%m-%d %H:%M:%S"))
+        )
+
+
+_table: Optional[JieqiTable] = None
+
+
+def get_jieqi_table(path: str = DEFAULT_PATH) -> JieqiTable:
+    """获取进程内共享的节气表，文件不存在时先生成"""
+    global _table
+    if _table is None or _table.path != path:
+        if not os.path.exists(path):
+            build_jieqi_table(path)
+        try:
+            _table = JieqiTable(path)
+        except ValueError:
+            # 旧版本格式，重新生成
+            build_jieqi_table(path)
+            _table = JieqiTable(path)
+    return _table
+
+
+if __name__ == "__main__":
+    print(build_jieqi_table())
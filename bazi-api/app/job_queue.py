@@ -0,0 +1,394 @@
+"""
+后台排盘任务
+千万级条目的批量导出不适合同步请求，提交为后台任务后按任务号查询进度、下载结果：
+- 输入为服务器上的 NDJSON 文件（限定在输入目录内）或上传的 JSON 数组 / NDJSON，结果为与批量接口相同格式的 NDJSON
+- 工作线程按段计算，每段结果写盘后把输入偏移、已完成条数、结果字节数原子写入检查点，进程重启后从检查点续算
+- 任务以文件锁认领，预加载 fork 出的多个 worker 共用同一任务目录，同一任务只由一个进程计算
+- 可取消；每段计算占用批量类准入名额，不挤占交互请求
+- 全部状态保存在任务目录中，不需要外部消息队列
+"""
+
+import fcntl
+import json
+import os
+import queue
+import secrets
+import shutil
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .admission import BATCH, AdmissionController, Overloaded
+from .batch_stream import iter_json_array, parse_line
+
+# 环境变量：任务目录（未设置时不启用）、服务器输入文件所在目录、每进程工作线程数、已结束任务的保留时间（秒）
+DIR_ENV = "BAZI_JOB_DIR"
+INPUT_DIR_ENV = "BAZI_JOB_INPUT_DIR"
+WORKERS_ENV = "BAZI_JOB_WORKERS"
+TTL_ENV = "BAZI_JOB_TTL"
+DEFAULT_TTL = 7 * 86400
+
+DEFAULT_CHUNK = 1024
+MAX_CHUNK = 65536
+# 空闲时重新扫描任务目录的间隔（秒），接手其他进程退出后遗留的任务
+RESCAN_INTERVAL = 5.0
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (COMPLETED, FAILED, CANCELLED)
+
+JOB_FILE = "job.json"
+INPUT_FILE = "input.ndjson"
+RESULT_FILE = "result.ndjson"
+LOCK_FILE = "lock"
+CANCEL_FILE = "cancel"
+UPLOAD_DIR = "uploads"
+
+
+class JobNotFound(Exception):
+    """任务不存在"""
+
+
+class JobNotReady(Exception):
+    """任务尚未完成，结果不可下载"""
+
+
+class _Interrupted(Exception):
+    """任务被取消或服务正在停止"""
+
+
+def count_items(path: str) -> int:
+    """NDJSON 文件的条目数（非空行数）"""
+    with open(path, "rb") as file:
+        return sum(1 for line in file if line.strip())
+
+
+def read_chunk(source: Any, count: int) -> Tuple[List[Any], int]:
+    """从当前位置读取至多 count 条，返回（条目, 读过的字节数）"""
+    items, size = [], 0
+    while len(items) < count:
+        line = source.readline()
+        if not line:
+            break
+        size += len(line)
+        if line.strip():
+            items.append(parse_line(line))
+    return items, size
+
+
+def normalize_upload(source: str, target: str) -> None:
+    """上传内容转存为 NDJSON：JSON 数组流式解析并逐条改写为一行一条（不整体读入内存），NDJSON 原样移动"""
+    with open(source, "rb") as file:
+        head = file.read(4096).lstrip()
+    if head[:1] != b"[":
+        os.replace(source, target)
+        return
+    with open(source, encoding="utf-8") as file, open(target, "wb") as output:
+        for item in iter_json_array(file):
+            output.write(json.dumps(item, ensure_ascii=False).encode("utf-8") + b"\n")
+    os.remove(source)
+
+
+def _write_json(path: str, value: Dict[str, Any]) -> None:
+    """原子写入（先写临时文件并落盘，再替换）"""
+    temp = f"{path}.tmp"
+    with open(temp, "w", encoding="utf-8") as file:
+        json.dump(value, file, ensure_ascii=False)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp, path)
+
+
+class _Claim:
+    """任务的独占认领（flock，进程退出时自动释放）"""
+
+    def __init__(self, path: str):
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(self._fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(self._fd)
+            raise
+
+    def __enter__(self) -> "_Claim":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        os.close(self._fd)
+
+
+class JobQueue:
+    """
+    基于任务目录的后台任务队列
+    processors 为 {任务类型: process_chunk(起始序号, 条目) -> 该段 NDJSON 字节}
+    """
+
+    def __init__(self, root: str, processors: Dict[str, Callable[[int, List[Any]], bytes]], workers: int = 1,
+                 input_root: Optional[str] = None, admission: Optional[AdmissionController] = None,
+                 ttl: float = DEFAULT_TTL):
+        self.root = os.path.abspath(root)
+        self.processors = processors
+        self.workers = workers
+        self.input_root = os.path.realpath(input_root) if input_root else None
+        self.admission = admission
+        self.ttl = ttl
+        os.makedirs(os.path.join(self.root, UPLOAD_DIR), exist_ok=True)
+        self._queue: "queue.Queue[str]" = queue.Queue()
+        self._queued = set()
+        self._running: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    # ---- 任务文件 ----
+
+    def _path(self, job_id: str, name: str = JOB_FILE) -> str:
+        if not job_id or not job_id.isalnum():
+            raise JobNotFound(f"任务不存在: {job_id}")
+        return os.path.join(self.root, job_id, name)
+
+    def _read(self, job_id: str) -> Dict[str, Any]:
+        try:
+            with open(self._path(job_id), encoding="utf-8") as file:
+                return json.load(file)
+        except FileNotFoundError:
+            raise JobNotFound(f"任务不存在: {job_id}")
+
+    def _write(self, job: Dict[str, Any]) -> None:
+        job["updated"] = time.time()
+        _write_json(self._path(job["id"]), job)
+
+    def _finish(self, job: Dict[str, Any], status: str, error: Optional[str] = None) -> None:
+        job.update(status=status, finished=time.time(), error=error)
+        self._write(job)
+
+    # ---- 提交、查询、取消 ----
+
+    def upload_path(self) -> str:
+        """上传内容的临时文件路径（提交后移入任务目录）"""
+        return os.path.join(self.root, UPLOAD_DIR, secrets.token_hex(8))
+
+    def create(self, kind: str, source: str, chunk_size: int = 0, upload: bool = False) -> Dict[str, Any]:
+        """
+        提交任务：upload 为 True 时 source 为 upload_path() 写好的上传内容，
+        否则为输入目录内的 NDJSON 文件
+        """
+        if kind not in self.processors:
+            raise ValueError(f"不支持的任务类型: {kind}")
+        if not 0 <= chunk_size <= MAX_CHUNK:
+            raise ValueError(f"chunkSize 应在 0..{MAX_CHUNK} 之间（0 为默认）")
+        if not upload:
+            source = self._input_file(source)
+        job_id = secrets.token_hex(8)
+        os.makedirs(os.path.join(self.root, job_id))
+        if upload:
+            try:
+                normalize_upload(source, self._path(job_id, INPUT_FILE))
+            except Exception:
+                shutil.rmtree(os.path.join(self.root, job_id), ignore_errors=True)
+                raise
+            source = self._path(job_id, INPUT_FILE)
+        now = time.time()
+        job = {"id": job_id, "kind": kind, "status": QUEUED, "input": source, "chunkSize": chunk_size or DEFAULT_CHUNK,
+               "total": None, "done": 0, "inputOffset": 0, "resultBytes": 0, "created": now, "started": None,
+               "finished": None, "error": None, "runStarted": None, "runDone": 0}
+        self._write(job)
+        self._enqueue(job_id)
+        return self.describe(job)
+
+    def _input_file(self, path: str) -> str:
+        """服务器输入文件只能位于输入目录内"""
+        if self.input_root is None:
+            raise ValueError(f"未启用服务器文件输入（{INPUT_DIR_ENV}）")
+        real = os.path.realpath(os.path.join(self.input_root, path))
+        if os.path.commonpath([real, self.input_root]) != self.input_root or not os.path.isfile(real):
+            raise ValueError(f"输入文件不存在: {path}")
+        return real
+
+    def get(self, job_id: str) -> Dict[str, Any]:
+        return self.describe(self._read(job_id))
+
+    def list_jobs(self) -> List[Dict[str, Any]]:
+        jobs = []
+        for job_id in os.listdir(self.root):
+            try:
+                jobs.append(self._read(job_id))
+            except (JobNotFound, ValueError):
+                continue
+        return [self.describe(job) for job in sorted(jobs, key=lambda job: job["created"])]
+
+    def result_path(self, job_id: str) -> str:
+        """已完成任务的结果文件"""
+        job = self._read(job_id)
+        if job["status"] != COMPLETED:
+            raise JobNotReady(f"任务尚未完成: {job['status']}")
+        return self._path(job_id, RESULT_FILE)
+
+    def cancel(self, job_id: str) -> Dict[str, Any]:
+        """取消任务：未被认领时直接标记，计算中的任务在当前段结束后停止"""
+        job = self._read(job_id)
+        if job["status"] in FINISHED:
+            return self.describe(job)
+        open(self._path(job_id, CANCEL_FILE), "w").close()
+        try:
+            with _Claim(self._path(job_id, LOCK_FILE)):
+                job = self._read(job_id)
+                if job["status"] not in FINISHED:
+                    self._finish(job, CANCELLED)
+        except BlockingIOError:
+            pass
+        return self.get(job_id)
+
+    @staticmethod
+    def describe(job: Dict[str, Any]) -> Dict[str, Any]:
+        """对外的任务状态：进度、本次运行的速度与预计剩余时间"""
+        total, done = job["total"], job["done"]
+        rate = eta = None
+        if job["status"] == RUNNING and job["runStarted"] and job["updated"] > job["runStarted"]:
+            rate = (done - job["runDone"]) / (job["updated"] - job["runStarted"])
+            if rate > 0 and total is not None:
+                eta = (total - done) / rate
+        return {
+            "id": job["id"], "kind": job["kind"], "status": job["status"], "chunkSize": job["chunkSize"],
+            "total": total, "done": done, "progress": done / total if total else (1.0 if total == 0 else None),
+            "itemsPerSecond": rate, "etaSeconds": eta, "created": job["created"], "started": job["started"],
+            "finished": job["finished"], "error": job["error"],
+        }
+
+    # ---- 工作线程 ----
+
+    def _enqueue(self, job_id: str) -> None:
+        with self._lock:
+            if job_id in self._queued or job_id in self._running:
+                return
+            self._queued.add(job_id)
+        self._queue.put(job_id)
+
+    def rescan(self) -> None:
+        """排队 / 计算中的任务重新入队（含其他进程遗留的），清理过期的已结束任务"""
+        now = time.time()
+        for job_id in os.listdir(self.root):
+            try:
+                job = self._read(job_id)
+            except (JobNotFound, ValueError):
+                continue
+            if job["status"] in FINISHED:
+                if now - job["updated"] > self.ttl:
+                    shutil.rmtree(os.path.join(self.root, job_id), ignore_errors=True)
+            else:
+                self._enqueue(job_id)
+
+    def start(self) -> None:
+        self.rescan()
+        for number in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"bazi-job-{number}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def close(self) -> None:
+        """停止工作线程，计算中的任务保留检查点，下次启动时续算"""
+        self._stopping.set()
+        for thread in self._threads:
+            thread.join(timeout=30)
+        self._threads.clear()
+
+    def _work(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                job_id = self._queue.get(timeout=RESCAN_INTERVAL)
+            except queue.Empty:
+                self.rescan()
+                continue
+            with self._lock:
+                self._queued.discard(job_id)
+            self.run(job_id)
+
+    def run(self, job_id: str) -> None:
+        """认领并计算一个任务（已被其他线程 / 进程认领时直接返回）"""
+        try:
+            claim = _Claim(self._path(job_id, LOCK_FILE))
+        except (BlockingIOError, FileNotFoundError, JobNotFound):
+            return
+        with claim:
+            try:
+                job = self._read(job_id)
+            except (JobNotFound, ValueError):
+                return
+            if job["status"] in FINISHED:
+                return
+            with self._lock:
+                self._running[job_id] = job["done"]
+            try:
+                self._execute(job)
+            except _Interrupted:
+                if self._cancel_requested(job_id):
+                    self._finish(job, CANCELLED)
+            except Exception as e:
+                self._finish(job, FAILED, str(e))
+            finally:
+                with self._lock:
+                    self._running.pop(job_id, None)
+
+    def _cancel_requested(self, job_id: str) -> bool:
+        return os.path.exists(self._path(job_id, CANCEL_FILE))
+
+    def _check(self, job_id: str) -> None:
+        if self._stopping.is_set() or self._cancel_requested(job_id):
+            raise _Interrupted()
+
+    def _execute(self, job: Dict[str, Any]) -> None:
+        job_id = job["id"]
+        process_chunk = self.processors[job["kind"]]
+        self._check(job_id)
+        if job["total"] is None:
+            job["total"] = count_items(job["input"])
+        now = time.time()
+        job.update(status=RUNNING, started=job["started"] or now, runStarted=now, runDone=job["done"])
+        self._write(job)
+        with open(job["input"], "rb") as source, open(self._path(job_id, RESULT_FILE), "ab") as result:
+            # 丢弃上次检查点之后写了一半的段
+            result.truncate(job["resultBytes"])
+            source.seek(job["inputOffset"])
+            while True:
+                self._check(job_id)
+                items, size = read_chunk(source, job["chunkSize"])
+                if not items:
+                    break
+                result.write(self._compute(job_id, process_chunk, job["done"], items))
+                result.flush()
+                os.fsync(result.fileno())
+                job.update(done=job["done"] + len(items), inputOffset=job["inputOffset"] + size,
+                           resultBytes=result.tell())
+                self._write(job)
+                with self._lock:
+                    self._running[job_id] = job["done"]
+        self._finish(job, COMPLETED)
+
+    def _compute(self, job_id: str, process_chunk: Callable[[int, List[Any]], bytes], start: int,
+                 items: List[Any]) -> bytes:
+        """在批量类准入名额内计算一段，繁忙时按建议时间等待后重试"""
+        while self.admission is not None:
+            try:
+                with self.admission.admit(BATCH):
+                    return process_chunk(start, items)
+            except Overloaded as e:
+                self._stopping.wait(e.retry_after)
+                self._check(job_id)
+        return process_chunk(start, items)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"workers": self.workers, "queued": len(self._queued), "running": dict(self._running)}
+
+
+def get_job_queue(processors: Dict[str, Callable[[int, List[Any]], bytes]],
+                  admission: Optional[AdmissionController] = None) -> Optional[JobQueue]:
+    """按环境变量创建任务队列，未配置任务目录时返回 None"""
+    root = os.environ.get(DIR_ENV)
+    if not root:
+        return None
+    return JobQueue(root, processors, int(os.environ.get(WORKERS_ENV, 1)), os.environ.get(INPUT_DIR_ENV) or None,
+                    admission, float(os.environ.get(TTL_ENV, DEFAULT_TTL)))
@@ -0,0 +1,188 @@
+"""
+大运流年生成器
+由节气表（精确到秒）直接推算起运时间、大运与流年干支，
+口径与 lunar_python 的 Yun / DaYun / LiuNian 完全一致，但不创建任何历法对象
+"""
+
+import bisect
+import calendar
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from . import ganzhi
+from .jieqi_table import JieqiTable, get_jieqi_table, to_seconds
+from .pillar_engine import jie_pillars, pillar_array
+from .solar_longitude import get_extended_terms
+
+# 童限（第 0 步大运）没有干支
+CHILD_PILLAR = -1
+
+
+def _time_zhi(seconds: int) -> int:
+    """时辰地支序号（23 点按亥时后一个时辰计为 11，与 lunar_python 起运算法一致）"""
+    hour = seconds % 86400 // 3600
+    return 11 if hour == 23 else (hour + 1) // 2
+
+
+def start_offset(start: int, end: int, sect: int = 1) -> Tuple[int, int, int, int]:
+    """
+    起运时间（年, 月, 日, 时）
+    start/end: 起止时刻秒偏移（顺排为出生到下一节，逆排为上一节到出生）
+    sect: 2=按分钟计（4320 分钟折 1 年），其余=按时辰计（3 天折 1 年）
+    """
+    if sect == 2:
+        minutes = end // 60 - start // 60
+        year, minutes = divmod(minutes, 4320)
+        month, minutes = divmod(minutes, 360)
+        day, minutes = divmod(minutes, 12)
+        return year, month, day, minutes * 2
+
+    hour_diff = _time_zhi(end) - _time_zhi(start)
+    day_diff = end // 86400 - start // 86400
+    if hour_diff < 0:
+        hour_diff += 12
+        day_diff -= 1
+    month_diff = hour_diff * 10 // 30
+    month = day_diff * 4 + month_diff
+    day = hour_diff * 10 - month_diff * 30
+    year, month = divmod(month, 12)
+    return year, month, day, 0
+
+
+def start_solar_year(dt: datetime, years: int, months: int, days: int, hours: int) -> int:
+    """起运时刻所在公历年（逐级推年、月、日、时，月末日按 lunar_python 规则截断）"""
+    year, month, day = dt.year + years, dt.month, dt.day
+    if month == 2 and day > 28 and not calendar.isleap(year):
+        day = 28
+    year, month = year + (month - 1 + months) // 12, (month - 1 + months) % 12 + 1
+    day = min(day, calendar.monthrange(year, month)[1])
+    return (date(year, month, day) + timedelta(days=days + (dt.hour + hours) // 24)).year
+
+
+def liu_yue_pillars(year_pillars) -> np.ndarray:
+    """
+    流月干支编码（正月建寅，月干按五虎遁）
+    返回形状为 year_pillars 的形状加一维 12
+    """
+    years = np.asarray(year_pillars)[..., None]
+    index = np.arange(12)
+    return pillar_array((years % 5 * 2 + 2 + index) % 10, (index + 2) % 12)
+
+
+class LuckCycle:
+    """
+    大运流年
+    """
+
+    def __init__(self, dt: datetime, gender: int, sect: int = 1, jieqi_table: Optional[JieqiTable] = None):
+        """
+        dt: 出生时刻（北京时间，秒参与交节判断）
+        gender: 1=男, 其他=女
+        sect: 起运算法流派，同 lunar_python getYun
+        jieqi_table: 默认为预生成节气表，也可为 solar_longitude.TermTable（只用 seconds 与 first_year）
+        超出节气表范围时抛出 ValueError
+        """
+        jieqi_table = jieqi_table or get_jieqi_table()
+        seconds = jieqi_table.seconds
+
+        birth = to_seconds(dt)
+        term_index = bisect.bisect_right(seconds, birth) - 1
+        jie_index = term_index - (term_index & 1)
+        if jie_index < 0 or jie_index + 2 >= len(seconds):
+            raise ValueError("出生时刻超出节气表范围")
+
+        self.birth_year = dt.year
+        self.year_pillar, self.month_pillar = jie_pillars(jie_index, jieqi_table.first_year)
+        # 流年以出生公历年立春后的年柱起算（与 lunar_python 一致，不随交节前后变化）
+        self.solar_year_pillar = (dt.year - 4) % 60
+
+        # 阳年男、阴年女顺排
+        self.forward = (self.year_pillar % 2 == 0) == (gender == 1)
+        if self.forward:
+            start, end = birth, seconds[jie_index + 2]
+        else:
+            start, end = seconds[jie_index], birth
+        self.start = start_offset(start, end, sect)
+        self.start_year = start_solar_year(dt, *self.start)
+
+    @classmethod
+    def from_birth(cls, dt: datetime, gender: int, sect: int = 1) -> "LuckCycle":
+        """
+        节气表范围外按推算节气表（solar_longitude）起运
+        仍超出推算范围时抛出 ValueError
+        """
+        try:
+            return cls(dt, gender, sect)
+        except ValueError:
+            return cls(dt, gender, sect, get_extended_terms())
+
+    @property
+    def start_age(self) -> int:
+        """起运虚岁（第 1 步大运起始年龄）"""
+        return self.start_year - self.birth_year + 1
+
+    def da_yun_pillar(self, index: int) -> int:
+        """第 index 步大运干支编码，童限为 CHILD_PILLAR"""
+        if index < 1:
+            return CHILD_PILLAR
+        return (self.month_pillar + (index if self.forward else -index)) % 60
+
+    def da_yun_span(self, index: int) -> Tuple[int, int, int, int]:
+        """第 index 步大运（起始年, 起始年龄, 结束年, 结束年龄）"""
+        if index < 1:
+            return self.birth_year, 1, self.start_year - 1, self.start_year - self.birth_year
+        start_year = self.start_year + (index - 1) * 10
+        start_age = start_year - self.birth_year + 1
+        return start_year, start_age, start_year + 9, start_age + 9
+
+    def da_yun(self, n: int = 10) -> List[Tuple[int, int, int]]:
+        """前 n 步大运（起始年, 起始年龄, 干支编码）"""
+        result = []
+        for index in range(n):
+            start_year, start_age, _, _ = self.da_yun_span(index)
+            result.append((start_year, start_age, self.da_yun_pillar(index)))
+        return result
+
+    def liu_nian(self, index: int, n: int = 10) -> List[Tuple[int, int, int]]:
+        """
+        第 index 步大运内的流年（年份, 年龄, 干支编码）
+        童限的流年数为出生至起运的年数
+        """
+        start_year, start_age, end_year, _ = self.da_yun_span(index)
+        offset = self.solar_year_pillar
+        if index < 1:
+            n = end_year - start_year + 1
+        else:
+            offset += start_age - 1
+        return [(start_year + i, start_age + i, (offset + i) % 60) for i in range(n)]
+
+    def timeline(self, n: int = 10) -> Dict[str, np.ndarray]:
+        """
+        第 1..n 步大运及其流年、流月干支编码数组
+        形状分别为 (n,)、(n, 10)、(n, 10, 12)，可直接作为 pillar_relation.lookup 的下标
+        """
+        steps = np.arange(1, n + 1)
+        da_yun = (self.month_pillar + (steps if self.forward else -steps)) % 60
+        start_ages = self.start_age + (steps - 1) * 10
+        liu_nian = (self.solar_year_pillar + start_ages[:, None] - 1 + np.arange(10)) % 60
+        return {"da_yun": da_yun, "liu_nian": liu_nian, "liu_yue": liu_yue_pillars(liu_nian)}
+
+
+def da_yun_of(dt: datetime, gender: int, sect: int = 1, n: int = 10) -> Tuple[bool, List[Tuple[int, int, int]]]:
+    """
+    （是否顺排, 前 n 步大运（起始年, 起始年龄, 干支编码）），第 0 步为童限
+    排运方向、起运年龄与大运干支都取自同一个 LuckCycle，超出推算节气表范围时回退 lunar_python
+    """
+    try:
+        luck = LuckCycle.from_birth(dt, gender, sect)
+    except ValueError:
+        from lunar_python import Solar
+
+        yun = Solar.fromDate(dt).getLunar().getEightChar().getYun(gender, sect)
+        return yun.isForward(), [
+            (item.getStartYear(), item.getStartAge(), ganzhi.PILLAR_INDEX.get(item.getGanZhi(), CHILD_PILLAR))
+            for item in yun.getDaYun(n)
+        ]
+    return luck.forward, luck.da_yun(n)
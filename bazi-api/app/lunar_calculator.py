@@ -5,6 +5,7 @@
 from datetime import datetime, timedelta
 from typing import Tuple, Dict, List
 from .data_models import Constants
+from . import ganzhi
 
 class LunarCalculator:
     """
@@ -25,58 +26,41 @@ class LunarCalculator:
             "狮子座", "处女座", "天秤座", "天蝎座", "射手座", "摩羯座"
         ]
         
-        # 纳音
-        self.nayin_map = {
-            ("甲", "子"): "海中金", ("乙", "丑"): "海中金", ("丙", "寅"): "炉中火", ("丁", "卯"): "炉中火",
-            ("戊", "辰"): "大林木", ("己", "巳"): "大林木", ("庚", "午"): "路旁土", ("辛", "未"): "路旁土",
-            ("壬", "申"): "剑锋金", ("癸", "酉"): "剑锋金", ("甲", "戌"): "山头火", ("乙", "亥"): "山头火",
-            ("丙", "子"): "涧下水", ("丁", "丑"): "涧下水", ("戊", "寅"): "城头土", ("己", "卯"): "城头土",
-            ("庚", "辰"): "白蜡金", ("辛", "巳"): "白蜡金", ("壬", "午"): "杨柳木", ("癸", "未"): "杨柳木",
-            ("甲", "申"): "井泉水", ("乙", "酉"): "井泉水", ("丙", "戌"): "屋上土", ("丁", "亥"): "屋上土",
-            ("戊", "子"): "霹雳火", ("己", "丑"): "霹雳火", ("庚", "寅"): "松柏木", ("辛", "卯"): "松柏木",
-            ("壬", "辰"): "长流水", ("癸", "巳"): "长流水", ("甲", "午"): "砂中金", ("乙", "未"): "砂中金",
-            ("丙", "申"): "山下火", ("丁", "酉"): "山下火", ("戊", "戌"): "平地木", ("己", "亥"): "平地木",
-            ("庚", "子"): "壁上土", ("辛", "丑"): "壁上土", ("壬", "寅"): "金泊金", ("癸", "卯"): "金泊金",
-            ("甲", "辰"): "覆灯火", ("乙", "巳"): "覆灯火", ("丙", "午"): "天河水", ("丁", "未"): "天河水",
-            ("戊", "申"): "大驿土", ("己", "酉"): "大驿土", ("庚", "戌"): "钗钏金", ("辛", "亥"): "钗钏金",
-            ("壬", "子"): "桑柘木", ("癸", "丑"): "桑柘木"
-        }
-        
-        # 空亡 - 甲子旬的计算
-        self.empty_map = {
-            0: ("戌", "亥"), 10: ("申", "酉"), 20: ("午", "未"),
-            30: ("辰", "巳"), 40: ("寅", "卯"), 50: ("子", "丑")
-        }
-        
     def get_gan_zhi_from_date(self, dt: datetime) -> Tuple[str, str, str, str, str, str, str, str]:
         """
         从日期计算八字（年月日时的天干地支）
         简化实现，实际应使用专业的万年历算法
         """
+        year_p, month_p, day_p, time_p = self.get_pillar_indices(dt)
+        
+        return (
+            ganzhi.TIAN_GAN[year_p % 10], ganzhi.DI_ZHI[year_p % 12],
+            ganzhi.TIAN_GAN[month_p % 10], ganzhi.DI_ZHI[month_p % 12],
+            ganzhi.TIAN_GAN[day_p % 10], ganzhi.DI_ZHI[day_p % 12],
+            ganzhi.TIAN_GAN[time_p % 10], ganzhi.DI_ZHI[time_p % 12],
+        )
+    
+    def get_pillar_indices(self, dt: datetime) -> Tuple[int, int, int, int]:
+        """
+        从日期计算四柱的六十甲子编码（年、月、日、时）
+        简化实现，实际应使用专业的万年历算法
+        """
         # 简化的八字计算 - 实际应该使用精确的万年历
         year_offset = dt.year - 1984  # 1984年是甲子年
-        year_gan = self.tian_gan[year_offset % 10]
-        year_zhi = self.di_zhi[year_offset % 12]
+        year_p = year_offset % 60
         
         # 月干支计算（简化）
-        month_offset = (dt.year - 1984) * 12 + dt.month - 1
-        month_gan = self.tian_gan[month_offset % 10]
-        month_zhi = self.di_zhi[month_offset % 12]
+        month_p = ((dt.year - 1984) * 12 + dt.month - 1) % 60
         
         # 日干支计算（简化 - 应使用儒略日）
-        day_offset = (dt - datetime(1984, 1, 1)).days
-        day_gan = self.tian_gan[day_offset % 10]
-        day_zhi = self.di_zhi[day_offset % 12]
+        day_p = (dt - datetime(1984, 1, 1)).days % 60
         
-        # 时干支计算
+        # 时干支计算：时干根据日干推算
         hour_index = (dt.hour + 1) // 2 % 12
-        time_zhi = self.di_zhi[hour_index]
-        # 时干根据日干推算
-        day_gan_index = self.tian_gan.index(day_gan)
-        time_gan_index = (day_gan_index * 2 + hour_index) % 10
-        time_gan = self.tian_gan[time_gan_index]
+        time_gan = (day_p % 10 * 2 + hour_index) % 10
+        time_p = ganzhi.pillar_of(time_gan, hour_index)
         
-        return year_gan, year_zhi, month_gan, month_zhi, day_gan, day_zhi, time_gan, time_zhi
+        return year_p, month_p, day_p, time_p
     
     def get_zodiac(self, year: int) -> str:
         """获取生肖"""
@@ -97,16 +81,15 @@ class LunarCalculator:
     
     def get_nayin(self, gan: str, zhi: str) -> str:
         """获取纳音"""
-        return self.nayin_map.get((gan, zhi), "未知")
+        pillar = ganzhi.PILLAR_INDEX.get(gan + zhi)
+        if pillar is None:
+            return "未知"
+        return ganzhi.NAYIN_NAMES[ganzhi.PILLAR_NAYIN[pillar]]
     
     def get_empty(self, day_gan: str, day_zhi: str) -> Tuple[str, str]:
         """计算空亡"""
-        # 简化的空亡计算
-        day_gan_index = self.tian_gan.index(day_gan)
-        day_zhi_index = self.di_zhi.index(day_zhi)
-        
-        # 找到对应的旬
-        xun_index = (day_gan_index * 6 + day_zhi_index) % 60
-        xun_start = (xun_index // 10) * 10
-        
-        return self.empty_map.get(xun_start, ("", ""))
\ No newline at end of file
+        pillar = ganzhi.PILLAR_INDEX.get(day_gan + day_zhi)
+        if pillar is None:
+            return ("", "")
+        first, second = ganzhi.PILLAR_XUN_KONG[pillar]
+        return ganzhi.DI_ZHI[first], ganzhi.DI_ZHI[second]
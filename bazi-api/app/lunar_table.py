@@ -0,0 +1,232 @@
+"""
+农历月表
+构建时预生成 1899-2100 农历年全部月份的初一（公历日序号）、月份与闰月，
+运行时 mmap 加载：公历转农历按平均朔望月估算下标后微调，农历转公历按年首下标与闰月直接定位，
+均为常数次查表，不创建 lunar_python 对象
+"""
+
+import mmap
+import os
+import struct
+from datetime import date, datetime
+from typing import NamedTuple, Optional, Tuple
+
+import numpy as np
+
+FIRST_YEAR = 1899
+LAST_YEAR = 2100
+
+# 日序号零点：1970-01-01 为 0
+EPOCH = date(1970, 1, 1)
+_EPOCH_JULIAN_DAY = 2440588
+
+# 平均朔望月（日）
+SYNODIC_MONTH = 29.530588853
+
+# 文件头：魔数、首年、年数、月数
+HEADER = struct.Struct("<4siii")
+MAGIC = b"LNT1"
+
+MONTH_NAMES = ("", "正", "二", "三", "四", "五", "六", "七", "八", "九", "十", "冬", "腊")
+DAY_NAMES = tuple(
+    ["", "初一", "初二", "初三", "初四", "初五", "初六", "初七", "初八", "初九", "初十"]
+    + ["十" + c for c in "一二三四五六七八九"] + ["二十"]
+    + ["廿" + c for c in "一二三四五六七八九"] + ["三十"]
+)
+ZODIAC_NAMES = ("鼠", "牛", "虎", "兔", "龙", "蛇", "马", "羊", "猴", "鸡", "狗", "猪")
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "lunar_1899_2100.bin")
+
+
+class LunarDate(NamedTuple):
+    """农历日期，leap 为是否闰月"""
+    year: int
+    month: int
+    day: int
+    leap: bool = False
+
+    @property
+    def month_name(self) -> str:
+        return ("闰" if self.leap else "") + MONTH_NAMES[self.month]
+
+    @property
+    def day_name(self) -> str:
+        return DAY_NAMES[self.day]
+
+    @property
+    def zodiac(self) -> str:
+        """生肖（以正月初一为界）"""
+        return ZODIAC_NAMES[(self.year - 4) % 12]
+
+    def __str__(self) -> str:
+        return f"{self.year}年{self.month_name}月{self.day_name}日"
+
+
+def to_day_number(d: date) -> int:
+    """公历日期转日序号"""
+    return d.toordinal() - EPOCH.toordinal()
+
+
+def from_day_number(day_number: int) -> date:
+    """日序号转公历日期"""
+    return date.fromordinal(EPOCH.toordinal() + day_number)
+
+
+def compute_lunar_months(first_year: int = FIRST_YEAR, last_year: int = LAST_YEAR) -> Tuple[list, list, list]:
+    """
+    计算各农历月初一的日序号、所属农历年、月份（闰月为负），按时间顺序
+    末尾多一个次年正月初一作为哨兵
+    """
+    from lunar_python import LunarYear
+
+    months = {}
+    for lunar_year in range(first_year, last_year + 2):
+        for month in LunarYear.fromYear(lunar_year).getMonths():
+            if first_year <= month.getYear() <= last_year + 1:
+                months[(month.getYear(), month.getMonth())] = month.getFirstJulianDay() - _EPOCH_JULIAN_DAY
+    ordered = sorted((start, year, month) for (year, month), start in months.items())
+    first = next(i for i, (_, year, month) in enumerate(ordered) if (year, month) == (first_year, 1))
+    end = next(i for i, (_, year, month) in enumerate(ordered) if (year, month) == (last_year + 1, 1))
+    ordered = ordered[first:end + 1]
+    return [s for s, _, _ in ordered], [y for _, y, _ in ordered[:-1]], [m for _, _, m in ordered[:-1]]
+
+
+def build_lunar_table(path: str = DEFAULT_PATH, first_year: int = FIRST_YEAR,
+                      last_year: int = LAST_YEAR) -> str:
+    """生成农历月表文件（先写临时文件再原子替换）"""
+    starts, years, months = compute_lunar_months(first_year, last_year)
+    year_count = last_year - first_year + 1
+    year_first = [0] * year_count
+    leap_months = [0] * year_count
+    for i in reversed(range(len(months))):
+        if months[i] == 1:
+            year_first[years[i] - first_year] = i
+        elif months[i] < 0:
+            leap_months[years[i] - first_year] = -months[i]
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, first_year, year_count, len(months)))
+        file.write(struct.pack(f"<{len(starts)}i", *starts))
+        file.write(struct.pack(f"<{len(months)}h", *years))
+        file.write(struct.pack(f"<{len(months)}b", *months))
+        file.write(struct.pack(f"<{year_count}h", *year_first))
+        file.write(struct.pack(f"<{year_count}b", *leap_months))
+    os.replace(tmp_path, path)
+    return path
+
+
+class LunarTable:
+    """
+    农历月表（只读 mmap）
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH):
+        self.path = path
+        with open(path, "rb") as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.first_year, year_count, count = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"农历月表格式错误: {path}")
+        self.last_year = self.first_year + year_count - 1
+        view = memoryview(self._mmap)
+        offset = HEADER.size
+        # 各月初一日序号（含末尾哨兵）
+        self.starts = view[offset:offset + 4 * (count + 1)].cast("i")
+        offset += 4 * (count + 1)
+        self.years = view[offset:offset + 2 * count].cast("h")
+        offset += 2 * count
+        # 月份，闰月为负
+        self.months = view[offset:offset + count].cast("b")
+        offset += count
+        # 各年正月下标、闰月（0 为无闰月）
+        self.year_first = view[offset:offset + 2 * year_count].cast("h")
+        offset += 2 * year_count
+        self.leap_months = view[offset:offset + year_count].cast("b")
+        self._starts_array = np.frombuffer(self._mmap, dtype="<i4", count=count + 1, offset=HEADER.size)
+
+    def __len__(self) -> int:
+        return len(self.months)
+
+    def covers(self, d: date) -> bool:
+        """公历日期在表内"""
+        return self.starts[0] <= to_day_number(d) < self.starts[len(self.months)]
+
+    def leap_month(self, year: int) -> int:
+        """该农历年的闰月，无闰月返回 0"""
+        return self.leap_months[year - self.first_year]
+
+    def month_index(self, day_number: int) -> int:
+        """日序号所在农历月下标：按平均朔望月估算后前后微调"""
+        index = int((day_number - self.starts[0]) / SYNODIC_MONTH)
+        index = min(max(index, 0), len(self.months) - 1)
+        while self.starts[index] > day_number:
+            index -= 1
+        while self.starts[index + 1] <= day_number:
+            index += 1
+        return index
+
+    def to_lunar(self, d: date) -> LunarDate:
+        """公历转农历，超出范围抛出 ValueError"""
+        if isinstance(d, datetime):
+            d = d.date()
+        if not self.covers(d):
+            raise ValueError(f"日期超出农历表范围: {d}")
+        day_number = to_day_number(d)
+        index = self.month_index(day_number)
+        month = self.months[index]
+        return LunarDate(self.years[index], abs(month), day_number - self.starts[index] + 1, month < 0)
+
+    def month_days(self, year: int, month: int, leap: bool = False) -> int:
+        """农历月天数"""
+        index = self._index_of(year, month, leap)
+        return self.starts[index + 1] - self.starts[index]
+
+    def _index_of(self, year: int, month: int, leap: bool) -> int:
+        if not self.first_year <= year <= self.last_year or not 1 <= month <= 12:
+            raise ValueError(f"农历日期超出范围: {year}年{month}月")
+        leap_month = self.leap_month(year)
+        if leap and leap_month != month:
+            raise ValueError(f"{year}年没有闰{month}月")
+        index = self.year_first[year - self.first_year] + month - 1
+        if leap_month and (month > leap_month or leap):
+            index += 1
+        return index
+
+    def to_solar(self, year: int, month: int, day: int, leap: bool = False) -> date:
+        """农历转公历，日期不存在时抛出 ValueError"""
+        index = self._index_of(year, month, leap)
+        if not 1 <= day <= self.starts[index + 1] - self.starts[index]:
+            raise ValueError(f"农历{year}年{'闰' if leap else ''}{month}月没有{day}日")
+        return from_day_number(self.starts[index] + day - 1)
+
+    def to_lunar_array(self, day_numbers: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        批量公历转农历：输入日序号数组，返回（年, 月, 日, 是否闰月）数组
+        超出范围的元素抛出 ValueError
+        """
+        day_numbers = np.asarray(day_numbers, dtype=np.int64)
+        index = np.searchsorted(self._starts_array, day_numbers, side="right") - 1
+        if ((index < 0) | (index >= len(self.months))).any():
+            raise ValueError("日期超出农历表范围")
+        months = np.frombuffer(self.months, dtype=np.int8)[index]
+        years = np.frombuffer(self.years, dtype=np.int16)[index]
+        days = day_numbers - self._starts_array[index] + 1
+        return years.astype(np.int64), np.abs(months).astype(np.int64), days, months < 0
+
+
+_table: Optional[LunarTable] = None
+
+
+def get_lunar_table(path: str = DEFAULT_PATH) -> LunarTable:
+    """获取进程内共享的农历月表，文件不存在时先生成"""
+    global _table
+    if _table is None or _table.path != path:
+        if not os.path.exists(path):
+            build_lunar_table(path)
+        _table = LunarTable(path)
+    return _table
+
+
+if __name__ == "__main__":
+    print(build_lunar_table())
@@ -1,8 +1,26 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import FileResponse, JSONResponse, RedirectResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel, conint
-from typing import Optional, Dict, Any
+import os
+from typing import Optional, Dict, Any, Callable, List, Tuple
 from datetime import datetime
 from .bazi_calculator_new import BaziCalculator
+from .lunar_table import get_lunar_table
+from .disk_cache import get_disk_cache
+from .shared_cache import get_shared_cache
+from .single_flight import SingleFlight
+from .micro_batch import get_micro_batcher
+from .chart_session import get_chart_sessions
+from .city_index import get_city_index
+from .solar_time import true_solar_time
+from .process_pool import PoolBusy, PoolTimeout, get_process_pool
+from .serve import process_memory
+from .batch_stream import NDJSON_MEDIA_TYPE, BadItem, item_line, parse_batch_body, stream_batch
+from .job_queue import JobNotFound, JobNotReady, get_job_queue
+from .admission import BATCH, INTERACTIVE, LEGACY, PREDICTION, Overloaded, get_admission_controller
+from .http_cache import cache_control, cache_headers, canonical_query, canonical_url, etag_matches, make_etag
 
 app = FastAPI(title="精准八字 API", version="2.0.0")
 
@@ -21,40 +39,385 @@ class LegacyBaziRequest(BaseModel):
     day: int
     hour: int
     minute: int
+    trueSolarTime: bool = False  # 按出生地真太阳时排盘
 
 class BaziInfoRequest(BaseModel):
     datetime: str
     gender: int = 1
     sect: int = 1
     realname: Optional[str] = ""
+    calendar: str = "solar"  # solar: 公历, lunar: 农历（datetime 按农历年月日填写）
+    isLeap: bool = False     # 农历闰月
+    trueSolarTime: bool = False   # 按真太阳时排盘（需 longitude 或 city）
+    longitude: Optional[float] = None
+    city: Optional[str] = None
+    handle: Optional[str] = None  # /8char/get-full 返回的排盘句柄
 
 class BaziPredictionRequest(BaseModel):
     datetime: str
     gender: int = 1
     sect: int = 1
+    calendar: str = "solar"
+    isLeap: bool = False
+    trueSolarTime: bool = False
+    longitude: Optional[float] = None
+    city: Optional[str] = None
+    handle: Optional[str] = None
 
-# 初始化计算器
-bazi_calc = BaziCalculator()
+class JobRequest(BaseModel):
+    input: str  # 服务器上的 NDJSON 文件（相对 BAZI_JOB_INPUT_DIR）
+    kind: str = "info"  # info: 基本信息, prediction: 大运流年预测
+    chunkSize: int = 0  # 每段条数，0 为默认
+
+class BaziFullRequest(BaseModel):
+    datetime: str
+    gender: int = 1
+    sect: int = 1
+    realname: Optional[str] = ""
+    calendar: str = "solar"
+    isLeap: bool = False
+    trueSolarTime: bool = False
+    longitude: Optional[float] = None
+    city: Optional[str] = None
+
+def parse_birth_datetime(value: str, calendar: str = "solar", is_leap: bool = False) -> datetime:
+    """
+    解析出生时间，农历输入经农历月表转为公历
+    农历日期如 2023-02-30 不是合法公历日期，按字段解析后再校验
+    """
+    if calendar != "lunar":
+        return datetime.strptime(value, "%Y-%m-%d %H:%M:%S")
+    date_part, time_part = value.split(" ")
+    year, month, day = (int(x) for x in date_part.split("-"))
+    clock = datetime.strptime(time_part, "%H:%M:%S")
+    solar = get_lunar_table().to_solar(year, month, day, is_leap)
+    return datetime.combine(solar, clock.time())
+
+def birth_datetime(value: str, calendar: str = "solar", is_leap: bool = False, true_solar: bool = False,
+                   longitude: Optional[float] = None, city: Optional[str] = None) -> datetime:
+    """
+    请求中的出生时间（去掉微秒）
+    开启真太阳时时按经度（未给出时取出生地城市的经度）校正，校正后的时刻用于排盘；城市找不到时抛出 ValueError
+    """
+    dt = parse_birth_datetime(value, calendar, is_leap)
+    if true_solar:
+        if longitude is None and city:
+            found = get_city_index().lookup(city)
+            if found is None:
+                raise ValueError(f"找不到出生地城市: {city}")
+            longitude = found.lng
+        if longitude is None:
+            raise ValueError("真太阳时需要 longitude 或 city")
+        dt = true_solar_time(dt, longitude)
+    return dt.replace(microsecond=0)
+
+def request_datetime(req: Any) -> datetime:
+    """请求模型中的出生时间"""
+    return birth_datetime(req.datetime, req.calendar, req.isLeap, req.trueSolarTime, req.longitude, req.city)
+
+# 初始化计算器（设置 BAZI_DISK_CACHE、BAZI_SHARED_CACHE 时启用磁盘、共享内存缓存）
+bazi_calc = BaziCalculator(disk_cache=get_disk_cache(), shared_cache=get_shared_cache())
+
+# 城市坐标索引在启动时构建，请求路径上不再读数据文件
+get_city_index()
+
+# 并发的相同请求（前端连发、弱网重试）只计算一次
+single_flight = SingleFlight()
+# 可选的 get-info 微批调度（由环境变量 BAZI_MICRO_BATCH_WINDOW_MS 启用）
+info_batcher = get_micro_batcher(bazi_calc.calculate_bazi_info_batch)
+# /8char/get-full 的排盘会话（短期，进程内）
+chart_sessions = get_chart_sessions()
+# 可选的排盘进程池（由环境变量 BAZI_PROCESS_WORKERS 启用）
+process_pool = get_process_pool()
+if process_pool is not None:
+    app.router.add_event_handler("shutdown", process_pool.close)
+# 准入控制：交互、预测、批量、旧版接口分别限制并发与排队（BAZI_ADMISSION 调整限额）
+admission = get_admission_controller()
+
+def compute_bazi_info(dt: datetime, gender: int, sect: int, realname: str) -> Any:
+    """
+    八字基本信息（合并相同请求）
+    启用进程池时返回工作进程编码好的 JSON 字节，否则启用微批时走微批
+    """
+    def compute():
+        if process_pool:
+            return process_pool.run("info", dt, gender, sect, realname)
+        if info_batcher:
+            return info_batcher((dt, gender, sect, realname))
+        return bazi_calc.calculate_bazi_info(dt, gender, sect, realname)
+    return single_flight.do(("info", dt, gender, sect, realname), compute)
+
+def compute_bazi_prediction(dt: datetime, gender: int, sect: int) -> Any:
+    """大运流年预测（合并相同请求，启用进程池时返回 JSON 字节）"""
+    return single_flight.do(
+        ("prediction", dt, gender, sect),
+        lambda: process_pool.run("prediction", dt, gender, sect) if process_pool
+        else bazi_calc.calculate_bazi_prediction(dt, gender, sect)
+    )
+
+def data_response(result: Any, headers: Optional[Dict[str, str]] = None) -> Any:
+    """接口响应：进程池返回的 JSON 字节直接拼进响应体，不再解析"""
+    if isinstance(result, bytes):
+        return Response(b'{"data":' + result + b'}', media_type="application/json", headers=headers)
+    if headers is None:
+        return {"data": result}
+    return JSONResponse({"data": result}, headers=headers)
+
+def http_error(e: Exception) -> HTTPException:
+    """计算异常转 HTTP 错误：请求参数不合法（ValueError）400，准入拒绝、进程池排队已满 503（带 Retry-After）、超时 504，任务不存在 404、未完成 409，其余 500"""
+    if isinstance(e, Overloaded):
+        return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    if isinstance(e, PoolBusy):
+        return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    if isinstance(e, PoolTimeout):
+        return HTTPException(status_code=504, detail=str(e))
+    if isinstance(e, JobNotFound):
+        return HTTPException(status_code=404, detail=str(e))
+    if isinstance(e, JobNotReady):
+        return HTTPException(status_code=409, detail=str(e))
+    if isinstance(e, ValueError):
+        return HTTPException(status_code=400, detail=str(e))
+    return HTTPException(status_code=500, detail=str(e))
+
+def cached_get(request: Request, query: List[Tuple[str, str]], compute: Callable[[], Any], priority: str,
+               private: bool = False) -> Response:
+    """
+    可缓存的 GET 响应
+    查询参数不是规范形式时 301 跳转到规范 URL，使代理按同一个键缓存；
+    If-None-Match 命中 ETag 时返回 304，不再计算
+    """
+    path = request.url.path
+    if list(request.query_params.multi_items()) != query:
+        return RedirectResponse(canonical_url(path, query), status_code=301,
+                                headers={"Cache-Control": cache_control(private)})
+    etag = make_etag(path, query)
+    headers = cache_headers(etag, private)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    with admission.admit(priority):
+        result = compute()
+    return data_response(result, headers)
 
 @app.post("/8char/get-info")
 def get_bazi_info(req: BaziInfoRequest):
     """获取八字基本信息"""
     try:
-        dt = datetime.strptime(req.datetime, "%Y-%m-%d %H:%M:%S")
-        result = bazi_calc.calculate_bazi_info(dt, req.gender, req.sect, req.realname or "")
-        return {"data": result}
+        dt = request_datetime(req)
+        with admission.admit(INTERACTIVE):
+            session = chart_sessions.get(req.handle, dt, req.gender, req.sect)
+            if session is not None:
+                return {"data": bazi_calc.info_from_chart(session.chart, req.realname or "")}
+            return data_response(compute_bazi_info(dt, req.gender, req.sect, req.realname or ""))
+    except Exception as e:
+        raise http_error(e)
+
+@app.get("/8char/get-info")
+def get_bazi_info_cached(request: Request, birth: str = Query(..., alias="datetime"), gender: int = 1,
+                         sect: int = 1, realname: str = "", calendar: str = "solar", isLeap: bool = False,
+                         trueSolarTime: bool = False, longitude: Optional[float] = None, city: Optional[str] = None):
+    """获取八字基本信息（GET，可被代理缓存）"""
+    try:
+        dt = birth_datetime(birth, calendar, isLeap, trueSolarTime, longitude, city)
+        query = canonical_query([("datetime", dt.strftime("%Y-%m-%d %H:%M:%S")), ("gender", gender),
+                                 ("sect", sect), ("realname", realname)])
+        return cached_get(request, query, lambda: compute_bazi_info(dt, gender, sect, realname), INTERACTIVE,
+                          private=bool(realname))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise http_error(e)
 
 @app.post("/8char/get-prediction")
 def get_bazi_prediction(req: BaziPredictionRequest):
     """获取大运流年预测"""
     try:
-        dt = datetime.strptime(req.datetime, "%Y-%m-%d %H:%M:%S")
-        result = bazi_calc.calculate_bazi_prediction(dt, req.gender, req.sect)
-        return {"data": result}
+        dt = request_datetime(req)
+        with admission.admit(PREDICTION):
+            session = chart_sessions.get(req.handle, dt, req.gender, req.sect)
+            if session is not None:
+                if session.prediction is None:
+                    session.prediction = bazi_calc.prediction_from_chart(session.chart)
+                return {"data": session.prediction}
+            return data_response(compute_bazi_prediction(dt, req.gender, req.sect))
+    except Exception as e:
+        raise http_error(e)
+
+@app.post("/8char/get-full")
+def get_bazi_full(req: BaziFullRequest):
+    """一次排盘同时获取八字基本信息与大运流年预测，并返回可供前两个接口复用的排盘句柄"""
+    try:
+        dt = request_datetime(req)
+        with admission.admit(INTERACTIVE):
+            chart = bazi_calc.prepare_chart(dt, req.gender, req.sect)
+            prediction = bazi_calc.prediction_from_chart(chart)
+            return {
+                "data": {
+                    "handle": chart_sessions.create(chart, prediction),
+                    "info": bazi_calc.info_from_chart(chart, req.realname or ""),
+                    "prediction": prediction
+                }
+            }
+    except Exception as e:
+        raise http_error(e)
+
+@app.get("/8char/get-prediction")
+def get_bazi_prediction_cached(request: Request, birth: str = Query(..., alias="datetime"), gender: int = 1,
+                               sect: int = 1, calendar: str = "solar", isLeap: bool = False,
+                               trueSolarTime: bool = False, longitude: Optional[float] = None,
+                               city: Optional[str] = None):
+    """获取大运流年预测（GET，可被代理缓存）"""
+    try:
+        dt = birth_datetime(birth, calendar, isLeap, trueSolarTime, longitude, city)
+        query = canonical_query([("datetime", dt.strftime("%Y-%m-%d %H:%M:%S")), ("gender", gender),
+                                 ("sect", sect)])
+        return cached_get(request, query, lambda: compute_bazi_prediction(dt, gender, sect), PREDICTION)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise http_error(e)
+
+def validate_batch_items(start: int, items: List[Any], model: Any) -> Tuple[list, Dict[int, bytes]]:
+    """逐条校验批量条目，返回（[(序号, 请求, 出生时间)], {序号: 出错条目的结果行}）"""
+    valid, lines = [], {}
+    for index, item in enumerate(items, start):
+        try:
+            if isinstance(item, BadItem):
+                raise item
+            req = model.model_validate(item)
+            valid.append((index, req, request_datetime(req)))
+        except Exception as e:
+            lines[index] = item_line(index, error=str(e))
+    return valid, lines
+
+def info_batch_chunk(start: int, items: List[Any]) -> bytes:
+    """一段批量基本信息：四柱整段向量化查表，整段失败时逐条计算以定位出错条目"""
+    valid, lines = validate_batch_items(start, items, BaziInfoRequest)
+    requests = [(dt, req.gender, req.sect, req.realname or "") for _, req, dt in valid]
+    try:
+        results = bazi_calc.calculate_bazi_info_batch(requests)
+    except Exception:
+        results = None
+    for position, (index, _, _) in enumerate(valid):
+        try:
+            result = results[position] if results is not None else bazi_calc.calculate_bazi_info(*requests[position])
+            lines[index] = item_line(index, result)
+        except Exception as e:
+            lines[index] = item_line(index, error=str(e))
+    return b"".join(lines[index] for index in sorted(lines))
+
+def prediction_batch_chunk(start: int, items: List[Any]) -> bytes:
+    """一段批量大运流年预测"""
+    valid, lines = validate_batch_items(start, items, BaziPredictionRequest)
+    for index, req, dt in valid:
+        try:
+            lines[index] = item_line(index, bazi_calc.calculate_bazi_prediction(dt, req.gender, req.sect))
+        except Exception as e:
+            lines[index] = item_line(index, error=str(e))
+    return b"".join(lines[index] for index in sorted(lines))
+
+async def batch_response(request: Request, process_chunk: Callable[[int, List[Any]], bytes]) -> StreamingResponse:
+    """
+    批量接口：读完请求体并取得批量类准入名额后开始流式返回
+    请求体须先读完（响应期间 Starlette 会监听连接断开，不能再边读边算）
+    """
+    try:
+        items = parse_batch_body(await request.body(), request.headers.get("content-type", ""))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        await run_in_threadpool(admission.acquire, BATCH)
+    except Exception as e:
+        raise http_error(e)
+    started = datetime.now()
+    released = []
+
+    def release():
+        if not released:
+            released.append(True)
+            admission.release(BATCH, (datetime.now() - started).total_seconds())
+
+    async def lines():
+        try:
+            async for chunk in stream_batch(items, process_chunk):
+                yield chunk
+        finally:
+            release()
+
+    return StreamingResponse(lines(), media_type=NDJSON_MEDIA_TYPE, background=BackgroundTask(release))
+
+@app.post("/8char/get-info/batch")
+async def get_bazi_info_batch(request: Request):
+    """批量获取八字基本信息（JSON 数组或 NDJSON，按段以 NDJSON 流式返回）"""
+    return await batch_response(request, info_batch_chunk)
+
+@app.post("/8char/get-prediction/batch")
+async def get_bazi_prediction_batch(request: Request):
+    """批量获取大运流年预测（JSON 数组或 NDJSON，按段以 NDJSON 流式返回）"""
+    return await batch_response(request, prediction_batch_chunk)
+
+# 可选的后台任务队列（由环境变量 BAZI_JOB_DIR 启用），每段计算与批量接口相同
+job_queue = get_job_queue({"info": info_batch_chunk, "prediction": prediction_batch_chunk}, admission)
+if job_queue is not None:
+    app.router.add_event_handler("startup", job_queue.start)
+    app.router.add_event_handler("shutdown", job_queue.close)
+
+def jobs_enabled() -> None:
+    if job_queue is None:
+        raise HTTPException(status_code=404, detail="未启用后台任务（BAZI_JOB_DIR）")
+
+@app.post("/8char/jobs")
+def create_job(req: JobRequest):
+    """提交后台任务：输入为服务器上的 NDJSON 文件"""
+    jobs_enabled()
+    try:
+        return {"data": job_queue.create(req.kind, req.input, req.chunkSize)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/8char/jobs/upload")
+async def upload_job(request: Request, kind: str = "info", chunkSize: int = 0):
+    """提交后台任务：请求体为 JSON 数组或 NDJSON，边接收边写入任务目录"""
+    jobs_enabled()
+    path = job_queue.upload_path()
+    try:
+        with open(path, "wb") as file:
+            async for chunk in request.stream():
+                await run_in_threadpool(file.write, chunk)
+        return {"data": await run_in_threadpool(job_queue.create, kind, path, chunkSize, True)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+
+@app.get("/8char/jobs")
+def list_jobs():
+    """全部后台任务"""
+    jobs_enabled()
+    return {"data": job_queue.list_jobs()}
+
+@app.get("/8char/jobs/{job_id}")
+def get_job(job_id: str):
+    """任务状态与进度"""
+    jobs_enabled()
+    try:
+        return {"data": job_queue.get(job_id)}
+    except Exception as e:
+        raise http_error(e)
+
+@app.get("/8char/jobs/{job_id}/result")
+def get_job_result(job_id: str):
+    """下载已完成任务的结果（NDJSON）"""
+    jobs_enabled()
+    try:
+        return FileResponse(job_queue.result_path(job_id), media_type=NDJSON_MEDIA_TYPE, filename=f"{job_id}.ndjson")
+    except Exception as e:
+        raise http_error(e)
+
+@app.post("/8char/jobs/{job_id}/cancel")
+def cancel_job(job_id: str):
+    """取消任务（计算中的任务在当前段结束后停止）"""
+    jobs_enabled()
+    try:
+        return {"data": job_queue.cancel(job_id)}
+    except Exception as e:
+        raise http_error(e)
 
 @app.get("/8char/get-tips")
 def get_tips():
@@ -78,6 +441,24 @@ def get_version():
         }
     }
 
+@app.get("/8char/get-stats")
+def get_stats():
+    """获取缓存与请求合并统计"""
+    return {
+        "data": {
+            "singleFlight": single_flight.stats(),
+            "chartMemo": bazi_calc.chart_memo.stats(),
+            "sharedCache": bazi_calc.shared_cache.stats() if bazi_calc.shared_cache else None,
+            "diskCache": bazi_calc.disk_cache.stats() if bazi_calc.disk_cache else None,
+            "microBatch": info_batcher.stats() if info_batcher else None,
+            "chartSessions": chart_sessions.stats(),
+            "processPool": process_pool.stats() if process_pool else None,
+            "memory": process_memory(),
+            "admission": admission.stats(),
+            "jobs": job_queue.stats() if job_queue else None
+        }
+    }
+
 # 保持兼容性接口
 @app.post("/bazi")
 def get_bazi_legacy(req: LegacyBaziRequest):
@@ -85,12 +466,13 @@ def get_bazi_legacy(req: LegacyBaziRequest):
     try:
         # 构造datetime字符串
         dt_str = f"{req.year:04d}-{req.month:02d}-{req.day:02d} {req.hour:02d}:{req.minute:02d}:00"
-        dt = datetime.strptime(dt_str, "%Y-%m-%d %H:%M:%S")
+        dt = birth_datetime(dt_str, true_solar=req.trueSolarTime, city=req.city)
         
         # 转换性别格式
         gender = 1 if req.gender == "男" else 2
         
-        result = bazi_calc.calculate_bazi_info(dt, gender, 1, req.name)
+        with admission.admit(LEGACY):
+            result = bazi_calc.calculate_bazi_info(dt, gender, 1, req.name)
         
         # 转换为兼容格式
         return {
@@ -119,4 +501,4 @@ def get_bazi_legacy(req: LegacyBaziRequest):
             }
         }
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise http_error(e)
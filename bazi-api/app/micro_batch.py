@@ -0,0 +1,140 @@
+"""
+微批处理
+把并发到达的单盘请求在一个很短的窗口内（默认 2 毫秒或凑满 max_batch 条）收集起来，
+交给一次批量计算（向量化查四柱），再把结果分发回各个等待的请求线程：
+- 窗口、批大小可调，窗口为 0 时只合并已在排队的请求
+- 批量计算抛出异常时逐条重算，异常只影响出错的那一条
+- 统计批数、平均/最大批大小、每批计算耗时与排队等待时间
+"""
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+
+# 环境变量：收集窗口（毫秒，未设置时不启用）、每批最大条数
+WINDOW_ENV = "BAZI_MICRO_BATCH_WINDOW_MS"
+SIZE_ENV = "BAZI_MICRO_BATCH_SIZE"
+DEFAULT_WINDOW_MS = 2.0
+DEFAULT_MAX_BATCH = 64
+
+
+class MicroBatcher:
+    """
+    微批调度器：process_batch(items) 须返回与 items 等长、顺序一致的结果列表
+    """
+
+    def __init__(self, process_batch: Callable[[List[Any]], List[Any]],
+                 max_batch: int = DEFAULT_MAX_BATCH, window_ms: float = DEFAULT_WINDOW_MS):
+        self.process_batch = process_batch
+        self.max_batch = max(1, max_batch)
+        self.window = max(0.0, window_ms) / 1000
+        self.batches = 0
+        self.items = 0
+        self.max_size = 0
+        self.compute_time = 0.0
+        self.max_compute_time = 0.0
+        self.last_compute_time = 0.0
+        self.wait_time = 0.0
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, item: Any) -> "Future":
+        """提交一条请求，返回其结果的 Future"""
+        future: "Future" = Future()
+        self._queue.put((item, future, time.perf_counter()))
+        return future
+
+    def __call__(self, item: Any) -> Any:
+        """提交并等待结果（异常原样抛出）"""
+        return self.submit(item).result()
+
+    def close(self) -> None:
+        """处理完已提交的请求后停止后台线程"""
+        self._queue.put(None)
+        self._worker.join()
+
+    def _collect(self, first: tuple) -> tuple:
+        """从第一条起收集一批，返回（批, 是否收到停止信号）"""
+        batch = [first]
+        deadline = time.perf_counter() + self.window
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.perf_counter()
+            try:
+                entry = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry is None:
+                return batch, True
+            batch.append(entry)
+        return batch, False
+
+    def _run(self) -> None:
+        while True:
+            entry = self._queue.get()
+            if entry is None:
+                return
+            batch, stop = self._collect(entry)
+            self._process(batch)
+            if stop:
+                return
+
+    def _process(self, batch: List[tuple]) -> None:
+        start = time.perf_counter()
+        items = [item for item, _, _ in batch]
+        try:
+            results = self.process_batch(items)
+            if len(results) != len(items):
+                raise ValueError(f"批量结果条数不符: {len(results)} != {len(items)}")
+        except Exception:
+            # 批量失败时逐条重算，把异常留给出错的那一条
+            results = None
+        elapsed = time.perf_counter() - start
+
+        for index, (item, future, submitted) in enumerate(batch):
+            if results is not None:
+                future.set_result(results[index])
+                continue
+            try:
+                future.set_result(self.process_batch([item])[0])
+            except Exception as e:
+                future.set_exception(e)
+
+        with self._lock:
+            self.batches += 1
+            self.items += len(batch)
+            self.max_size = max(self.max_size, len(batch))
+            self.compute_time += elapsed
+            self.max_compute_time = max(self.max_compute_time, elapsed)
+            self.last_compute_time = elapsed
+            self.wait_time += sum(start - submitted for _, _, submitted in batch)
+
+    def stats(self) -> Dict[str, Any]:
+        """批数、批大小与每批计算耗时（毫秒）"""
+        with self._lock:
+            batches = self.batches or 1
+            items = self.items or 1
+            return {
+                "windowMs": self.window * 1000,
+                "maxBatch": self.max_batch,
+                "batches": self.batches,
+                "items": self.items,
+                "avgBatchSize": self.items / batches,
+                "maxBatchSize": self.max_size,
+                "avgBatchMs": self.compute_time / batches * 1000,
+                "maxBatchMs": self.max_compute_time * 1000,
+                "lastBatchMs": self.last_compute_time * 1000,
+                "avgWaitMs": self.wait_time / items * 1000,
+            }
+
+
+def get_micro_batcher(process_batch: Callable[[List[Any]], List[Any]]) -> Optional[MicroBatcher]:
+    """按环境变量创建微批调度器，未配置窗口时返回 None"""
+    window = os.environ.get(WINDOW_ENV)
+    if not window:
+        return None
+    return MicroBatcher(process_batch, int(os.environ.get(SIZE_ENV, DEFAULT_MAX_BATCH)), float(window))
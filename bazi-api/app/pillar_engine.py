@@ -0,0 +1,109 @@
+"""
+向量化四柱引擎
+对整批出生时刻（北京时间）一次性计算年、月、日、时四柱的六十甲子编码，
+日柱由儒略日推算，年柱、月柱由节气表二分定位，无逐元素 Python 循环
+"""
+
+from typing import Dict, Optional
+
+import numpy as np
+
+from .jieqi_table import JieqiTable, get_jieqi_table
+
+# 1970-01-01 正午儒略日取整减 11 即为当日日柱偏移（与 lunar_python 一致）
+_DAY_PILLAR_OFFSET = 2440588 - 11
+
+
+def to_minute_array(timestamps) -> np.ndarray:
+    """
+    出生时刻转 int64 分钟偏移（1970-01-01 00:00 起，秒舍去）
+    支持 datetime64 数组、datetime 序列或已是分钟偏移的整数数组
+    """
+    arr = np.asarray(timestamps)
+    if np.issubdtype(arr.dtype, np.integer):
+        return arr.astype(np.int64, copy=False)
+    if not np.issubdtype(arr.dtype, np.datetime64):
+        arr = arr.astype("datetime64[m]")
+    return arr.astype("datetime64[m]").astype(np.int64)
+
+
+def pillar_array(gan: np.ndarray, zhi: np.ndarray) -> np.ndarray:
+    """由天干、地支编码数组求柱编码数组"""
+    return (6 * gan - 5 * zhi) % 60
+
+
+def jie_pillars(jie_index, first_year: int):
+    """
+    由"节"序号（小寒为偶数位）求年柱、月柱编码，标量与数组通用
+    以"节"定月令，立春前属上一年
+    """
+    jie_in_year = (jie_index % 24) // 2          # 0=小寒 1=立春 ... 11=大雪
+    year = (first_year + jie_index // 24 - (jie_in_year == 0) - 4) % 60
+    month_zhi = (jie_in_year + 1) % 12
+    month_gan = (year % 5 * 2 + 2 + (month_zhi - 2) % 12) % 10
+    return year, pillar_array(month_gan, month_zhi)
+
+
+class PillarEngine:
+    """
+    向量化四柱引擎
+    """
+
+    def __init__(self, term_minutes: np.ndarray, first_year: int):
+        # 节气交节时刻（分钟偏移），自 first_year 小寒起每年 24 个
+        self.term_minutes = term_minutes
+        self.first_year = first_year
+
+    @classmethod
+    def from_table(cls, table: Optional[JieqiTable] = None) -> "PillarEngine":
+        """基于预生成节气表构建（零拷贝共享 mmap）"""
+        table = table or get_jieqi_table()
+        return cls(np.frombuffer(table.minutes, dtype=np.int64), table.first_year)
+
+    def compute(self, timestamps, sect=1, gender=None) -> Dict[str, np.ndarray]:
+        """
+        计算四柱编码
+        sect: 1=晚子时日柱算明天, 2=晚子时日柱算当天（标量或数组）
+        gender: 1=男, 2=女（可选，给出时同时返回大运方向 1 顺 -1 逆）
+        返回 {"year", "month", "day", "time"[, "direction"]} 数组
+        """
+        minutes = to_minute_array(timestamps)
+
+        term_index = np.searchsorted(self.term_minutes, minutes, side="right") - 1
+        if minutes.size and (term_index.min() < 0 or term_index.max() >= len(self.term_minutes) - 1):
+            raise ValueError("出生时刻超出节气表范围")
+
+        # 年柱、月柱
+        jie_index = term_index - (term_index & 1)
+        year, month = jie_pillars(jie_index, self.first_year)
+
+        # 日柱：23 点起为晚子时，流派 1 日柱进一天
+        days = minutes // 1440
+        hour = minutes % 1440 // 60
+        day_today = (days + _DAY_PILLAR_OFFSET) % 60
+        day_next = (day_today + (hour == 23)) % 60
+        day = np.where(np.asarray(sect) == 2, day_today, day_next)
+
+        # 时柱：时干按五鼠遁，晚子时以次日日干起
+        time_zhi = (hour + 1) // 2 % 12
+        time_gan = (day_next % 5 * 2 + time_zhi) % 10
+        time = pillar_array(time_gan, time_zhi)
+
+        result = {"year": year, "month": month, "day": day, "time": time}
+        if gender is not None:
+            # 阳年男、阴年女顺排
+            yang = year % 2 == 0
+            male = np.asarray(gender) == 1
+            result["direction"] = np.where(yang == male, 1, -1)
+        return result
+
+
+_engine: Optional[PillarEngine] = None
+
+
+def get_pillar_engine() -> PillarEngine:
+    """获取进程内共享的四柱引擎"""
+    global _engine
+    if _engine is None:
+        _engine = PillarEngine.from_table()
+    return _engine
@@ -0,0 +1,140 @@
+"""
+柱对关系表
+以（本命柱, 目标柱）为下标预计算十神、十二长生、太岁关系及冲合标志，
+预测循环中每格只需一次数组读取，整条大运/流年/流月时间线可用下标数组一次取出
+"""
+
+from typing import Any, Dict, List
+
+import numpy as np
+
+from . import ganzhi
+from .data_models import Constants
+
+# 冲合标志位
+FLAG_GAN_HE = 1 << 0         # 天干五合
+FLAG_GAN_CHONG = 1 << 1      # 天干相冲
+FLAG_ZHI_HE = 1 << 2         # 地支六合
+FLAG_ZHI_CHONG = 1 << 3      # 地支六冲
+FLAG_ZHI_XING = 1 << 4       # 地支相刑
+FLAG_ZHI_HAI = 1 << 5        # 地支相害
+FLAG_ZHI_PO = 1 << 6         # 地支相破
+FLAG_FU_YIN = 1 << 7         # 伏吟：干支全同
+FLAG_FAN_YIN = 1 << 8        # 反吟：天干相冲且地支相冲
+
+FLAG_NAMES = (
+    (FLAG_GAN_HE, "天干五合"), (FLAG_GAN_CHONG, "天干相冲"),
+    (FLAG_ZHI_HE, "地支六合"), (FLAG_ZHI_CHONG, "地支六冲"), (FLAG_ZHI_XING, "地支相刑"),
+    (FLAG_ZHI_HAI, "地支相害"), (FLAG_ZHI_PO, "地支相破"),
+    (FLAG_FU_YIN, "伏吟"), (FLAG_FAN_YIN, "反吟"),
+)
+
+# 十神组合编码：天干十神 * 10 + 地支十神（本气），名称如"才官"
+SHI_SHEN_PAIR_NAMES = tuple(a + b for a in ganzhi.SHI_SHEN_SHORT for b in ganzhi.SHI_SHEN_SHORT)
+
+# 太岁关系名称，0 为无
+TAISUI_NAMES = ("",) + tuple(dict.fromkeys(Constants.TAISUI_RELATION.values()))
+
+RELATION_DTYPE = np.dtype([
+    ("shishen", np.uint8),       # 目标柱对本命日干的十神组合编码
+    ("chang_sheng", np.uint8),   # 本命日干在目标地支的十二长生
+    ("taisui", np.uint8),        # 本命地支与目标地支的太岁关系
+    ("flags", np.uint16),        # 冲合标志
+])
+
+
+def _taisui_code(natal_zhi: int, target_zhi: int) -> int:
+    """太岁关系编码（两种顺序都查）"""
+    a, b = ganzhi.DI_ZHI[natal_zhi], ganzhi.DI_ZHI[target_zhi]
+    name = Constants.TAISUI_RELATION.get(a + b) or Constants.TAISUI_RELATION.get(b + a)
+    return TAISUI_NAMES.index(name) if name else 0
+
+
+def _pair_flags(natal: int, target: int) -> int:
+    """两柱之间的冲合标志"""
+    gan_pair = (natal % 10) * 10 + target % 10
+    zhi_pair = (natal % 12) * 12 + target % 12
+    flags = 0
+    for flag, table, index in (
+        (FLAG_GAN_HE, ganzhi.GAN_HE, gan_pair), (FLAG_GAN_CHONG, ganzhi.GAN_CHONG, gan_pair),
+        (FLAG_ZHI_HE, ganzhi.ZHI_LIU_HE, zhi_pair), (FLAG_ZHI_CHONG, ganzhi.ZHI_CHONG, zhi_pair),
+        (FLAG_ZHI_XING, ganzhi.ZHI_XING, zhi_pair), (FLAG_ZHI_HAI, ganzhi.ZHI_HAI, zhi_pair),
+        (FLAG_ZHI_PO, ganzhi.ZHI_PO, zhi_pair),
+    ):
+        if table[index]:
+            flags |= flag
+    if natal == target:
+        flags |= FLAG_FU_YIN
+    if flags & FLAG_GAN_CHONG and flags & FLAG_ZHI_CHONG:
+        flags |= FLAG_FAN_YIN
+    return flags
+
+
+def build_relation_table() -> np.ndarray:
+    """生成 60x60 柱对关系表"""
+    table = np.zeros((60, 60), dtype=RELATION_DTYPE)
+    for natal in range(60):
+        day_gan = natal % 10
+        for target in range(60):
+            table[natal, target] = (
+                ganzhi.gan_shi_shen(day_gan, target % 10) * 10 + ganzhi.zhi_shi_shen(day_gan, target % 12),
+                ganzhi.CHANG_SHENG[day_gan * 12 + target % 12],
+                _taisui_code(natal % 12, target % 12),
+                _pair_flags(natal, target),
+            )
+    return table
+
+
+# 模块加载时一次生成（约 14 KB）
+RELATIONS = build_relation_table()
+
+
+def lookup(natal, targets) -> np.ndarray:
+    """
+    批量取关系：natal 为本命柱（标量或数组），targets 为任意形状的目标柱数组
+    日干十神、长生只看 natal 的天干，太岁只看 natal 的地支
+    """
+    return RELATIONS[natal, targets]
+
+
+def flag_names(flags: int) -> list:
+    """标志位转名称列表"""
+    return [name for flag, name in FLAG_NAMES if flags & flag]
+
+
+def describe(natal: int, target: int) -> Dict[str, object]:
+    """单格关系的可读形式"""
+    cell = RELATIONS[natal, target]
+    return {
+        "shishen": SHI_SHEN_PAIR_NAMES[cell["shishen"]],
+        "changSheng": ganzhi.CHANG_SHENG_NAMES[cell["chang_sheng"]],
+        "taisui": TAISUI_NAMES[cell["taisui"]],
+        "relations": flag_names(int(cell["flags"])),
+    }
+
+
+# 童限（没有干支的第 0 步大运）的关系字段
+CHILD_FIELDS = {"shishen": "童限", "changSheng": "", "taisui": "", "relations": []}
+
+
+def annotate(day_pillar: int, year_pillar: int, targets) -> List[Dict[str, Any]]:
+    """
+    一列目标柱（大运、流年、流月）对本命的关系字段：
+    shishen 十神组合、changSheng 日干十二长生、taisui 对本命年支的太岁关系、relations 与日柱的冲合
+    整列只做一次数组读取；负数下标（童限）给出 CHILD_FIELDS
+    """
+    targets = np.asarray(targets, dtype=np.intp)
+    cells = RELATIONS[[[day_pillar], [year_pillar]], np.maximum(targets, 0)]
+    day_cells, taisui = cells[0], cells[1]["taisui"]
+    return [
+        dict(CHILD_FIELDS, relations=[]) if target < 0 else {
+            "shishen": SHI_SHEN_PAIR_NAMES[shishen],
+            "changSheng": ganzhi.CHANG_SHENG_NAMES[chang_sheng],
+            "taisui": TAISUI_NAMES[code],
+            "relations": flag_names(flags),
+        }
+        for target, shishen, chang_sheng, code, flags in zip(
+            targets.tolist(), day_cells["shishen"].tolist(), day_cells["chang_sheng"].tolist(),
+            taisui.tolist(), day_cells["flags"].tolist()
+        )
+    ]
@@ -0,0 +1,158 @@
+"""
+排盘进程池
+单个 uvicorn 进程内的计算受 GIL 限制只能用一个核，开启后把 get-info / get-prediction 的计算交给工作进程：
+- 工作进程启动时加载节气表、排盘分段表、农历月表并试算一次，第一条请求不再付加载开销
+- 工作进程把结果编码为紧凑 JSON 字节返回，主进程直接拼进响应体，不再 pickle / 反序列化大字典
+- 排队请求数有上限，满了立即拒绝（PoolBusy）；每个请求有超时（PoolTimeout）
+- 工作进程异常退出时重建进程池
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+# 环境变量：工作进程数（未设置或 0 不启用，auto 为可用核数）、排队上限、单个请求超时（秒）
+WORKERS_ENV = "BAZI_PROCESS_WORKERS"
+QUEUE_ENV = "BAZI_PROCESS_QUEUE"
+TIMEOUT_ENV = "BAZI_PROCESS_TIMEOUT"
+DEFAULT_TIMEOUT = 10.0
+# 排队上限默认为工作进程数的倍数
+QUEUE_PER_WORKER = 8
+
+
+class PoolBusy(Exception):
+    """排队请求已满"""
+
+
+class PoolTimeout(Exception):
+    """请求超时"""
+
+
+# 工作进程内的计算器
+_calculator = None
+
+
+def _init_worker() -> None:
+    """工作进程初始化：加载各表、挂载共享缓存并试算一次"""
+    global _calculator
+    from .bazi_calculator_new import BaziCalculator
+    from .disk_cache import get_disk_cache
+    from .shared_cache import get_shared_cache
+
+    _calculator = BaziCalculator(disk_cache=get_disk_cache(), shared_cache=get_shared_cache())
+    warm = datetime(2000, 1, 1, 12)
+    _calculator.calculate_bazi_info(warm, 1, 1, "")
+    _calculator.calculate_bazi_prediction(warm, 1, 1)
+
+
+def _run(kind: str, dt: datetime, gender: int, sect: int, realname: str) -> bytes:
+    """在工作进程中计算，返回 JSON 字节"""
+    from .disk_cache import encode
+
+    if kind == "info":
+        result = _calculator.calculate_bazi_info(dt, gender, sect, realname)
+    else:
+        result = _calculator.calculate_bazi_prediction(dt, gender, sect)
+    return encode(result)
+
+
+def available_cpus() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+class ChartProcessPool:
+    """
+    排盘进程池（同步接口：请求线程提交后等待结果，等待期间不占 GIL）
+    """
+
+    def __init__(self, workers: int, max_pending: Optional[int] = None, timeout: float = DEFAULT_TIMEOUT,
+                 start_method: str = "forkserver"):
+        self.workers = workers
+        self.max_pending = max_pending if max_pending is not None else workers * QUEUE_PER_WORKER
+        self.timeout = timeout
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.restarts = 0
+        self._context = multiprocessing.get_context(start_method)
+        self._lock = threading.Lock()
+        self._executor = self._create_executor()
+
+    def _create_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(self.workers, mp_context=self._context, initializer=_init_worker)
+
+    def submit(self, kind: str, dt: datetime, gender: int, sect: int, realname: str = "") -> "Future":
+        """提交计算，排队已满时抛出 PoolBusy"""
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise PoolBusy("服务繁忙，请稍后重试")
+            self.pending += 1
+            executor = self._executor
+        try:
+            future = executor.submit(_run, kind, dt, gender, sect, realname)
+        except BrokenProcessPool:
+            self._done(None)
+            self._restart(executor)
+            raise
+        future.add_done_callback(self._done)
+        return future
+
+    def run(self, kind: str, dt: datetime, gender: int, sect: int, realname: str = "",
+            timeout: Optional[float] = None) -> bytes:
+        """提交并等待结果（JSON 字节），超时抛出 PoolTimeout"""
+        executor = self._executor
+        future = self.submit(kind, dt, gender, sect, realname)
+        try:
+            return future.result(self.timeout if timeout is None else timeout)
+        except FutureTimeout:
+            future.cancel()
+            with self._lock:
+                self.timeouts += 1
+            raise PoolTimeout("计算超时")
+        except BrokenProcessPool:
+            self._restart(executor)
+            raise
+
+    def _done(self, future: Optional["Future"]) -> None:
+        with self._lock:
+            self.pending -= 1
+            if future is not None and not future.cancelled():
+                self.completed += 1
+
+    def _restart(self, broken: ProcessPoolExecutor) -> None:
+        """工作进程异常退出后重建（多个线程同时发现时只重建一次）"""
+        with self._lock:
+            if self._executor is not broken:
+                return
+            self._executor = self._create_executor()
+            self.restarts += 1
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"workers": self.workers, "maxPending": self.max_pending, "timeout": self.timeout,
+                    "pending": self.pending, "completed": self.completed, "rejected": self.rejected,
+                    "timeouts": self.timeouts, "restarts": self.restarts}
+
+
+def get_process_pool() -> Optional[ChartProcessPool]:
+    """按环境变量创建进程池，未配置时返回 None"""
+    workers = os.environ.get(WORKERS_ENV, "").strip()
+    if not workers or workers == "0":
+        return None
+    count = available_cpus() if workers == "auto" else int(workers)
+    queue = os.environ.get(QUEUE_ENV)
+    return ChartProcessPool(count, int(queue) if queue else None,
+                            float(os.environ.get(TIMEOUT_ENV, DEFAULT_TIMEOUT)))
@@ -0,0 +1,143 @@
+"""
+干支关系检测
+把命盘（可叠加大运、流年等柱）的天干、地支分别编码为 10 位、12 位掩码，
+用预编译的规则逐条做掩码包含测试，一次遍历找出全部合、冲、刑、害、破、会；
+批量形式对整批命盘一次矩阵运算完成
+"""
+
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+from . import ganzhi
+
+# 规则作用对象
+TARGET_GAN = 0       # 天干掩码
+TARGET_ZHI = 1       # 地支掩码
+TARGET_ZHI_DUP = 2   # 出现两次及以上的地支掩码（自刑）
+
+# 地支六合、三合、三会的化神
+_LIU_HE = ((0, 1, "土"), (2, 11, "木"), (3, 10, "火"), (4, 9, "金"), (5, 8, "水"), (6, 7, "土"))
+_SAN_HE = (((8, 0, 4), "水"), ((5, 9, 1), "金"), ((2, 6, 10), "火"), ((11, 3, 7), "木"))
+_SAN_HUI = (((2, 3, 4), "木"), ((5, 6, 7), "火"), ((8, 9, 10), "金"), ((11, 0, 1), "水"))
+_GAN_HE_ELEMENT = ("土", "金", "水", "木", "火")
+
+
+def _mask(indices: Sequence[int]) -> int:
+    mask = 0
+    for index in indices:
+        mask |= 1 << index
+    return mask
+
+
+def _zhi_names(indices: Sequence[int]) -> str:
+    return "".join(ganzhi.DI_ZHI[i] for i in indices)
+
+
+def _compile_rules() -> List[Tuple[int, int, int, str]]:
+    """
+    规则表：(作用对象, 需同时出现的掩码, 排除掩码, 名称)
+    排除掩码非 0 且全部出现时该规则不报（如已成三合则不再报半合）
+    """
+    rules = []
+    # 天干五合、相冲
+    for a in range(5):
+        rules.append((TARGET_GAN, _mask((a, a + 5)), 0,
+                      f"{ganzhi.TIAN_GAN[a]}{ganzhi.TIAN_GAN[a + 5]}合{_GAN_HE_ELEMENT[a]}"))
+    for a in range(4):
+        rules.append((TARGET_GAN, _mask((a, a + 6)), 0, f"{ganzhi.TIAN_GAN[a]}{ganzhi.TIAN_GAN[a + 6]}相冲"))
+
+    # 地支两两关系
+    for a, b, element in _LIU_HE:
+        rules.append((TARGET_ZHI, _mask((a, b)), 0, f"{_zhi_names((a, b))}六合({element})"))
+    for a in range(6):
+        rules.append((TARGET_ZHI, _mask((a, a + 6)), 0, f"{_zhi_names((a, a + 6))}相冲"))
+    xing_pairs = set()
+    for a in range(12):
+        b = ganzhi.ZHI_XING_TARGET[a]
+        if a != b and _mask((a, b)) not in xing_pairs:
+            xing_pairs.add(_mask((a, b)))
+            rules.append((TARGET_ZHI, _mask((a, b)), 0, f"{_zhi_names((a, b))}相刑"))
+    for kind, table in (("相害", ganzhi.ZHI_HAI), ("相破", ganzhi.ZHI_PO)):
+        for a in range(12):
+            for b in range(a + 1, 12):
+                if table[a * 12 + b]:
+                    rules.append((TARGET_ZHI, _mask((a, b)), 0, f"{_zhi_names((a, b))}{kind}"))
+
+    # 三刑、自刑
+    for group in ((2, 5, 8), (1, 10, 7)):
+        rules.append((TARGET_ZHI, _mask(group), 0, f"{_zhi_names(group)}三刑"))
+    for a in range(12):
+        if ganzhi.ZHI_XING_TARGET[a] == a:
+            rules.append((TARGET_ZHI_DUP, _mask((a,)), 0, f"{_zhi_names((a, a))}自刑"))
+
+    # 三合、半合（含旺支的两支，已成三合时不报）、三会
+    for group, element in _SAN_HE:
+        rules.append((TARGET_ZHI, _mask(group), 0, f"{_zhi_names(group)}三合{element}"))
+        for pair in (group[:2], group[1:]):
+            rules.append((TARGET_ZHI, _mask(pair), _mask(group), f"{_zhi_names(pair)}半合{element}"))
+    for group, element in _SAN_HUI:
+        rules.append((TARGET_ZHI, _mask(group), 0, f"{_zhi_names(group)}三会{element}"))
+    return rules
+
+
+RULES = _compile_rules()
+RULE_NAMES = tuple(rule[3] for rule in RULES)
+
+# 批量检测用的规则数组
+_RULE_TARGET = np.array([rule[0] for rule in RULES], dtype=np.int64)
+_RULE_REQUIRE = np.array([rule[1] for rule in RULES], dtype=np.int64)
+_RULE_EXCLUDE = np.array([rule[2] for rule in RULES], dtype=np.int64)
+
+
+def chart_masks(gans: Sequence[int], zhis: Sequence[int]) -> Tuple[int, int, int]:
+    """天干掩码、地支掩码、重复地支掩码"""
+    gan_mask = zhi_mask = dup_mask = 0
+    for g in gans:
+        gan_mask |= 1 << g
+    for z in zhis:
+        bit = 1 << z
+        dup_mask |= zhi_mask & bit
+        zhi_mask |= bit
+    return gan_mask, zhi_mask, dup_mask
+
+
+def detect(gans: Sequence[int], zhis: Sequence[int]) -> List[str]:
+    """
+    检测一张命盘（及叠加柱）的全部干支关系
+    gans / zhis: 天干、地支编码序列，顺序无关
+    """
+    masks = chart_masks(gans, zhis)
+    result = []
+    for target, require, exclude, name in RULES:
+        mask = masks[target]
+        if (mask & require) == require and not (exclude and (mask & exclude) == exclude):
+            result.append(name)
+    return result
+
+
+def detect_pillars(pillars: Sequence[int]) -> List[str]:
+    """按柱编码检测"""
+    return detect([p % 10 for p in pillars], [p % 12 for p in pillars])
+
+
+def detect_batch(pillars: np.ndarray) -> np.ndarray:
+    """
+    批量检测：pillars 形状 (N, k) 的柱编码数组（如四柱加大运、流年）
+    返回 (N, len(RULES)) 布尔矩阵，列与 RULE_NAMES 对应
+    """
+    pillars = np.asarray(pillars, dtype=np.int64)
+    gan_bits = 1 << (pillars % 10)
+    zhi_index = pillars % 12
+    counts = (zhi_index[..., None] == np.arange(12)).sum(axis=-2)
+    weights = 1 << np.arange(12)
+    masks = np.stack([
+        np.bitwise_or.reduce(gan_bits, axis=-1),
+        (counts > 0) @ weights,
+        (counts > 1) @ weights,
+    ], axis=-1)
+
+    mask = masks[:, _RULE_TARGET]
+    hit = (mask & _RULE_REQUIRE) == _RULE_REQUIRE
+    excluded = (_RULE_EXCLUDE != 0) & ((mask & _RULE_EXCLUDE) == _RULE_EXCLUDE)
+    return hit & ~excluded
@@ -0,0 +1,172 @@
+"""
+预加载 + fork 启动方式
+父进程先导入全部计算模块、加载节气表 / 排盘分段表 / 农历月表 / 城市索引等静态数据，
+gc.freeze() 后再 fork 出 N 个 uvicorn worker 共用同一个监听套接字：
+- 静态数据所在的内存页由各 worker 写时复制共享，冻结后垃圾回收不再改写这些对象，页面保持共享
+- worker 异常退出时父进程重新 fork；父进程收到 SIGTERM / SIGINT 时通知全部 worker 退出
+- 启动后报告各 worker 的 RSS 与其中共享、私有部分
+
+用法：python -m app.serve --host 0.0.0.0 --port 8000 --workers 4
+"""
+
+import argparse
+import gc
+import importlib
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Dict, List, Optional
+
+# 环境变量：worker 数（默认可用核数）
+WORKERS_ENV = "BAZI_WORKERS"
+# 启动后等待多久报告内存（秒）
+REPORT_DELAY = 5.0
+
+# 父进程预先导入的模块（导入时构建的常量表随之加载）
+PRELOAD_MODULES = (
+    "app.ganzhi", "app.data_models", "app.pillar_engine", "app.pillar_relation", "app.luck_cycle",
+    "app.relation_detector", "app.shensha", "app.bazi_core", "app.bazi_calculator", "app.bazi_calculator_new",
+    "app.chart_memo", "app.chart_session", "app.http_cache", "app.micro_batch", "app.single_flight",
+    "app.solar_time", "app.process_pool", "app.admission", "app.batch_stream", "app.job_queue",
+)
+
+
+def preload() -> int:
+    """导入计算模块、加载静态表并冻结，返回冻结的对象数"""
+    for name in PRELOAD_MODULES:
+        importlib.import_module(name)
+    from .chart_table import get_chart_table
+    from .city_index import get_city_index
+    from .jieqi_table import get_jieqi_table
+    from .lunar_table import get_lunar_table
+    from .pillar_engine import get_pillar_engine
+
+    get_jieqi_table()
+    get_chart_table()
+    get_lunar_table()
+    get_city_index()
+    get_pillar_engine()
+    gc.collect()
+    gc.freeze()
+    return gc.get_freeze_count()
+
+
+def process_memory(pid: Optional[int] = None) -> Optional[Dict[str, int]]:
+    """进程内存（字节）：RSS、PSS 及共享、私有部分，读不到 /proc 时返回 None"""
+    path = f"/proc/{pid or 'self'}/smaps_rollup"
+    try:
+        with open(path) as file:
+            lines = file.readlines()
+    except OSError:
+        return None
+    fields = {}
+    for line in lines[1:]:
+        parts = line.split()
+        if len(parts) >= 2 and parts[1].isdigit():
+            fields[parts[0].rstrip(":")] = int(parts[1]) * 1024
+    return {
+        "rss": fields.get("Rss", 0),
+        "pss": fields.get("Pss", 0),
+        "shared": fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0),
+        "private": fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0),
+    }
+
+
+def format_memory(memory: Optional[Dict[str, int]]) -> str:
+    if memory is None:
+        return "不可用"
+    return " ".join(f"{name}={value / (1 << 20):.1f}MB" for name, value in memory.items())
+
+
+def _run_worker(sock: socket.socket, host: str, port: int) -> None:
+    """worker：在继承的套接字上运行 uvicorn"""
+    import uvicorn
+
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    config = uvicorn.Config("app.main:app", host=host, port=port)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def _fork_worker(sock: socket.socket, host: str, port: int) -> int:
+    pid = os.fork()
+    if pid == 0:
+        code = 0
+        try:
+            _run_worker(sock, host, port)
+        except BaseException:
+            code = 1
+        finally:
+            os._exit(code)
+    return pid
+
+
+def serve(host: str, port: int, workers: int) -> None:
+    """预加载后 fork workers 个 worker，并监督其运行"""
+    from .process_pool import WORKERS_ENV as POOL_WORKERS_ENV
+
+    # 已经按核数 fork worker，不再在每个 worker 内开进程池
+    if os.environ.pop(POOL_WORKERS_ENV, None):
+        print(f"预加载模式下忽略 {POOL_WORKERS_ENV}", file=sys.stderr)
+
+    started = time.perf_counter()
+    frozen = preload()
+    print(f"预加载完成：{time.perf_counter() - started:.2f} 秒，冻结 {frozen} 个对象；"
+          f"父进程 {format_memory(process_memory())}", file=sys.stderr)
+
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    children: List[int] = [_fork_worker(sock, host, port) for _ in range(workers)]
+    report_at = time.monotonic() + REPORT_DELAY
+    while children:
+        if report_at is not None and time.monotonic() >= report_at:
+            report_at = None
+            for pid in children:
+                print(f"worker {pid}: {format_memory(process_memory(pid))}", file=sys.stderr)
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            break
+        if pid == 0:
+            time.sleep(0.5)
+            continue
+        children.remove(pid)
+        if not stopping:
+            print(f"worker {pid} 退出（状态 {status}），重新启动", file=sys.stderr)
+            children.append(_fork_worker(sock, host, port))
+    sock.close()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    from .process_pool import available_cpus
+
+    parser = argparse.ArgumentParser(description="预加载静态表后 fork 多个 uvicorn worker")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=int(os.environ.get(WORKERS_ENV, 0)) or available_cpus())
+    args = parser.parse_args(argv)
+    serve(args.host, args.port, args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+跨 worker 共享内存排盘缓存
+在 multiprocessing.shared_memory 中放一张定长哈希表，同一节点上的各 uvicorn worker 共用：
+- 槽位定长：序号（seqlock）、数据长度、64 位键、紧凑编码的结果
+- 键由规范输入（排盘分段键等）哈希得到，按桶（BUCKET_SLOTS 个槽）开放寻址，桶满时覆盖
+- 读不加锁：前后两次读序号一致且为偶数才认为数据完整
+- 写按桶分条加锁：锁文件上的字节区间锁（fcntl），不同桶的写互不阻塞
+"""
+
+import fcntl
+import hashlib
+import json
+import os
+import struct
+import tempfile
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Dict, Optional
+
+from .disk_cache import decode, encode, engine_version
+
+# 环境变量：共享内存名称（未设置时不启用）、槽位数
+NAME_ENV = "BAZI_SHARED_CACHE"
+SLOTS_ENV = "BAZI_SHARED_CACHE_SLOTS"
+DEFAULT_SLOTS = 16384
+
+# 每个槽位可存的最大数据长度（排盘分段结果编码后约 700 字节）
+SLOT_PAYLOAD = 1024
+BUCKET_SLOTS = 4
+# 写锁分条数
+LOCK_STRIPES = 256
+
+# 表头：魔数、槽位数、槽位数据长度、引擎版本
+HEADER = struct.Struct("<4sii16s")
+MAGIC = b"SHC1"
+# 槽位头：序号、数据长度、键
+SLOT_HEADER = struct.Struct("<IIQ")
+SLOT_SIZE = SLOT_HEADER.size + SLOT_PAYLOAD
+
+
+def key_hash(kind: str, key: Any) -> int:
+    """规范键转 64 位哈希（0 保留为空槽）"""
+    digest = hashlib.blake2b(f"{kind}:{json.dumps(key, separators=(',', ':'))}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little") or 1
+
+
+class SharedChartCache:
+    """
+    共享内存定长哈希表
+    第一个 worker 创建并初始化，其余 worker 按名称挂载；引擎版本不一致时重新初始化
+    """
+
+    def __init__(self, name: str, slots: int = DEFAULT_SLOTS, version: Optional[str] = None):
+        self.name = name
+        self.slots = slots - slots % BUCKET_SLOTS
+        self.buckets = self.slots // BUCKET_SLOTS
+        self.version = (version or engine_version()).encode()[:16].ljust(16, b"\0")
+        self.hits = 0
+        self.misses = 0
+
+        lock_path = os.path.join(tempfile.gettempdir(), f"{name}.lock")
+        self._lock_fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        size = HEADER.size + self.slots * SLOT_SIZE
+        with self._locked(LOCK_STRIPES):
+            try:
+                self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+            except FileExistsError:
+                self._shm = shared_memory.SharedMemory(name=name)
+            # 各 worker 退出时不应删除共享内存
+            resource_tracker.unregister(self._shm._name, "shared_memory")
+            self._buf = self._shm.buf
+            magic, slot_count, payload, version = HEADER.unpack_from(self._buf, 0)
+            if (magic, payload, version) != (MAGIC, SLOT_PAYLOAD, self.version) or slot_count > len(self._buf):
+                self._initialize()
+            else:
+                # 以已存在的表为准
+                self.slots = min(slot_count, (len(self._buf) - HEADER.size) // SLOT_SIZE)
+                self.buckets = self.slots // BUCKET_SLOTS
+
+    def _initialize(self) -> None:
+        self.slots = min(self.slots, (len(self._buf) - HEADER.size) // SLOT_SIZE)
+        self.slots -= self.slots % BUCKET_SLOTS
+        self.buckets = self.slots // BUCKET_SLOTS
+        self._buf[HEADER.size:HEADER.size + self.slots * SLOT_SIZE] = bytes(self.slots * SLOT_SIZE)
+        HEADER.pack_into(self._buf, 0, MAGIC, self.slots, SLOT_PAYLOAD, self.version)
+
+    class _StripeLock:
+        def __init__(self, fd: int, stripe: int):
+            self.fd, self.stripe = fd, stripe
+
+        def __enter__(self):
+            fcntl.lockf(self.fd, fcntl.LOCK_EX, 1, self.stripe)
+
+        def __exit__(self, *exc):
+            fcntl.lockf(self.fd, fcntl.LOCK_UN, 1, self.stripe)
+
+    def _locked(self, stripe: int) -> "_StripeLock":
+        """锁文件第 stripe 字节的排他锁（LOCK_STRIPES 号为初始化锁）"""
+        return self._StripeLock(self._lock_fd, stripe)
+
+    def _slot_offset(self, slot: int) -> int:
+        return HEADER.size + slot * SLOT_SIZE
+
+    def get(self, kind: str, key: Any) -> Optional[Any]:
+        """无锁读取，未命中或读到写入中途的数据返回 None"""
+        hashed = key_hash(kind, key)
+        first = hashed % self.buckets * BUCKET_SLOTS
+        for slot in range(first, first + BUCKET_SLOTS):
+            offset = self._slot_offset(slot)
+            seq, length, slot_key = SLOT_HEADER.unpack_from(self._buf, offset)
+            if slot_key != hashed or seq & 1:
+                continue
+            data = bytes(self._buf[offset + SLOT_HEADER.size:offset + SLOT_HEADER.size + length])
+            if SLOT_HEADER.unpack_from(self._buf, offset)[0] != seq:
+                continue
+            self.hits += 1
+            return decode(data)
+        self.misses += 1
+        return None
+
+    def put(self, kind: str, key: Any, value: Any) -> bool:
+        """写入（桶内已有同键则覆盖，否则取空槽，桶满时按键哈希选一个槽覆盖），数据过长返回 False"""
+        data = encode(value)
+        if len(data) > SLOT_PAYLOAD:
+            return False
+        hashed = key_hash(kind, key)
+        bucket = hashed % self.buckets
+        first = bucket * BUCKET_SLOTS
+        with self._locked(bucket % LOCK_STRIPES):
+            target = None
+            for slot in range(first, first + BUCKET_SLOTS):
+                slot_key = SLOT_HEADER.unpack_from(self._buf, self._slot_offset(slot))[2]
+                if slot_key == hashed:
+                    target = slot
+                    break
+                if slot_key == 0 and target is None:
+                    target = slot
+            if target is None:
+                target = first + (hashed >> 32) % BUCKET_SLOTS
+            offset = self._slot_offset(target)
+            seq = SLOT_HEADER.unpack_from(self._buf, offset)[0]
+            SLOT_HEADER.pack_into(self._buf, offset, seq + 1, 0, 0)
+            self._buf[offset + SLOT_HEADER.size:offset + SLOT_HEADER.size + len(data)] = data
+            SLOT_HEADER.pack_into(self._buf, offset, (seq + 2) & 0xFFFFFFFE, len(data), hashed)
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        used = sum(
+            1 for slot in range(self.slots)
+            if SLOT_HEADER.unpack_from(self._buf, self._slot_offset(slot))[2]
+        )
+        total = self.hits + self.misses
+        return {"name": self.name, "slots": self.slots, "used": used, "hits": self.hits,
+                "misses": self.misses, "hitRate": self.hits / total if total else 0.0}
+
+    def close(self) -> None:
+        self._buf = None
+        self._shm.close()
+        os.close(self._lock_fd)
+
+    def unlink(self) -> None:
+        """删除共享内存（仅在整个服务停止时调用）"""
+        shared_memory.SharedMemory(name=self.name).unlink()
+
+
+_cache: Optional[SharedChartCache] = None
+
+
+def get_shared_cache() -> Optional[SharedChartCache]:
+    """按环境变量挂载进程内共享的共享内存缓存，未配置时返回 None"""
+    global _cache
+    name = os.environ.get(NAME_ENV)
+    if not name:
+        return None
+    if _cache is None or _cache.name != name:
+        _cache = SharedChartCache(name, int(os.environ.get(SLOTS_ENV, DEFAULT_SLOTS)))
+    return _cache
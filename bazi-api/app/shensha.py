@@ -0,0 +1,219 @@
+"""
+神煞规则引擎
+神煞规则以声明式数据给出：锚点（日干、年干、年支、月支、日支、日柱）、
+可落的柱位与查法表；模块加载时编译为 [锚点, 柱位, 锚点值, 目标柱] 的星位掩码表，
+一张命盘（含大运、流年等叠加柱）所有柱的神煞只需一次数组读取与按位或，
+耗时与规则条数无关
+"""
+
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from . import ganzhi
+
+# 柱位：四柱之后的柱（大运、流年等）统一记为叠加位
+POS_YEAR, POS_MONTH, POS_DAY, POS_HOUR, POS_OVERLAY = range(5)
+POSITION_COUNT = 5
+ALL_POSITIONS = (POS_YEAR, POS_MONTH, POS_DAY, POS_HOUR, POS_OVERLAY)
+PILLAR_POSITION_NAMES = ("年柱", "月柱", "日柱", "时柱")
+
+# 锚点：(取值柱位, 取值种类)，种类 0 天干、1 地支、2 整柱、3 无锚（只看目标柱本身）
+ANCHOR_DAY_GAN, ANCHOR_YEAR_GAN, ANCHOR_YEAR_ZHI, ANCHOR_MONTH_ZHI, ANCHOR_DAY_ZHI, ANCHOR_DAY_PILLAR, ANCHOR_NONE = range(7)
+_KIND_GAN, _KIND_ZHI, _KIND_PILLAR, _KIND_NONE = range(4)
+ANCHORS = (
+    (POS_DAY, _KIND_GAN), (POS_YEAR, _KIND_GAN), (POS_YEAR, _KIND_ZHI), (POS_MONTH, _KIND_ZHI),
+    (POS_DAY, _KIND_ZHI), (POS_DAY, _KIND_PILLAR), (POS_DAY, _KIND_NONE),
+)
+
+_GAN_STARS = (ANCHOR_DAY_GAN, ANCHOR_YEAR_GAN)
+_ZHI_STARS = (ANCHOR_YEAR_ZHI, ANCHOR_DAY_ZHI)
+
+# 三合局查法（以年支、日支所在三合局定位）
+def _by_san_he(water: str, fire: str, metal: str, wood: str) -> Dict[str, str]:
+    return {"申子辰": water, "寅午戌": fire, "巳酉丑": metal, "亥卯未": wood}
+
+# 地支偏移查法：目标支 = 锚点支 * sign + offset
+def _by_offset(offset: int, sign: int = 1) -> Dict[str, str]:
+    return {ganzhi.DI_ZHI[z]: ganzhi.DI_ZHI[(sign * z + offset) % 12] for z in range(12)}
+
+# 日柱旬空
+_XUN_KONG = {
+    ganzhi.PILLAR_NAMES[p]: "".join(ganzhi.DI_ZHI[z] for z in ganzhi.PILLAR_XUN_KONG[p]) for p in range(60)
+}
+
+# 规则：(星名, 锚点, 可落柱位, 查法表)
+# 查法表的键为锚点值（可多字并列），值为目标：单字天干/地支可并列书写，整柱用空格分隔
+# 地支锚点不会让本柱地支自查自中（如年支子不因将星为子而标在年柱）
+SHENSHA_RULES: Tuple[Tuple[str, Tuple[int, ...], Tuple[int, ...], Dict[str, str]], ...] = (
+    # 日干、年干查地支
+    ("天乙贵人", _GAN_STARS, ALL_POSITIONS,
+     {"甲戊庚": "丑未", "乙己": "子申", "丙丁": "亥酉", "辛": "寅午", "壬癸": "卯巳"}),
+    ("太极贵人", _GAN_STARS, ALL_POSITIONS,
+     {"甲乙": "子午", "丙丁": "卯酉", "戊己": "辰戌丑未", "庚辛": "寅亥", "壬癸": "巳申"}),
+    ("文昌贵人", _GAN_STARS, ALL_POSITIONS,
+     {"甲": "巳", "乙": "午", "丙戊": "申", "丁己": "酉", "庚": "亥", "辛": "子", "壬": "寅", "癸": "卯"}),
+    ("国印贵人", _GAN_STARS, ALL_POSITIONS,
+     {"甲": "戌", "乙": "亥", "丙戊": "丑", "丁己": "寅", "庚": "辰", "辛": "巳", "壬": "未", "癸": "申"}),
+    ("福星贵人", _GAN_STARS, ALL_POSITIONS,
+     {"甲丙": "寅子", "乙癸": "卯丑", "戊": "申", "己": "未", "丁": "亥", "庚": "午", "辛": "巳", "壬": "辰"}),
+    ("天厨贵人", _GAN_STARS, ALL_POSITIONS,
+     {"甲丙": "巳", "乙丁": "午", "戊": "申", "己": "酉", "庚": "亥", "辛": "子", "壬": "寅", "癸": "卯"}),
+    ("禄神", (ANCHOR_DAY_GAN,), ALL_POSITIONS,
+     {"甲": "寅", "乙": "卯", "丙戊": "巳", "丁己": "午", "庚": "申", "辛": "酉", "壬": "亥", "癸": "子"}),
+    ("羊刃", (ANCHOR_DAY_GAN,), ALL_POSITIONS,
+     {"甲": "卯", "乙": "辰", "丙戊": "午", "丁己": "未", "庚": "酉", "辛": "戌", "壬": "子", "癸": "丑"}),
+    ("飞刃", (ANCHOR_DAY_GAN,), ALL_POSITIONS,
+     {"甲": "酉", "乙": "戌", "丙戊": "子", "丁己": "丑", "庚": "卯", "辛": "辰", "壬": "午", "癸": "未"}),
+    ("红艳煞", (ANCHOR_DAY_GAN,), ALL_POSITIONS,
+     {"甲乙": "午", "丙": "寅", "丁": "未", "戊己": "辰", "庚": "戌", "辛": "酉", "壬": "子", "癸": "申"}),
+    ("流霞", (ANCHOR_DAY_GAN,), ALL_POSITIONS,
+     {"甲": "酉", "乙": "戌", "丙": "未", "丁": "申", "戊": "巳", "己": "午", "庚": "辰", "辛": "卯", "壬": "亥", "癸": "寅"}),
+    ("金舆", (ANCHOR_DAY_GAN,), ALL_POSITIONS,
+     {"甲": "辰", "乙": "巳", "丙戊": "未", "丁己": "申", "庚": "戌", "辛": "亥", "壬": "丑", "癸": "寅"}),
+    ("学堂", (ANCHOR_DAY_GAN,), ALL_POSITIONS,
+     {"甲": "亥", "乙": "午", "丙戊": "寅", "丁己": "酉", "庚": "巳", "辛": "子", "壬": "申", "癸": "卯"}),
+
+    # 年支、日支查地支（三合局）
+    ("将星", _ZHI_STARS, ALL_POSITIONS, _by_san_he("子", "午", "酉", "卯")),
+    ("华盖", _ZHI_STARS, ALL_POSITIONS, _by_san_he("辰", "戌", "丑", "未")),
+    ("驿马", _ZHI_STARS, ALL_POSITIONS, _by_san_he("寅", "申", "亥", "巳")),
+    ("桃花", _ZHI_STARS, ALL_POSITIONS, _by_san_he("酉", "卯", "午", "子")),
+    ("劫煞", _ZHI_STARS, ALL_POSITIONS, _by_san_he("巳", "亥", "寅", "申")),
+    ("亡神", _ZHI_STARS, ALL_POSITIONS, _by_san_he("亥", "巳", "申", "寅")),
+    ("灾煞", (ANCHOR_YEAR_ZHI,), ALL_POSITIONS, _by_san_he("午", "子", "卯", "酉")),
+    ("六厄", (ANCHOR_YEAR_ZHI,), ALL_POSITIONS, _by_san_he("卯", "酉", "子", "午")),
+
+    # 年支查地支（方局、偏移）
+    ("孤辰", (ANCHOR_YEAR_ZHI,), ALL_POSITIONS, {"亥子丑": "寅", "寅卯辰": "巳", "巳午未": "申", "申酉戌": "亥"}),
+    ("寡宿", (ANCHOR_YEAR_ZHI,), ALL_POSITIONS, {"亥子丑": "戌", "寅卯辰": "丑", "巳午未": "辰", "申酉戌": "未"}),
+    ("红鸾", (ANCHOR_YEAR_ZHI,), ALL_POSITIONS, _by_offset(3, -1)),
+    ("天喜", (ANCHOR_YEAR_ZHI,), ALL_POSITIONS, _by_offset(9, -1)),
+    ("丧门", (ANCHOR_YEAR_ZHI,), ALL_POSITIONS, _by_offset(2)),
+    ("吊客", (ANCHOR_YEAR_ZHI,), ALL_POSITIONS, _by_offset(-2)),
+    ("披麻", (ANCHOR_YEAR_ZHI,), ALL_POSITIONS, _by_offset(-3)),
+
+    # 月支查天干、地支、日柱
+    ("天德贵人", (ANCHOR_MONTH_ZHI,), ALL_POSITIONS,
+     {"寅": "丁", "卯": "申", "辰": "壬", "巳": "辛", "午": "亥", "未": "甲",
+      "申": "癸", "酉": "寅", "戌": "丙", "亥": "乙", "子": "巳", "丑": "庚"}),
+    ("天德合", (ANCHOR_MONTH_ZHI,), ALL_POSITIONS,
+     {"寅": "壬", "卯": "巳", "辰": "丁", "巳": "丙", "午": "寅", "未": "己",
+      "申": "戊", "酉": "亥", "戌": "辛", "亥": "庚", "子": "申", "丑": "乙"}),
+    ("月德贵人", (ANCHOR_MONTH_ZHI,), ALL_POSITIONS, {"寅午戌": "丙", "申子辰": "壬", "亥卯未": "甲", "巳酉丑": "庚"}),
+    ("月德合", (ANCHOR_MONTH_ZHI,), ALL_POSITIONS, {"寅午戌": "辛", "申子辰": "丁", "亥卯未": "己", "巳酉丑": "乙"}),
+    ("天医", (ANCHOR_MONTH_ZHI,), ALL_POSITIONS, _by_offset(-1)),
+    ("天赦", (ANCHOR_MONTH_ZHI,), (POS_DAY,), {"寅卯辰": "戊寅", "巳午未": "甲午", "申酉戌": "戊申", "亥子丑": "甲子"}),
+
+    # 日柱查其余地支
+    ("空亡", (ANCHOR_DAY_PILLAR,), ALL_POSITIONS, _XUN_KONG),
+
+    # 日柱、时柱自身
+    ("魁罡", (ANCHOR_NONE,), (POS_DAY,), {"": "庚辰 壬辰 戊戌 庚戌"}),
+    ("阴差阳错", (ANCHOR_NONE,), (POS_DAY,), {"": "丙子 丁丑 戊寅 辛卯 壬辰 癸巳 丙午 丁未 戊申 辛酉 壬戌 癸亥"}),
+    ("十恶大败", (ANCHOR_NONE,), (POS_DAY,), {"": "甲辰 乙巳 丙申 丁亥 戊戌 己丑 庚辰 辛巳 壬申 癸亥"}),
+    ("孤鸾煞", (ANCHOR_NONE,), (POS_DAY,), {"": "乙巳 丁巳 辛亥 戊申 甲寅 壬子 丙午 戊午"}),
+    ("八专", (ANCHOR_NONE,), (POS_DAY,), {"": "甲寅 乙卯 丁未 戊戌 己未 庚申 辛酉 癸丑"}),
+    ("九丑", (ANCHOR_NONE,), (POS_DAY,), {"": "丁酉 戊子 戊午 己卯 己酉 辛卯 辛酉 壬子 壬午"}),
+    ("六秀", (ANCHOR_NONE,), (POS_DAY,), {"": "丙午 丁未 戊子 戊午 己丑 己未"}),
+    ("十灵", (ANCHOR_NONE,), (POS_DAY,), {"": "甲辰 乙亥 丙辰 丁酉 戊午 庚戌 庚寅 辛亥 壬寅 癸未"}),
+    ("金神", (ANCHOR_NONE,), (POS_DAY, POS_HOUR), {"": "乙丑 己巳 癸酉"}),
+)
+
+STAR_NAMES: Tuple[str, ...] = tuple(rule[0] for rule in SHENSHA_RULES)
+assert len(STAR_NAMES) <= 64, "星位掩码为 64 位"
+
+
+def _anchor_values(kind: int, key: str) -> List[int]:
+    """查法表键对应的锚点编码"""
+    if kind == _KIND_GAN:
+        return [ganzhi.GAN_INDEX[c] for c in key]
+    if kind == _KIND_ZHI:
+        return [ganzhi.ZHI_INDEX[c] for c in key]
+    if kind == _KIND_PILLAR:
+        return [ganzhi.PILLAR_INDEX[key]]
+    return [0]
+
+
+def _target_pillars(text: str) -> List[Tuple[int, bool]]:
+    """
+    目标展开为 (柱编码, 是否按地支命中)
+    整柱只命中该柱；天干、地支命中所有含该干/支的六十甲子
+    """
+    targets = []
+    for word in text.split():
+        if word in ganzhi.PILLAR_INDEX:
+            targets.append((ganzhi.PILLAR_INDEX[word], False))
+            continue
+        for c in word:
+            if c in ganzhi.GAN_INDEX:
+                targets.extend((p, False) for p in range(60) if p % 10 == ganzhi.GAN_INDEX[c])
+            else:
+                targets.extend((p, True) for p in range(60) if p % 12 == ganzhi.ZHI_INDEX[c])
+    return targets
+
+
+def compile_rules(rules=SHENSHA_RULES) -> np.ndarray:
+    """
+    编译为星位掩码表 [锚点, 柱位, 锚点值, 目标柱]（uint64），锚点值不足 60 的部分空置
+    """
+    table = np.zeros((len(ANCHORS), POSITION_COUNT, 60, 60), dtype=np.uint64)
+    for bit, (_, anchors, positions, mapping) in enumerate(rules):
+        star = np.uint64(1 << bit)
+        for anchor in anchors:
+            anchor_pos, kind = ANCHORS[anchor]
+            for key, text in mapping.items():
+                for value in _anchor_values(kind, key):
+                    for pillar, by_zhi in _target_pillars(text):
+                        for pos in positions:
+                            if by_zhi and kind == _KIND_ZHI and pos == anchor_pos:
+                                continue
+                            table[anchor, pos, value, pillar] |= star
+    return table
+
+
+# 模块加载时编译（约 1 MB）
+STAR_TABLE = compile_rules()
+
+
+def _positions(count: int) -> np.ndarray:
+    """前四柱为年月日时，其余为叠加位"""
+    return np.minimum(np.arange(count), POS_OVERLAY)
+
+
+def star_masks(pillars: np.ndarray) -> np.ndarray:
+    """
+    批量求各柱星位掩码
+    pillars: (N, k) 柱编码数组，前四列为年月日时，之后为大运、流年等叠加柱
+    返回 (N, k) uint64，第 b 位对应 STAR_NAMES[b]
+    """
+    pillars = np.asarray(pillars, dtype=np.int64)
+    gans, zhis = pillars[:, :4] % 10, pillars[:, :4] % 12
+    anchor_values = np.stack([
+        gans[:, POS_DAY], gans[:, POS_YEAR], zhis[:, POS_YEAR], zhis[:, POS_MONTH],
+        zhis[:, POS_DAY], pillars[:, POS_DAY], np.zeros(len(pillars), dtype=np.int64),
+    ], axis=-1)
+    cells = STAR_TABLE[
+        np.arange(len(ANCHORS)),
+        _positions(pillars.shape[1])[:, None],
+        anchor_values[:, None, :],
+        pillars[:, :, None],
+    ]
+    return np.bitwise_or.reduce(cells, axis=-1)
+
+
+def star_names(mask: int) -> List[str]:
+    """掩码转星名（按规则顺序）"""
+    mask = int(mask)
+    return [name for bit, name in enumerate(STAR_NAMES) if mask >> bit & 1]
+
+
+def chart_stars(pillars: Sequence[int]) -> List[List[str]]:
+    """单张命盘各柱的神煞"""
+    return [star_names(mask) for mask in star_masks(np.array([pillars]))[0]]
+
+
+def chart_star_names(pillars: Sequence[int]) -> List[str]:
+    """单张命盘出现的全部神煞（去重，按规则顺序）"""
+    mask = np.bitwise_or.reduce(star_masks(np.array([pillars]))[0])
+    return star_names(mask)
@@ -3,8 +3,8 @@
 基于8Char-Uni-App-master的十神计算逻辑
 """
 
-from typing import Dict, List
 from .data_models import Constants
+from . import ganzhi
 
 class ShishenCalculator:
     """
@@ -12,88 +12,30 @@ class ShishenCalculator:
     """
     
     def __init__(self):
-        self.shi_shen_zhi = Constants.SHI_SHEN_ZHI
-        self.shi_shen_gan = self._generate_shi_shen_gan()
         self.shi_shen_simplifie = Constants.SHI_SHEN_SIMPLIFIE
     
-    def _generate_shi_shen_gan(self) -> Dict[str, str]:
+    def get_relation_code(self, day_gan: int, target: int, is_zhi: bool = False) -> int:
         """
-        生成天干十神映射
-        基于传统命理学十神理论
+        获取十神编码（整数路径）
+        is_zhi 为 True 时 target 为地支编码，取本气十神
         """
-        shi_shen_gan = {}
-        tian_gan = Constants.TIAN_GAN
-        
-        # 五行属性
-        wu_xing = {
-            "甲": "木", "乙": "木", "丙": "火", "丁": "火", "戊": "土",
-            "己": "土", "庚": "金", "辛": "金", "壬": "水", "癸": "水"
-        }
-        
-        # 阴阳属性
-        yin_yang = {
-            "甲": "阳", "乙": "阴", "丙": "阳", "丁": "阴", "戊": "阳",
-            "己": "阴", "庚": "阳", "辛": "阴", "壬": "阳", "癸": "阴"
-        }
-        
-        # 五行生克关系
-        sheng = {"木": "火", "火": "土", "土": "金", "金": "水", "水": "木"}
-        ke = {"木": "土", "火": "金", "土": "水", "金": "木", "水": "火"}
-        
-        for day_gan in tian_gan:
-            day_wu_xing = wu_xing[day_gan]
-            day_yin_yang = yin_yang[day_gan]
-            
-            for gan in tian_gan:
-                key = day_gan + gan
-                gan_wu_xing = wu_xing[gan]
-                gan_yin_yang = yin_yang[gan]
-                
-                if day_gan == gan:
-                    shi_shen_gan[key] = "比肩"
-                elif day_wu_xing == gan_wu_xing:
-                    # 同五行，阴阳不同
-                    if day_yin_yang != gan_yin_yang:
-                        shi_shen_gan[key] = "劫财"
-                    else:
-                        shi_shen_gan[key] = "比肩"
-                elif sheng[day_wu_xing] == gan_wu_xing:
-                    # 日干生目标干
-                    if day_yin_yang == gan_yin_yang:
-                        shi_shen_gan[key] = "食神"
-                    else:
-                        shi_shen_gan[key] = "伤官"
-                elif sheng[gan_wu_xing] == day_wu_xing:
-                    # 目标干生日干
-                    if day_yin_yang == gan_yin_yang:
-                        shi_shen_gan[key] = "正印"
-                    else:
-                        shi_shen_gan[key] = "偏印"
-                elif ke[day_wu_xing] == gan_wu_xing:
-                    # 日干克目标干
-                    if day_yin_yang == gan_yin_yang:
-                        shi_shen_gan[key] = "偏财"
-                    else:
-                        shi_shen_gan[key] = "正财"
-                elif ke[gan_wu_xing] == day_wu_xing:
-                    # 目标干克日干
-                    if day_yin_yang == gan_yin_yang:
-                        shi_shen_gan[key] = "七杀"
-                    else:
-                        shi_shen_gan[key] = "正官"
-                else:
-                    shi_shen_gan[key] = "未知"
-        
-        return shi_shen_gan
+        if is_zhi:
+            return ganzhi.ZHI_SHI_SHEN[day_gan * 12 + target]
+        return ganzhi.GAN_SHI_SHEN[day_gan * 10 + target]
     
     def get_relation(self, day_gan: str, target: str) -> str:
         """获取十神关系"""
-        if target in Constants.TIAN_GAN:
+        day_idx = ganzhi.GAN_INDEX.get(day_gan)
+        if day_idx is None:
+            return ""
+        gan_idx = ganzhi.GAN_INDEX.get(target)
+        if gan_idx is not None:
             # 天干
-            return self.shi_shen_gan.get(day_gan + target, "")
-        elif target in Constants.DI_ZHI:
+            return ganzhi.SHI_SHEN_NAMES[ganzhi.GAN_SHI_SHEN[day_idx * 10 + gan_idx]]
+        zhi_idx = ganzhi.ZHI_INDEX.get(target)
+        if zhi_idx is not None:
             # 地支
-            return self.shi_shen_zhi.get(day_gan + target, "")
+            return ganzhi.SHI_SHEN_NAMES[ganzhi.ZHI_SHI_SHEN[day_idx * 12 + zhi_idx]]
         return ""
     
     def get_relation_by_pillar(self, day_gan: str, pillar: str) -> str:
@@ -101,17 +43,26 @@ class ShishenCalculator:
         if pillar == "童限":
             return "童限"
         
+        day_idx = ganzhi.GAN_INDEX.get(day_gan)
+        pillar_idx = ganzhi.PILLAR_INDEX.get(pillar)
+        if day_idx is not None and pillar_idx is not None:
+            return ganzhi.pillar_shi_shen_short(day_idx, pillar_idx)
+
         if len(pillar) >= 2:
             top_relation = self.get_relation(day_gan, pillar[0])
             bottom_relation = self.get_relation(day_gan, pillar[1])
-            
+
             top_simple = self.shi_shen_simplifie.get(top_relation, "")
             bottom_simple = self.shi_shen_simplifie.get(bottom_relation, "")
-            
+
             return top_simple + bottom_simple
-        
+
         return ""
+
+    def get_relation_by_pillar_code(self, day_gan: int, pillar: int) -> str:
+        """根据柱编码获取简化十神（整数路径）"""
+        return ganzhi.pillar_shi_shen_short(day_gan, pillar)
     
     def get_simplified_relation(self, relation: str) -> str:
         """获取简化的十神名称"""
-        return self.shi_shen_simplifie.get(relation, relation)
\ No newline at end of file
+        return self.shi_shen_simplifie.get(relation, relation)
@@ -0,0 +1,68 @@
+"""
+相同请求合并（single-flight）
+同一规范键的请求在计算进行中再次到达时不重复计算，等待并共用进行中的那一次结果
+"""
+
+from threading import Event, Lock
+from typing import Any, Callable, Dict, Hashable
+
+
+class _Call:
+    """一次进行中的计算"""
+
+    def __init__(self):
+        self.done = Event()
+        self.result: Any = None
+        self.error: BaseException = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    线程安全的请求合并器（同步接口在线程池中执行）
+    结果在多个请求间共享，调用方不得修改
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.executed = 0   # 实际计算次数
+        self.shared = 0     # 搭便车、省掉的计算次数
+
+    def do(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """执行或等待同键计算，计算抛出的异常同样传给所有等待者"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executed += 1
+            else:
+                call.waiters += 1
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = compute()
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.executed + self.shared
+        return {
+            "executed": self.executed,
+            "saved": self.shared,
+            "inFlight": len(self._calls),
+            "savedRate": self.shared / total if total else 0.0,
+        }
@@ -0,0 +1,316 @@
+"""
+向量化太阳视黄经与节气计算
+截断 VSOP87（Meeus 简表）地球日心黄经 + 章动 + 光行差，
+对整批年份一次求出 24 节气交节时刻，用于节气表范围（1899-2101）之外的日期：
+排盘分段表、节气表未覆盖的出生时刻按推算节气表排盘、起运，不再逐条调用 lunar_python
+"""
+
+from datetime import datetime
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .pillar_engine import PillarEngine
+
+# 按推算节气排盘的年份范围（首次用到时整段一次算出）
+EXTENDED_FIRST_YEAR = 1600
+EXTENDED_LAST_YEAR = 2400
+
+# VSOP87 地球日心黄经 L0-L5：(A, B, C)，单位 1e-8 弧度，A*cos(B + C*tau)
+_L0 = np.array([
+    (175347046, 0, 0), (3341656, 4.6692568, 6283.07585), (34894, 4.6261, 12566.1517),
+    (3497, 2.7441, 5753.3849), (3418, 2.8289, 3.5231), (3136, 3.6277, 77713.7715),
+    (2676, 4.4181, 7860.4194), (2343, 6.1352, 3930.2097), (1324, 0.7425, 11506.7698),
+    (1273, 2.0371, 529.691), (1199, 1.1096, 1577.3435), (990, 5.233, 5884.927),
+    (902, 2.045, 26.298), (857, 3.508, 398.149), (780, 1.179, 5223.694),
+    (753, 2.533, 5507.553), (505, 4.583, 18849.228), (492, 4.205, 775.523),
+    (357, 2.92, 0.067), (317, 5.849, 11790.629), (284, 1.899, 796.298),
+    (271, 0.315, 10977.079), (243, 0.345, 5486.778), (206, 4.806, 2544.314),
+    (205, 1.869, 5573.143), (202, 2.458, 6069.777), (156, 0.833, 213.299),
+    (132, 3.411, 2942.463), (126, 1.083, 20.775), (115, 0.645, 0.98),
+    (103, 0.636, 4694.003), (102, 0.976, 15720.839), (102, 4.267, 7.114),
+    (99, 6.21, 2146.17), (98, 0.68, 155.42), (86, 5.98, 161000.69),
+    (85, 1.3, 6275.96), (85, 3.67, 71430.7), (80, 1.81, 17260.15),
+    (79, 3.04, 12036.46), (75, 1.76, 5088.63), (74, 3.5, 3154.69),
+    (74, 4.68, 801.82), (70, 0.83, 9437.76), (62, 3.98, 8827.39),
+    (61, 1.82, 7084.9), (57, 2.78, 6286.6), (56, 4.39, 14143.5),
+    (56, 3.47, 6279.55), (52, 0.19, 12139.55), (52, 1.33, 1748.02),
+    (51, 0.28, 5856.48), (49, 0.49, 1194.45), (41, 5.37, 8429.24),
+    (41, 2.4, 19651.05), (39, 6.17, 10447.39), (37, 6.04, 10213.29),
+    (37, 2.57, 1059.38), (36, 1.71, 2352.87), (36, 1.78, 6812.77),
+    (33, 0.59, 17789.85), (30, 0.44, 83996.85), (30, 2.74, 1349.87),
+    (25, 3.16, 4690.48),
+])
+_L1 = np.array([
+    (628331966747, 0, 0), (206059, 2.678235, 6283.07585), (4303, 2.6351, 12566.1517),
+    (425, 1.59, 3.523), (119, 5.796, 26.298), (109, 2.966, 1577.344),
+    (93, 2.59, 18849.23), (72, 1.14, 529.69), (68, 1.87, 398.15),
+    (67, 4.41, 5507.55), (59, 2.89, 5223.69), (56, 2.17, 155.42),
+    (45, 0.4, 796.3), (36, 0.47, 775.52), (29, 2.65, 7.11),
+    (21, 5.34, 0.98), (19, 1.85, 5486.78), (19, 4.97, 213.3),
+    (17, 2.99, 6275.96), (16, 0.03, 2544.31), (16, 1.43, 2146.17),
+    (15, 1.21, 10977.08), (12, 2.83, 1748.02), (12, 3.26, 5088.63),
+    (12, 5.27, 1194.45), (12, 2.08, 4694.0), (11, 0.77, 553.57),
+    (10, 1.3, 6286.6), (10, 4.24, 1349.87), (9, 2.7, 242.73),
+    (9, 5.64, 951.72), (8, 5.3, 2352.87), (6, 2.65, 9437.76),
+    (6, 4.67, 4690.48),
+])
+_L2 = np.array([
+    (52919, 0, 0), (8720, 1.0721, 6283.0758), (309, 0.867, 12566.152),
+    (27, 0.05, 3.52), (16, 5.19, 26.3), (16, 3.68, 155.42),
+    (10, 0.76, 18849.23), (9, 2.06, 77713.77), (7, 0.83, 775.52),
+    (5, 4.66, 1577.34), (4, 1.03, 7.11), (4, 3.44, 5573.14),
+    (3, 5.14, 796.3), (3, 6.05, 5507.55), (3, 1.19, 242.73),
+    (3, 6.12, 529.69), (3, 0.31, 398.15), (3, 2.28, 553.57),
+    (2, 4.38, 5223.69), (2, 3.75, 0.98),
+])
+_L3 = np.array([
+    (289, 5.844, 6283.076), (35, 0, 0), (17, 5.49, 12566.15),
+    (3, 5.2, 155.42), (1, 4.72, 3.52), (1, 5.3, 18849.23),
+    (1, 5.97, 242.73),
+])
+_L4 = np.array([(114, 3.142, 0), (8, 4.13, 6283.08), (1, 3.84, 12566.15)])
+_L5 = np.array([(1, 3.14, 0)])
+_L_SERIES = (_L0, _L1, _L2, _L3, _L4, _L5)
+
+# 日地距离 R0-R4，单位 1e-8 AU（仅用于光行差，取主项）
+_R0 = np.array([
+    (100013989, 0, 0), (1670700, 3.0984635, 6283.07585), (13956, 3.05525, 12566.1517),
+    (3084, 5.1985, 77713.7715), (1628, 1.1739, 5753.3849), (1576, 2.8469, 7860.4194),
+])
+_R1 = np.array([(103019, 1.10749, 6283.07585), (1721, 1.0644, 12566.1517), (702, 3.142, 0)])
+_R2 = np.array([(4359, 5.7846, 6283.0758), (124, 5.579, 12566.152)])
+_R_SERIES = (_R0, _R1, _R2)
+
+J2000 = 2451545.0
+
+# 1970-01-01 00:00（北京时间）对应的儒略日
+_JD_EPOCH = 2440587.5
+
+_SECONDS_PER_DEGREE = 3600.0
+
+
+def _compile(series) -> tuple:
+    """
+    把各级周期项拼成一张表：相位 (B, C) 与按幂次分列的振幅矩阵，
+    求值时一次 cos 加一次矩阵乘即可
+    """
+    terms = np.concatenate(series)
+    weights = np.zeros((len(terms), len(series)))
+    row = 0
+    for power, part in enumerate(series):
+        weights[row:row + len(part), power] = part[:, 0] * 1e-8
+        row += len(part)
+    return terms[:, 1], terms[:, 2], weights
+
+
+_L_TABLE = _compile(_L_SERIES)
+_R_TABLE = _compile(_R_SERIES)
+
+
+def _series(table, tau: np.ndarray) -> np.ndarray:
+    """按 tau 的幂次累加各级周期项"""
+    phase, frequency, weights = table
+    by_power = np.cos(phase + frequency * tau[..., None]) @ weights
+    total = by_power[..., -1]
+    for power in range(weights.shape[1] - 2, -1, -1):
+        total = total * tau + by_power[..., power]
+    return total
+
+
+def delta_t(year: np.ndarray) -> np.ndarray:
+    """
+    力学时与世界时之差 ΔT（秒）
+    Espenak & Meeus 分段多项式，year 可为小数年
+    """
+    y = np.asarray(year, dtype=np.float64)
+    u = (y - 1820) / 100
+    result = -20 + 32 * u ** 2
+
+    def piece(mask, values):
+        np.copyto(result, values, where=mask)
+
+    t = y / 100
+    piece((y >= -500) & (y < 500),
+          10583.6 - 1014.41 * t + 33.78311 * t ** 2 - 5.952053 * t ** 3
+          - 0.1798452 * t ** 4 + 0.022174192 * t ** 5 + 0.0090316521 * t ** 6)
+    t = (y - 1000) / 100
+    piece((y >= 500) & (y < 1600),
+          1574.2 - 556.01 * t + 71.23472 * t ** 2 + 0.319781 * t ** 3
+          - 0.8503463 * t ** 4 - 0.005050998 * t ** 5 + 0.0083572073 * t ** 6)
+    t = y - 1600
+    piece((y >= 1600) & (y < 1700), 120 - 0.9808 * t - 0.01532 * t ** 2 + t ** 3 / 7129)
+    t = y - 1700
+    piece((y >= 1700) & (y < 1800),
+          8.83 + 0.1603 * t - 0.0059285 * t ** 2 + 0.00013336 * t ** 3 - t ** 4 / 1174000)
+    t = y - 1800
+    piece((y >= 1800) & (y < 1860),
+          13.72 - 0.332447 * t + 0.0068612 * t ** 2 + 0.0041116 * t ** 3 - 0.00037436 * t ** 4
+          + 0.0000121272 * t ** 5 - 0.0000001699 * t ** 6 + 0.000000000875 * t ** 7)
+    t = y - 1860
+    piece((y >= 1860) & (y < 1900),
+          7.62 + 0.5737 * t - 0.251754 * t ** 2 + 0.01680668 * t ** 3
+          - 0.0004473624 * t ** 4 + t ** 5 / 233174)
+    t = y - 1900
+    piece((y >= 1900) & (y < 1920),
+          -2.79 + 1.494119 * t - 0.0598939 * t ** 2 + 0.0061966 * t ** 3 - 0.000197 * t ** 4)
+    t = y - 1920
+    piece((y >= 1920) & (y < 1941), 21.20 + 0.84493 * t - 0.076100 * t ** 2 + 0.0020936 * t ** 3)
+    t = y - 1950
+    piece((y >= 1941) & (y < 1961), 29.07 + 0.407 * t - t ** 2 / 233 + t ** 3 / 2547)
+    t = y - 1975
+    piece((y >= 1961) & (y < 1986), 45.45 + 1.067 * t - t ** 2 / 260 - t ** 3 / 718)
+    t = y - 2000
+    piece((y >= 1986) & (y < 2005),
+          63.86 + 0.3345 * t - 0.060374 * t ** 2 + 0.0017275 * t ** 3
+          + 0.000651814 * t ** 4 + 0.00002373599 * t ** 5)
+    piece((y >= 2005) & (y < 2050), 62.92 + 0.32217 * t + 0.005589 * t ** 2)
+    piece((y >= 2050) & (y < 2150), -20 + 32 * u ** 2 - 0.5628 * (2150 - y))
+    return result
+
+
+def apparent_solar_longitude(jd_tt: np.ndarray) -> np.ndarray:
+    """太阳视黄经（度），输入为力学时儒略日"""
+    jd_tt = np.asarray(jd_tt, dtype=np.float64)
+    tau = (jd_tt - J2000) / 365250
+    t = tau * 10
+
+    # 地心几何黄经（转 FK5，黄纬极小，只取常数项）
+    lon = np.degrees(_series(_L_TABLE, tau)) + 180
+    lon = lon - 0.09033 / _SECONDS_PER_DEGREE
+
+    # 章动（主项）
+    omega = np.radians(125.04452 - 1934.136261 * t)
+    sun_mean = np.radians(280.4665 + 36000.7698 * t)
+    moon_mean = np.radians(218.3165 + 481267.8813 * t)
+    nutation = (-17.20 * np.sin(omega) - 1.32 * np.sin(2 * sun_mean)
+                - 0.23 * np.sin(2 * moon_mean) + 0.21 * np.sin(2 * omega))
+
+    # 光行差
+    radius = _series(_R_TABLE, tau)
+    aberration = -20.4898 / radius
+
+    return (lon + (nutation + aberration) / _SECONDS_PER_DEGREE) % 360
+
+
+def _low_precision_longitude(jd_tt: np.ndarray):
+    """低精度太阳视黄经（约 0.01 度）及日行速度，用于迭代初值"""
+    t = (jd_tt - J2000) / 36525
+    mean_lon = 280.46646 + 36000.76983 * t
+    anomaly = np.radians(357.52911 + 35999.05029 * t)
+    center = (1.914602 * np.sin(anomaly) + 0.019993 * np.sin(2 * anomaly)
+              + 0.000289 * np.sin(3 * anomaly))
+    omega = np.radians(125.04 - 1934.136 * t)
+    lon = (mean_lon + center - 0.00569 - 0.00478 * np.sin(omega)) % 360
+    speed = 0.9856474 * (1 + 0.0334 * np.cos(anomaly))
+    return lon, speed
+
+
+def _angle_diff(target: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    """目标黄经与当前黄经之差，归入 [-180, 180)"""
+    return (target - lon + 180) % 360 - 180
+
+
+def compute_term_jd(years) -> np.ndarray:
+    """
+    计算各年 24 节气交节时刻（北京时间儒略日）
+    返回形状 (len(years), 24)，每年自小寒起；年份按公历（格里历外推）
+    """
+    years = np.atleast_1d(np.asarray(years, dtype=np.int64))
+    targets = (285 + 15 * np.arange(24)) % 360
+
+    # 初值：公历 1 月 1 日起按平均角速度推算
+    jan1 = np.asarray(years - 1970, dtype="datetime64[Y]").astype("datetime64[D]").astype(np.int64)
+    jd_tt = (jan1 + _JD_EPOCH)[:, None] + 5.0 + np.arange(24) * (365.2422 / 24)
+
+    # 低精度公式迭代到分钟级，再用 VSOP87 截断级数修正两次
+    for _ in range(3):
+        lon, speed = _low_precision_longitude(jd_tt)
+        jd_tt = jd_tt + _angle_diff(targets, lon) / speed
+    for _ in range(2):
+        _, speed = _low_precision_longitude(jd_tt)
+        jd_tt = jd_tt + _angle_diff(targets, apparent_solar_longitude(jd_tt)) / speed
+
+    fraction_year = years[:, None] + np.arange(24) / 24
+    return jd_tt - delta_t(fraction_year) / 86400 + 8 / 24
+
+
+def compute_term_seconds(years) -> np.ndarray:
+    """计算各年 24 节气交节时刻（秒偏移）"""
+    return np.round((compute_term_jd(years) - _JD_EPOCH) * 86400).astype(np.int64)
+
+
+def compute_term_minutes(years) -> np.ndarray:
+    """
+    计算各年 24 节气交节时刻（分钟偏移）
+    与节气表口径一致：取到秒后向上取整到分钟
+    """
+    return -((-compute_term_seconds(years)) // 60)
+
+
+class TermTable(NamedTuple):
+    """
+    推算的节气表：自 first_year 小寒起每年 24 个交节时刻
+    minutes 供四柱引擎，seconds 供起运（可代替 JieqiTable 传给 LuckCycle）
+    """
+    first_year: int
+    minutes: np.ndarray
+    seconds: List[int]
+
+
+def terms_for_years(first_year: int, last_year: int) -> TermTable:
+    """为任意年份范围推算节气表（前后各多算一年）"""
+    seconds = compute_term_seconds(np.arange(first_year - 1, last_year + 2)).ravel()
+    return TermTable(first_year - 1, -((-seconds) // 60), seconds.tolist())
+
+
+def engine_for_years(first_year: int, last_year: int) -> PillarEngine:
+    """
+    为任意年份范围构建四柱引擎（前后各多算一年节气）
+    """
+    terms = terms_for_years(first_year, last_year)
+    return PillarEngine(terms.minutes, terms.first_year)
+
+
+_extended: Optional[Tuple[TermTable, PillarEngine]] = None
+
+
+def _get_extended() -> Tuple[TermTable, PillarEngine]:
+    global _extended
+    if _extended is None:
+        terms = terms_for_years(EXTENDED_FIRST_YEAR, EXTENDED_LAST_YEAR)
+        _extended = terms, PillarEngine(terms.minutes, terms.first_year)
+    return _extended
+
+
+def get_extended_terms() -> TermTable:
+    """获取进程内共享的推算节气表（EXTENDED_FIRST_YEAR-EXTENDED_LAST_YEAR）"""
+    return _get_extended()[0]
+
+
+def get_extended_engine() -> PillarEngine:
+    """获取基于推算节气表的进程内共享四柱引擎"""
+    return _get_extended()[1]
+
+
+def lookup_many(dts: Sequence[datetime], sects: Sequence[int]) -> List[Optional[Tuple[int, int, int, int]]]:
+    """
+    按推算节气批量排盘（一次向量化计算），返回四柱编码
+    超出 EXTENDED_FIRST_YEAR-EXTENDED_LAST_YEAR 的条目为 None
+    """
+    result: List[Optional[Tuple[int, int, int, int]]] = [None] * len(dts)
+    inside = [i for i, dt in enumerate(dts) if EXTENDED_FIRST_YEAR <= dt.year <= EXTENDED_LAST_YEAR]
+    if inside:
+        pillars = get_extended_engine().compute(
+            np.array([dts[i] for i in inside], dtype="datetime64[m]"), np.array([sects[i] for i in inside])
+        )
+        rows = np.stack([pillars["year"], pillars["month"], pillars["day"], pillars["time"]], axis=1).tolist()
+        for i, row in zip(inside, rows):
+            result[i] = tuple(row)
+    return result
+
+
+def lookup(dt: datetime, sect: int = 1) -> Optional[Tuple[int, int, int, int]]:
+    """按推算节气排盘，超出推算范围返回 None"""
+    return lookup_many([dt], [sect])[0]
+
@@ -0,0 +1,68 @@
+"""
+真太阳时
+时差（EoT）按年内日序预先制表（1..367 日），查询时按一天内的时刻线性插值；
+真太阳时 = 北京时间 + 经度差（每度 4 分钟，东经 120 度为 0）+ 时差，
+单个时刻与整批（秒偏移数组, 经度数组）都只做查表与加法，可对每个请求、每行批量数据开启
+"""
+
+import math
+from datetime import datetime, timedelta
+from typing import Optional
+
+import numpy as np
+
+from .jieqi_table import from_seconds
+
+# 北京时间的标准经线
+STANDARD_LONGITUDE = 120.0
+
+# 每个年内日序（1..367）的时差（分钟），367 日用于年末插值
+EOT_DAYS = np.arange(1, 368, dtype=np.float64)
+
+
+def _eot_formula(day: float) -> float:
+    b = math.radians((day - 81) * 360 / 365.242)
+    return 9.87 * math.sin(2 * b) - 7.53 * math.cos(b) - 1.5 * math.sin(b)
+
+
+EOT_TABLE = np.array([_eot_formula(day) for day in EOT_DAYS])
+_EOT_LIST = EOT_TABLE.tolist()
+
+
+def eot_minutes(day: float) -> float:
+    """年内日序（1 起，小数部分为一天内的时刻）的时差（分钟）"""
+    index = min(max(int(day), 1), 366)
+    low = _EOT_LIST[index - 1]
+    return low + (_EOT_LIST[index] - low) * (day - index)
+
+
+def day_of_year(dt: datetime) -> float:
+    """年内日序（含一天内的时刻）"""
+    return dt.timetuple().tm_yday + (dt.hour * 3600 + dt.minute * 60 + dt.second) / 86400
+
+
+def correction_minutes(dt: datetime, longitude: float) -> float:
+    """真太阳时相对北京时间的修正（分钟）"""
+    return (longitude - STANDARD_LONGITUDE) * 4 + eot_minutes(day_of_year(dt))
+
+
+def true_solar_time(dt: datetime, longitude: Optional[float]) -> datetime:
+    """北京时间转真太阳时（精确到秒），经度为 None 时只做时差修正"""
+    if longitude is None:
+        longitude = STANDARD_LONGITUDE
+    return dt + timedelta(seconds=round(correction_minutes(dt, longitude) * 60))
+
+
+def true_solar_seconds(seconds: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+    """
+    批量真太阳时：seconds 为北京时间相对 1970-01-01 的秒偏移（同 jieqi_table.to_seconds），
+    返回校正后的秒偏移数组
+    """
+    seconds = np.asarray(seconds, dtype=np.int64)
+    days = seconds // 86400
+    dates = days.astype("datetime64[D]")
+    year_start = dates.astype("datetime64[Y]").astype("datetime64[D]")
+    day = (dates - year_start).astype(np.int64) + 1 + (seconds - days * 86400) / 86400
+    minutes = (np.asarray(longitudes, dtype=np.float64) - STANDARD_LONGITUDE) * 4 + np.interp(day, EOT_DAYS, EOT_TABLE)
+    return seconds + np.round(minutes * 60).astype(np.int64)
+
@@ -0,0 +1,99 @@
+"""
+测试准入控制
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+
+from . import main
+from .admission import AdmissionController, ClassLimits, Overloaded, parse_limits
+
+def test_classes_are_isolated():
+    """批量类占满时交互类照常放行；排队满立即拒绝"""
+    controller = AdmissionController({"interactive": ClassLimits(1, 1, 1000), "batch": ClassLimits(1, 1, 1000)})
+    release = threading.Event()
+
+    def hold(name):
+        with controller.admit(name):
+            release.wait(5)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        running = pool.submit(hold, "batch")
+        queued = pool.submit(hold, "batch")
+        time.sleep(0.1)
+        with pytest.raises(Overloaded) as error:
+            controller.acquire("batch")
+        assert error.value.retry_after >= 1
+        with controller.admit("interactive"):
+            pass
+        release.set()
+        running.result()
+        queued.result()
+    stats = controller.stats()
+    assert stats["batch"]["admitted"] == 2 and stats["batch"]["shedQueueFull"] == 1
+    assert stats["interactive"]["admitted"] == 1 and stats["batch"]["running"] == 0
+
+def test_queue_budget_and_deadline_order():
+    """排队超过预算被拒绝；放行时截止时间早的先行"""
+    controller = AdmissionController({"prediction": ClassLimits(1, 3, 2000)})
+    controller.acquire("prediction")
+    with pytest.raises(Overloaded):
+        controller.acquire("prediction", budget_ms=50)
+
+    order = []
+
+    def wait(tag, budget):
+        controller.acquire("prediction", budget_ms=budget)
+        order.append(tag)
+        controller.release("prediction", 0.001)
+
+    threads = [threading.Thread(target=wait, args=("late", 1500)), threading.Thread(target=wait, args=("early", 1000))]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.05)
+    controller.release("prediction", 0.01)
+    for thread in threads:
+        thread.join()
+    assert order == ["early", "late"]
+    stats = controller.stats()["prediction"]
+    assert stats["shedTimeout"] == 1 and stats["queued"] == 0 and stats["running"] == 0
+
+def test_overloaded_response():
+    """拒绝转为 503 并带 Retry-After；限额可由环境变量配置"""
+    error = main.http_error(Overloaded("服务繁忙", 3))
+    assert error.status_code == 503 and error.headers == {"Retry-After": "3"}
+    assert parse_limits("batch=1/0/100")["batch"] == ClassLimits(1, 0, 100)
+    assert "interactive" in main.get_stats()["data"]["admission"]
+
+def test_expired_waiter_leaves_queue_on_release(monkeypatch):
+    """放行时淘汰的过期等待者立即移出排队计数，新请求走快速通道；等待者醒来不重复计数"""
+    from . import admission
+    controller = AdmissionController({"batch": ClassLimits(1, 1, 5000)})
+    controller.acquire("batch")
+    errors = []
+
+    def wait():
+        try:
+            controller.acquire("batch")
+        except Overloaded as error:
+            errors.append(error)
+
+    thread = threading.Thread(target=wait)
+    thread.start()
+    while controller.stats()["batch"]["queued"] != 1:
+        time.sleep(0.01)
+    # 放行时等待者已过截止时间，但其线程尚未醒来
+    monotonic = time.monotonic
+    monkeypatch.setattr(admission, "time", SimpleNamespace(monotonic=lambda: monotonic() + 10))
+    controller.release("batch", 0.01)
+    stats = controller.stats()["batch"]
+    assert stats["queued"] == 0 and stats["running"] == 0 and stats["shedTimeout"] == 1
+    controller.acquire("batch", budget_ms=0)
+    thread.join()
+    assert len(errors) == 1
+    stats = controller.stats()["batch"]
+    assert stats["queued"] == 0 and stats["running"] == 1 and stats["shedTimeout"] == 1
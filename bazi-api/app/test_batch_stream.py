@@ -0,0 +1,112 @@
+"""
+测试批量排盘流式接口
+"""
+
+import asyncio
+import io
+import json
+import time
+from datetime import datetime
+
+import pytest
+
+from . import main
+from .batch_stream import CHUNK_ENV, MAX_ITEM_CHARS, BadItem, iter_json_array, parse_batch_body
+from .bazi_calculator_new import BaziCalculator
+
+def call_app(path, body, content_type="application/json", disconnect=False):
+    """直接以 ASGI 调用应用，返回（状态码, 响应体）；disconnect 为真时客户端收到第一段结果后断开"""
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    sent = []
+    first_body = None
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        if disconnect:
+            await first_body.wait()
+            return {"type": "http.disconnect"}
+        await asyncio.sleep(3600)
+
+    async def send(message):
+        sent.append(message)
+        if message["type"] == "http.response.body" and message.get("body"):
+            first_body.set()
+
+    async def run():
+        nonlocal first_body
+        first_body = asyncio.Event()
+        await main.app(scope, receive, send)
+
+    scope = {"type": "http", "method": "POST", "path": path, "raw_path": path.encode(), "query_string": b"",
+             "headers": [(b"content-type", content_type.encode())], "http_version": "1.1",
+             "scheme": "http", "server": ("test", 80), "client": ("test", 1), "root_path": ""}
+    asyncio.run(run())
+    status = next(message["status"] for message in sent if message["type"] == "http.response.start")
+    return status, b"".join(message.get("body", b"") for message in sent if message["type"] == "http.response.body")
+
+def test_parse_batch_body():
+    """JSON 数组整体解析，NDJSON 坏行按条报错"""
+    assert parse_batch_body(b' [{"a": 1}, {"a": 2}]') == [{"a": 1}, {"a": 2}]
+    items = parse_batch_body(b'{"a": 1}\n\nnot json\n{"a": 3}', "application/x-ndjson")
+    assert items[0] == {"a": 1} and isinstance(items[1], BadItem) and items[2] == {"a": 3}
+
+def test_iter_json_array():
+    """按小块流式解析 JSON 数组，块边界截断数字、字符串时结果不变；格式错误抛出 ValueError"""
+    items = [{"datetime": "1990-05-15 14:30:00", "realname": "张三, ]"}, 12345, [1, [2]], "x", None, 1.5e3, {}]
+    text = " \n" + json.dumps(items, ensure_ascii=False) + "\n"
+    for block_size in (1, 2, 3, 7, 4096):
+        assert list(iter_json_array(io.StringIO(text), block_size)) == items
+    assert list(iter_json_array(io.StringIO(" [ ] "), 1)) == []
+    for bad in ('{"a": 1}', "[1, 2", "[1 2]", "[1,]", "[1] 2", ""):
+        with pytest.raises(ValueError):
+            list(iter_json_array(io.StringIO(bad), 2))
+    with pytest.raises(ValueError, match="单条超过"):
+        next(iter_json_array(io.StringIO('[{"a": "' + "x" * (MAX_ITEM_CHARS + 10))))
+
+def test_info_batch_stream():
+    """批量结果与单条一致，出错条目单独报告，其余照常返回"""
+    body = "\n".join(json.dumps(item, ensure_ascii=False) for item in [
+        {"datetime": "1990-05-15 14:30:00", "realname": "张三"},
+        {"datetime": "not a date"},
+        {"datetime": "2000-02-04 20:40:00", "gender": 2, "sect": 2},
+    ]).encode() + b"\n{bad"
+    status, content = call_app("/8char/get-info/batch", body, "application/x-ndjson")
+    assert status == 200
+    lines = [json.loads(line) for line in content.splitlines()]
+    assert [line["index"] for line in lines] == [0, 1, 2, 3]
+    calc = BaziCalculator()
+    assert lines[0]["data"] == calc.calculate_bazi_info(datetime(1990, 5, 15, 14, 30), 1, 1, "张三")
+    assert lines[2]["data"] == calc.calculate_bazi_info(datetime(2000, 2, 4, 20, 40), 2, 2, "")
+    assert "error" in lines[1] and "error" in lines[3]
+    assert main.admission.stats()["batch"]["running"] == 0
+
+def test_prediction_batch_stream():
+    """JSON 数组请求；请求体不合法时返回 400"""
+    items = [{"datetime": f"19{year}-03-01 08:00:00"} for year in range(50, 90)]
+    status, content = call_app("/8char/get-prediction/batch", json.dumps(items).encode())
+    lines = [json.loads(line) for line in content.splitlines()]
+    assert status == 200 and len(lines) == 40
+    assert lines[5]["data"] == BaziCalculator().calculate_bazi_prediction(datetime(1955, 3, 1, 8), 1, 1)
+
+    status, _ = call_app("/8char/get-prediction/batch", b'[{"datetime": ')
+    assert status == 400
+
+def test_disconnect_stops_stream(monkeypatch):
+    """客户端中途断开后剩余段不再计算，批量名额归还"""
+    monkeypatch.setenv(CHUNK_ENV, "1")
+    starts = []
+    info_batch_chunk = main.info_batch_chunk
+
+    def counting(start, items):
+        starts.append(start)
+        time.sleep(0.05)
+        return info_batch_chunk(start, items)
+
+    monkeypatch.setattr(main, "info_batch_chunk", counting)
+    items = [{"datetime": f"19{year}-06-01 12:00:00"} for year in range(60, 80)]
+    status, content = call_app("/8char/get-info/batch", json.dumps(items).encode(), disconnect=True)
+    assert status == 200 and 1 <= len(content.splitlines()) < len(items)
+    # 最多再算完断开时正在线程池中的一段
+    assert len(starts) <= 2
+    assert main.admission.stats()["batch"]["running"] == 0
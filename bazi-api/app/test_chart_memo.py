@@ -0,0 +1,92 @@
+"""
+测试排盘记忆表
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from . import ganzhi
+from .bazi_calculator_new import BaziCalculator
+from .chart_memo import ChartMemo, chart_key
+
+def test_lru_and_counters():
+    """LRU 淘汰与命中统计"""
+    memo = ChartMemo(maxsize=2)
+    memo.put("a", 1)
+    memo.put("b", 2)
+    assert memo.get("a") == 1      # a 成为最近使用
+    memo.put("c", 3)               # 淘汰 b
+    assert memo.get("b") is None
+    assert memo.get_or_compute("c", lambda: 0) == 3
+    assert memo.get_or_compute(None, lambda: 4) == 4
+    assert memo.stats() == {
+        "hits": 2, "misses": 1, "size": 2, "maxsize": 2, "bytes": 0, "maxBytes": None, "hitRate": 2 / 3
+    }
+
+def test_memory_cap():
+    """按估算内存淘汰"""
+    memo = ChartMemo(max_bytes=2000)
+    for i in range(100):
+        memo.put(i, ("x" * 100,) * 3)
+    assert 0 < memo.bytes <= 2000
+    assert len(memo) < 10 and memo.get(99) is not None and memo.get(0) is None
+
+def test_chart_key():
+    """同一时辰同键；跨时辰、跨中气、跨流派、超出范围不同"""
+    assert chart_key(datetime(2023, 5, 15, 9, 1), 1) == chart_key(datetime(2023, 5, 15, 10, 59), 1)
+    assert chart_key(datetime(2023, 5, 15, 10, 59), 1) != chart_key(datetime(2023, 5, 15, 11, 0), 1)
+    assert chart_key(datetime(2023, 5, 15, 10, 0), 1) != chart_key(datetime(2023, 5, 15, 10, 0), 2)
+    # 2023 小满 5 月 21 日 15:09
+    assert chart_key(datetime(2023, 5, 21, 15, 8), 1) != chart_key(datetime(2023, 5, 21, 15, 10), 1)
+    assert chart_key(datetime(1800, 1, 1), 1) is None
+
+def test_memo_matches_fresh():
+    """命中记忆表的结果与重新计算一致，时间戳、大运按出生时刻计算"""
+    calc = BaziCalculator()
+    base = datetime(2023, 5, 21, 14, 0)
+    for minutes in range(0, 120, 7):
+        dt = base + timedelta(minutes=minutes)
+        cached = calc.calculate_bazi_info(dt, 1, 1, "张三")
+        fresh = BaziCalculator().calculate_bazi_info(dt, 1, 1, "张三")
+        assert cached == fresh, dt
+    assert calc.chart_memo.hits > 0
+
+def test_chart_memo_not_shared():
+    """修改一次响应不影响记忆表中的排盘分段结果，后续请求不受影响"""
+    calc = BaziCalculator()
+    dt = datetime(2023, 5, 21, 14, 0)
+    first = calc.calculate_bazi_info(dt, 1, 1, "张三")
+    expected = BaziCalculator().calculate_bazi_info(dt, 1, 1, "张三")
+    first["gods"].append("x")
+    first["top"]["year"] = "x"
+    first["datetime"]["lunarDate"]["year"] = 0
+    first["festival"]["pre"]["label"] = "x"
+    second = calc.calculate_bazi_info(dt + timedelta(minutes=5), 1, 1, "张三")
+    assert calc.chart_memo.hits == 1
+    assert {key: second[key] for key in ("gods", "top", "festival")} == \
+        {key: expected[key] for key in ("gods", "top", "festival")}
+    assert second["datetime"]["lunarDate"] == expected["datetime"]["lunarDate"]
+    assert calc.calculate_bazi_info_batch([(dt, 1, 1, "张三")]) == [expected]
+    _, _, chart = calc.chart_memo.get(chart_key(dt, 1))
+    with pytest.raises(TypeError):
+        chart["top"]["year"] = "x"
+
+def test_pillar_analysis_cache():
+    """同一八字的分析片段只生成一次，内容与四柱一致"""
+    from .bazi_calculator import BaziCalculator as LegacyCalculator
+    calc = LegacyCalculator(analysis_cache_bytes=1 << 20)
+    first = calc.calculate_bazi_info(datetime(2023, 5, 15, 10, 30), 1, 1, "")
+    second = calc.calculate_bazi_info(datetime(2023, 5, 15, 10, 45), 2, 1, "")
+    assert calc.analysis_cache.stats()["hits"] == 1 and len(calc.analysis_cache) == 1
+    assert first["十神详细"] == second["十神详细"] and first["十神详细"] is not second["十神详细"]
+    first["十神详细"]["天干十神"]["年干"] = ""
+    assert second["十神详细"]["天干十神"]["年干"] == "比肩"
+    analysis = calc.analysis_cache.get(tuple(ganzhi.PILLAR_INDEX[p] for p in ("癸卯", "丁巳", "癸酉", "丁巳")))
+    with pytest.raises(TypeError):
+        analysis.wuxing_count["金"] = 9
+    assert first["element"]["pro_decl"] == first["五行"]["专业解读"] == list(analysis.pro_decl)
+    assert first["element"]["pro_decl"][0] == "日主癸(水)，八字偏中和"
+    assert first["element"]["include"] == ("癸", "丁", "癸", "丁", "卯", "巳", "酉", "巳")
+    assert first["element"]["ninclude"] == ("土",)
+    assert 0 < calc.analysis_cache.bytes <= 1 << 20
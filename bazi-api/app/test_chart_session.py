@@ -0,0 +1,47 @@
+"""
+测试合并排盘接口与排盘会话
+"""
+
+import time
+from datetime import datetime
+
+from . import main
+from .bazi_calculator_new import BaziCalculator
+from .chart_session import ChartSessions
+
+def test_full_matches_separate():
+    """合并接口与分别调用两个接口结果一致（含带秒的出生时刻、表外日期）"""
+    calc = BaziCalculator()
+    for dt, gender, sect in [(datetime(1990, 5, 15, 14, 30), 1, 1), (datetime(2000, 2, 4, 20, 40, 35), 2, 2),
+                             (datetime(1850, 3, 1, 8, 0), 1, 1)]:
+        full = calc.calculate_bazi_full(dt, gender, sect, "张三")
+        assert full["info"] == BaziCalculator().calculate_bazi_info(dt, gender, sect, "张三")
+        assert full["prediction"] == BaziCalculator().calculate_bazi_prediction(dt, gender, sect)
+
+def test_handle_reuse():
+    """带句柄的请求复用会话，时间不符时照常计算"""
+    full = main.get_bazi_full(main.BaziFullRequest(datetime="1990-05-15 14:30:00", realname="张三"))["data"]
+    handle = full["handle"]
+    hits = main.chart_sessions.hits
+
+    info = main.get_bazi_info(main.BaziInfoRequest(datetime="1990-05-15 14:30:00", realname="李四", handle=handle))
+    assert info["data"]["realname"] == "李四" and info["data"]["top"] == full["info"]["top"]
+    prediction = main.get_bazi_prediction(main.BaziPredictionRequest(datetime="1990-05-15 14:30:00", handle=handle))
+    assert prediction["data"] is full["prediction"]
+    assert main.chart_sessions.hits == hits + 2
+
+    other = main.get_bazi_info(main.BaziInfoRequest(datetime="1991-05-15 14:30:00", handle=handle))
+    assert other["data"]["bottom"] != full["info"]["bottom"]
+    assert main.chart_sessions.hits == hits + 2
+
+def test_sessions_expire():
+    """会话过期、超出容量后失效"""
+    chart = BaziCalculator().prepare_chart(datetime(1990, 5, 15, 14, 30), 1, 1)
+    sessions = ChartSessions(ttl=0.05, maxsize=2)
+    handles = [sessions.create(chart) for _ in range(3)]
+    assert sessions.get(handles[0], *chart[:3]) is None
+    assert sessions.get(handles[2], *chart[:3]).chart is chart
+    time.sleep(0.06)
+    assert sessions.get(handles[2], *chart[:3]) is None and len(sessions) == 1
+    sessions.create(chart)
+    assert len(sessions) == 1
@@ -0,0 +1,26 @@
+"""
+测试排盘分段表
+"""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from .chart_table import build_chart_table, ChartTable
+from .pillar_engine import get_pillar_engine
+
+def test_chart_table_matches_engine(tmp_path):
+    """分段表查询与向量化引擎逐分钟一致"""
+    table = ChartTable(build_chart_table(str(tmp_path / "chart.bin"), 2024, 2024))
+    assert 366 * 13 < len(table) <= 366 * 13 + 12
+    
+    dts = [datetime(2024, 2, 3) + timedelta(minutes=m) for m in range(0, 3 * 1440, 7)]
+    dts += [datetime(2024, 2, 4, 16, 26), datetime(2024, 2, 4, 16, 27), datetime(2024, 12, 31, 23, 59)]
+    arr = np.array(dts, dtype="datetime64[m]")
+    for sect in (1, 2):
+        expected = get_pillar_engine().compute(arr, sect)
+        for i, dt in enumerate(dts):
+            assert table.lookup(dt, sect) == tuple(expected[field][i] for field in ("year", "month", "day", "time"))
+    
+    assert table.lookup(datetime(2025, 1, 1)) is None
+    assert table.lookup(datetime(2023, 12, 31, 23, 59)) is None
@@ -0,0 +1,41 @@
+"""
+测试城市坐标索引
+"""
+
+import os
+
+from .city_index import get_city_index, load_city_index, DEFAULT_COORDINATES
+
+def test_lookup():
+    """精确、简称、逐级全称、前缀补全"""
+    index = get_city_index()
+    assert index.get("南京市").code == "320100"
+    assert index.lookup("南京").code == "320100"
+    assert index.lookup("沛").name == "沛县"
+    # 同名区按上级辖区区分
+    assert index.lookup("江苏省南京市鼓楼区").code == "320106"
+    assert index.lookup("江苏徐州鼓楼区").code == "320302"
+    assert index.lookup("中国上海").code == "310000"
+    assert index.lookup("乌鲁木").name == "乌鲁木齐市"
+    # 下级不存在时取上级
+    assert index.lookup("江苏省不存在").code == "320000"
+    assert index.lookup("火星") is None
+    assert index.coordinates("火星") == DEFAULT_COORDINATES
+
+def test_hot_reload(tmp_path, monkeypatch):
+    """数据文件修改后重建索引，缺失时使用内置城市"""
+    from . import city_index
+    path = tmp_path / "cities.txt"
+    path.write_text("100000  中华人民共和国 116.0 39.0\n110000  北京市 116.4 39.9\n", encoding="utf-8")
+    monkeypatch.setattr(city_index, "RELOAD_INTERVAL", 0)
+    first = get_city_index(str(path))
+    assert first.lookup("北京").lat == 39.9 and first.lookup("上海") is None
+
+    path.write_text("310000  上海市 121.5 31.2\n", encoding="utf-8")
+    os.utime(path, (1, 1))
+    second = get_city_index(str(path))
+    assert second is not first and second.lookup("上海").code == "310000"
+    # 旧索引仍可使用
+    assert first.lookup("北京").code == "110000"
+
+    assert load_city_index(str(tmp_path / "missing.txt")).lookup("杭州").name == "杭州"
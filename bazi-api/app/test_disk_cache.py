@@ -0,0 +1,56 @@
+"""
+测试磁盘结果缓存
+"""
+
+from datetime import datetime, timedelta
+
+from .bazi_calculator_new import BaziCalculator
+from .disk_cache import DiskCache
+
+def test_roundtrip_and_version(tmp_path):
+    """异步写入后批量读取；换引擎版本后旧结果清除"""
+    path = str(tmp_path / "cache.sqlite3")
+    cache = DiskCache(path, version="v1")
+    cache.put("chart", [1, 2, 1], {"a": [1, "甲"]})
+    cache.put("chart", [3, 4, 1], [5, {"b": True}])
+    cache.flush()
+    assert cache.get_many("chart", [[3, 4, 1], [9, 9, 9], [1, 2, 1]]) == [[5, {"b": True}], None, {"a": [1, "甲"]}]
+    assert cache.get("prediction", [1, 2, 1]) is None
+    cache.close()
+
+    reopened = DiskCache(path, version="v1")
+    assert sorted(key for key, _ in reopened.load_recent("chart", 10)) == [[1, 2, 1], [3, 4, 1]]
+    reopened.close()
+    upgraded = DiskCache(path, version="v2")
+    assert upgraded.get("chart", [1, 2, 1]) is None and upgraded.stats()["size"] == 0
+    upgraded.close()
+
+def test_eviction(tmp_path):
+    """超出容量时淘汰最久未访问的条目"""
+    cache = DiskCache(str(tmp_path / "cache.sqlite3"), max_bytes=20000, version="v1")
+    for i in range(100):
+        cache.put("chart", i, "x" * 1000)
+        cache.flush()
+    stats = cache.stats()
+    assert stats["bytes"] <= 20000 and 10 <= stats["size"] < 20
+    assert cache.get("chart", 99) is not None and cache.get("chart", 0) is None
+    cache.close()
+
+def test_calculator_restarts_warm(tmp_path):
+    """新进程从磁盘预热，结果与直接计算一致"""
+    path = str(tmp_path / "cache.sqlite3")
+    cache = DiskCache(path)
+    calc = BaziCalculator(disk_cache=cache)
+    births = [datetime(1990, 3, 1, 8) + timedelta(days=i, minutes=7 * i) for i in range(20)]
+    expected = [calc.calculate_bazi_info(dt, 1, 1, "") for dt in births]
+    predictions = [calc.calculate_bazi_prediction(dt, 2, 1) for dt in births]
+    cache.close()
+
+    cache = DiskCache(path)
+    warm = BaziCalculator(disk_cache=cache)
+    assert len(warm.chart_memo) == 20
+    assert [warm.calculate_bazi_info(dt, 1, 1, "") for dt in births] == expected
+    assert warm.chart_memo.misses == 0
+    assert [warm.calculate_bazi_prediction(dt, 2, 1) for dt in births] == predictions
+    assert predictions == [BaziCalculator().calculate_bazi_prediction(dt, 2, 1) for dt in births]
+    cache.close()
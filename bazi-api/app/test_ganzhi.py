@@ -0,0 +1,57 @@
+"""
+测试干支整数编码核心
+"""
+
+from lunar_python.util import LunarUtil
+from .data_models import Constants
+from . import ganzhi
+from .shishen_calculator import ShishenCalculator
+from .lunar_calculator import LunarCalculator
+
+def test_pillar_encoding():
+    """六十甲子编码与天干地支互转"""
+    for p in range(60):
+        assert ganzhi.pillar_of(ganzhi.pillar_gan(p), ganzhi.pillar_zhi(p)) == p
+        assert ganzhi.parse_pillar(ganzhi.PILLAR_NAMES[p]) == p
+    assert ganzhi.PILLAR_NAMES[0] == "甲子"
+    assert ganzhi.PILLAR_NAMES[59] == "癸亥"
+    assert ganzhi.parse_pillar("甲丑") == -1
+
+def test_shi_shen_tables():
+    """十神表与 lunar_python 及前端映射一致"""
+    for d, day_gan in enumerate(ganzhi.TIAN_GAN):
+        for t, gan in enumerate(ganzhi.TIAN_GAN):
+            name = ganzhi.SHI_SHEN_NAMES[ganzhi.gan_shi_shen(d, t)]
+            assert name == LunarUtil.SHI_SHEN[day_gan + gan]
+        for z, zhi in enumerate(ganzhi.DI_ZHI):
+            name = ganzhi.SHI_SHEN_NAMES[ganzhi.zhi_shi_shen(d, z)]
+            assert name == Constants.SHI_SHEN_ZHI[day_gan + zhi]
+
+def test_hide_gan_nayin_xun_kong():
+    """藏干、纳音、旬空与 lunar_python 一致"""
+    for z, zhi in enumerate(ganzhi.DI_ZHI):
+        assert [ganzhi.TIAN_GAN[g] for g in ganzhi.ZHI_HIDE_GAN[z]] == LunarUtil.ZHI_HIDE_GAN[zhi]
+    for p, name in enumerate(ganzhi.PILLAR_NAMES):
+        assert ganzhi.NAYIN_NAMES[ganzhi.PILLAR_NAYIN[p]] == LunarUtil.NAYIN[name]
+        first, second = ganzhi.PILLAR_XUN_KONG[p]
+        assert ganzhi.DI_ZHI[first] + ganzhi.DI_ZHI[second] == LunarUtil.XUN_KONG[p // 10]
+
+def test_chang_sheng():
+    """十二长生：甲生亥、乙生午"""
+    jia, yi = ganzhi.GAN_INDEX["甲"], ganzhi.GAN_INDEX["乙"]
+    assert ganzhi.CHANG_SHENG[jia * 12 + ganzhi.ZHI_INDEX["亥"]] == 0
+    assert ganzhi.CHANG_SHENG[jia * 12 + ganzhi.ZHI_INDEX["卯"]] == 4
+    assert ganzhi.CHANG_SHENG[yi * 12 + ganzhi.ZHI_INDEX["午"]] == 0
+    assert ganzhi.CHANG_SHENG[yi * 12 + ganzhi.ZHI_INDEX["巳"]] == 1
+
+def test_calculators_use_core():
+    """计算器字符串接口"""
+    shishen_calc = ShishenCalculator()
+    assert shishen_calc.get_relation("甲", "壬") == "偏印"
+    assert shishen_calc.get_relation("甲", "子") == "正印"
+    assert shishen_calc.get_relation_by_pillar("甲", "戊午") == "才伤"
+
+    lunar_calc = LunarCalculator()
+    assert lunar_calc.get_empty("甲", "子") == ("戌", "亥")
+    assert lunar_calc.get_empty("丙", "寅") == ("戌", "亥")
+    assert lunar_calc.get_nayin("癸", "亥") == "大海水"
@@ -0,0 +1,43 @@
+"""
+测试 GET 接口的 HTTP 缓存协商
+"""
+
+from starlette.requests import Request
+
+from . import main
+from .http_cache import etag_matches
+
+def make_request(path, query, if_none_match=None):
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "method": "GET", "path": path,
+                    "query_string": query.encode(), "headers": headers})
+
+def test_etag_and_not_modified():
+    """规范 URL 返回强 ETag 与 Cache-Control，If-None-Match 命中返回 304"""
+    query = "datetime=1990-05-15+14%3A30%3A00&gender=1&sect=1"
+    response = main.get_bazi_info_cached(make_request("/8char/get-info", query), birth="1990-05-15 14:30:00")
+    etag = response.headers["etag"]
+    assert response.status_code == 200 and etag.startswith('"')
+    assert response.headers["cache-control"].startswith("public, max-age=")
+
+    cached = main.get_bazi_info_cached(make_request("/8char/get-info", query, etag), birth="1990-05-15 14:30:00")
+    assert cached.status_code == 304 and cached.headers["etag"] == etag and not cached.body
+
+    # 不同输入的 ETag 不同；带姓名的结果只允许私有缓存
+    named = main.get_bazi_info_cached(make_request("/8char/get-info", query + "&realname=%E5%BC%A0%E4%B8%89"),
+                                      birth="1990-05-15 14:30:00", realname="张三")
+    assert named.headers["etag"] != etag and named.headers["cache-control"].startswith("private")
+
+def test_redirect_to_canonical():
+    """非规范查询参数（顺序、农历输入）跳转到规范 URL"""
+    response = main.get_bazi_prediction_cached(
+        make_request("/8char/get-prediction", "datetime=2023-02-30+08:00:00&calendar=lunar"),
+        birth="2023-02-30 08:00:00", calendar="lunar")
+    assert response.status_code == 301
+    assert response.headers["location"] == "/8char/get-prediction?datetime=2023-03-21+08%3A00%3A00&gender=1&sect=1"
+
+def test_etag_matches():
+    """支持弱比较、列表与 *"""
+    assert etag_matches('W/"abc", "def"', '"abc"')
+    assert etag_matches("*", '"abc"')
+    assert not etag_matches('"abd"', '"abc"') and not etag_matches(None, '"abc"')
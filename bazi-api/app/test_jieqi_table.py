@@ -0,0 +1,30 @@
+"""
+测试节气时刻表
+"""
+
+from datetime import datetime
+from lunar_python import Solar
+from .jieqi_table import build_jieqi_table, JieqiTable, to_minutes
+
+def test_jieqi_table(tmp_path):
+    """生成、加载并与 lunar_python 对照"""
+    path = build_jieqi_table(str(tmp_path / "jieqi.bin"), 2023, 2025)
+    table = JieqiTable(path)
+    assert len(table) == 3 * 24
+    
+    # 2024 立春交节 16:26:53，16:27 起视为已交节
+    index = table.locate(to_minutes(datetime(2024, 2, 4, 16, 27)))
+    assert table.name(index) == "立春"
+    assert table.instant(index) == datetime(2024, 2, 4, 16, 26, 53)
+    assert table.name(table.locate(to_minutes(datetime(2024, 2, 4, 16, 26)))) == "大寒"
+    
+    dt = datetime(2024, 5, 15, 10, 30)
+    festival = table.get_festival(dt)
+    lunar = Solar.fromYmdHms(dt.year, dt.month, dt.day, dt.hour, dt.minute, 0).getLunar()
+    assert festival.pre.label == lunar.getPrevJieQi(False).getName()
+    assert festival.next.label == lunar.getNextJieQi(False).getName()
+    # 显示实际交节时刻（2023 小满 15:08:59），不是向上取整后的分钟
+    assert festival.pre.time == lunar.getPrevJieQi(False).getSolar().toYmdHms()
+    assert festival.next.time == lunar.getNextJieQi(False).getSolar().toYmdHms()
+    assert table.get_festival(datetime(2023, 5, 22)).pre.time == "2023-05-21 15:08:59"
+    assert table.get_festival(datetime(2030, 1, 1)) is None
@@ -0,0 +1,110 @@
+"""
+测试后台排盘任务
+"""
+
+import json
+import os
+import time
+
+import pytest
+
+from .job_queue import CANCELLED, COMPLETED, RUNNING, JobNotReady, JobQueue, _Claim
+from .main import info_batch_chunk, prediction_batch_chunk
+
+def write_input(path, count):
+    with open(path, "w", encoding="utf-8") as file:
+        for number in range(count):
+            file.write(json.dumps({"datetime": f"19{50 + number % 50}-0{1 + number % 9}-15 0{number % 10}:30:00",
+                                   "gender": 1 + number % 2}) + "\n")
+        file.write("\n{bad\n")
+
+def read_result(queue, job_id):
+    with open(queue.result_path(job_id), encoding="utf-8") as file:
+        return [json.loads(line) for line in file]
+
+def test_job_matches_batch(tmp_path):
+    """任务结果与批量接口逐段计算一致，坏行单独报错；输入文件限定在输入目录内"""
+    inputs = tmp_path / "inputs"
+    inputs.mkdir()
+    write_input(inputs / "charts.ndjson", 25)
+    queue = JobQueue(str(tmp_path / "jobs"), {"info": info_batch_chunk}, input_root=str(inputs))
+    job = queue.create("info", "charts.ndjson", chunk_size=10)
+    with pytest.raises(JobNotReady):
+        queue.result_path(job["id"])
+    queue.run(job["id"])
+    job = queue.get(job["id"])
+    assert job["status"] == COMPLETED and job["total"] == job["done"] == 26 and job["progress"] == 1
+    lines = read_result(queue, job["id"])
+    items = [json.loads(line) for line in (inputs / "charts.ndjson").read_text().splitlines()[:25]]
+    expected = info_batch_chunk(0, items)
+    assert lines[:25] == [json.loads(line) for line in expected.splitlines()]
+    assert lines[25]["index"] == 25 and "error" in lines[25]
+
+    for path in ("../jobs/x", "/etc/passwd", "missing.ndjson"):
+        with pytest.raises(ValueError):
+            queue.create("info", path)
+    with pytest.raises(ValueError):
+        queue.create("export", "charts.ndjson")
+
+def test_resume_from_checkpoint(tmp_path):
+    """中途停止后从检查点续算：已完成的段不再计算，写了一半的结果被丢弃"""
+    upload = tmp_path / "upload.json"
+    upload.write_text(json.dumps([{"datetime": f"19{year}-03-01 08:00:00"} for year in range(50, 80)]))
+    starts = []
+
+    def interrupted(start, items):
+        starts.append(start)
+        if len(starts) == 2:
+            queue._stopping.set()
+        return prediction_batch_chunk(start, items)
+
+    queue = JobQueue(str(tmp_path / "jobs"), {"prediction": interrupted})
+    job = queue.create("prediction", str(upload), chunk_size=8, upload=True)
+    queue.run(job["id"])
+    assert queue.get(job["id"])["status"] == RUNNING and queue.get(job["id"])["done"] == 16
+    with open(tmp_path / "jobs" / job["id"] / "result.ndjson", "ab") as file:
+        file.write(b'{"index":16,"da')
+
+    starts.clear()
+    resumed = JobQueue(str(tmp_path / "jobs"), {"prediction": lambda start, items: starts.append(start)
+                                                or prediction_batch_chunk(start, items)})
+    resumed.run(job["id"])
+    assert starts == [16, 24] and resumed.get(job["id"])["status"] == COMPLETED
+    lines = read_result(resumed, job["id"])
+    assert [line["index"] for line in lines] == list(range(30))
+    assert lines[20]["data"] == json.loads(prediction_batch_chunk(20, [{"datetime": "1970-03-01 08:00:00"}]))["data"]
+
+def test_cancel_and_claim(tmp_path):
+    """排队中的任务直接取消；已被认领的任务其他线程不会重复计算"""
+    upload = tmp_path / "upload.ndjson"
+    upload.write_text('{"datetime": "1990-05-15 14:30:00"}\n')
+    queue = JobQueue(str(tmp_path / "jobs"), {"info": info_batch_chunk})
+    job = queue.create("info", str(upload), upload=True)
+    assert queue.cancel(job["id"])["status"] == CANCELLED
+    queue.run(job["id"])
+    assert queue.get(job["id"])["done"] == 0
+
+    upload.write_text('{"datetime": "1990-05-15 14:30:00"}\n')
+    job = queue.create("info", str(upload), upload=True)
+    with _Claim(os.path.join(queue.root, job["id"], "lock")):
+        queue.run(job["id"])
+        assert queue.get(job["id"])["done"] == 0
+        # 计算中的任务：留下取消标记，由认领者在段间停止
+        assert queue.cancel(job["id"])["status"] != CANCELLED
+    queue.run(job["id"])
+    assert queue.get(job["id"])["status"] == CANCELLED
+
+def test_worker_threads(tmp_path):
+    """工作线程在启动时接手目录中未完成的任务"""
+    upload = tmp_path / "upload.ndjson"
+    upload.write_text("".join(f'{{"datetime": "2000-0{month}-10 12:00:00"}}\n' for month in range(1, 10)))
+    JobQueue(str(tmp_path / "jobs"), {"info": info_batch_chunk}).create("info", str(upload), 4, upload=True)
+    queue = JobQueue(str(tmp_path / "jobs"), {"info": info_batch_chunk}, workers=2)
+    queue.start()
+    try:
+        deadline = time.monotonic() + 30
+        while queue.list_jobs()[0]["status"] != COMPLETED and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert queue.list_jobs()[0]["done"] == 9
+    finally:
+        queue.close()
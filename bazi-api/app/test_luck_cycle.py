@@ -0,0 +1,78 @@
+"""
+测试大运流年生成器
+"""
+
+import random
+from datetime import datetime, timedelta
+
+from lunar_python import Solar
+
+from . import ganzhi
+from .jieqi_table import get_jieqi_table
+from .luck_cycle import LuckCycle
+
+def _names(items):
+    return [(year, age, ganzhi.PILLAR_NAMES[p] if p >= 0 else "") for year, age, p in items]
+
+def _check(dt, gender, sect):
+    yun = Solar.fromDate(dt).getLunar().getEightChar().getYun(gender, sect)
+    luck = LuckCycle(dt, gender, sect)
+    assert luck.forward == yun.isForward(), dt
+    assert luck.start == (yun.getStartYear(), yun.getStartMonth(), yun.getStartDay(), yun.getStartHour()), dt
+
+    da_yun = yun.getDaYun()
+    assert _names(luck.da_yun()) == [(d.getStartYear(), d.getStartAge(), d.getGanZhi()) for d in da_yun], dt
+    for index in (0, 1, 5):
+        # 流年干支逐年递增，只比首尾（lunar_python 每个流年都要重算节气，较慢）
+        liu_nian = da_yun[index].getLiuNian()
+        actual = _names(luck.liu_nian(index))
+        assert len(actual) == len(liu_nian), (dt, index)
+        for i in {0, len(liu_nian) - 1} if liu_nian else ():
+            assert actual[i] == (liu_nian[i].getYear(), liu_nian[i].getAge(), liu_nian[i].getGanZhi()), (dt, index)
+
+def test_random_births():
+    """随机出生时刻（含秒）与 lunar_python 起运、大运、流年逐一对照"""
+    rng = random.Random(6)
+    for _ in range(200):
+        dt = datetime(1900, 1, 1) + timedelta(seconds=rng.randrange(200 * 365 * 86400))
+        _check(dt, rng.choice([1, 2]), rng.choice([1, 2]))
+
+def test_births_near_jie():
+    """交节前后一秒、一分钟，以及晚子时、闰日"""
+    table = get_jieqi_table()
+    rng = random.Random(16)
+    for _ in range(40):
+        index = rng.randrange(2, len(table.seconds) - 4) & ~1
+        instant = datetime(1970, 1, 1) + timedelta(seconds=table.seconds[index])
+        for delta in (-60, -1, 0, 1, 60):
+            _check(instant + timedelta(seconds=delta), rng.choice([1, 2]), rng.choice([1, 2]))
+    for dt in (datetime(2000, 2, 29, 23, 30), datetime(1984, 12, 31, 23, 59, 59), datetime(2024, 2, 4, 16, 26, 53)):
+        for gender in (1, 2):
+            for sect in (1, 2):
+                _check(dt, gender, sect)
+
+def test_before_li_chun():
+    """1 月 1 日至立春之间出生：bazi_core、DayunCalculator 的排运方向与大运干支与 lunar_python 一致"""
+    from .bazi_core import calc_bazi
+    from .dayun_calculator import DayunCalculator
+    from .shishen_calculator import ShishenCalculator
+
+    dayun_calc = DayunCalculator(ShishenCalculator())
+    rng = random.Random(26)
+    births = [datetime(1990, 1, 20, 10, 0)] + [
+        datetime(rng.randrange(1901, 2099), 1, 1, rng.randrange(24), rng.randrange(60)) + timedelta(days=rng.randrange(33))
+        for _ in range(30)
+    ]
+    for dt in births:
+        for gender, name in ((1, "男"), (2, "女")):
+            for sect in (1, 2):
+                yun = Solar.fromDate(dt).getLunar().getEightChar().getYun(gender, sect)
+                expected = [(d.getStartAge(), d.getGanZhi()) for d in yun.getDaYun(11)[1:]]
+
+                result = calc_bazi("x", "北京", name, dt.year, dt.month, dt.day, dt.hour, dt.minute, sect=sect)["大运"]
+                assert result["排运方式"] == ("顺排" if yun.isForward() else "逆排"), dt
+                assert [(int(item["起止年龄"].split("-")[0]), item["干支"]) for item in result["大运"]] == expected, dt
+
+                bazi = Solar.fromDate(dt).getLunar().getEightChar()
+                tend = dayun_calc.calculate_dayun(dt, gender, sect, bazi.getDay(), bazi.getYear())
+                assert [(item.startAge, item.pillar) for item in tend.dayunList[1:]] == expected[:7], dt
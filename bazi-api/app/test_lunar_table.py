@@ -0,0 +1,53 @@
+"""
+测试农历月表
+"""
+
+import random
+from datetime import date, datetime, timedelta
+
+import pytest
+from lunar_python import Solar
+
+from .lunar_table import LunarDate, LunarTable, build_lunar_table, get_lunar_table, to_day_number
+
+def test_lunar_table_small(tmp_path):
+    """生成、加载小范围表"""
+    table = LunarTable(build_lunar_table(str(tmp_path / "lunar.bin"), 2023, 2024))
+    assert len(table) == 25
+    assert table.leap_month(2023) == 2 and table.leap_month(2024) == 0
+    assert table.to_lunar(date(2023, 4, 1)) == LunarDate(2023, 2, 11, True)
+    assert table.to_solar(2023, 2, 11, True) == date(2023, 4, 1)
+    assert table.to_solar(2023, 2, 11) == date(2023, 3, 2)
+
+def test_matches_lunar_python():
+    """随机日期与 lunar_python 对照，并可逆"""
+    table = get_lunar_table()
+    rng = random.Random(10)
+    days = [date(1900, 1, 1) + timedelta(days=rng.randrange(201 * 365)) for _ in range(1000)]
+    for d in days:
+        lunar = Solar.fromYmd(d.year, d.month, d.day).getLunar()
+        result = table.to_lunar(d)
+        assert result == (lunar.getYear(), abs(lunar.getMonth()), lunar.getDay(), lunar.getMonth() < 0), d
+        assert str(result) == f"{lunar.getYear()}年{lunar.getMonthInChinese()}月{lunar.getDayInChinese()}日"
+        assert result.zodiac == lunar.getYearShengXiao()
+        assert table.to_solar(*result) == d
+
+    years, months, day_of_month, leaps = table.to_lunar_array([to_day_number(d) for d in days])
+    for i, d in enumerate(days):
+        assert (years[i], months[i], day_of_month[i], leaps[i]) == table.to_lunar(d)
+
+def test_invalid_lunar_dates():
+    """不存在的闰月、大小月、超出范围"""
+    table = get_lunar_table()
+    for args in ((2023, 3, 1, True), (2023, 1, 30), (2101, 1, 1), (2023, 13, 1)):
+        with pytest.raises(ValueError):
+            table.to_solar(*args)
+    with pytest.raises(ValueError):
+        table.to_lunar(date(1899, 1, 1))
+
+def test_lunar_input():
+    """接口农历输入转公历"""
+    from .main import parse_birth_datetime
+    assert parse_birth_datetime("2023-02-30 08:15:00", "lunar") == datetime(2023, 3, 21, 8, 15)
+    assert parse_birth_datetime("2023-02-11 08:15:00", "lunar", True) == datetime(2023, 4, 1, 8, 15)
+    assert parse_birth_datetime("2023-04-01 08:15:00") == datetime(2023, 4, 1, 8, 15)
@@ -0,0 +1,60 @@
+"""
+测试微批处理
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pytest
+
+from .bazi_calculator_new import BaziCalculator
+from .micro_batch import MicroBatcher
+
+def test_batch_matches_single():
+    """批量计算与逐条计算结果一致（含表外日期与重复条目）"""
+    calc = BaziCalculator()
+    requests = [
+        (datetime(1990, 5, 15, 14, 30), 1, 1, "张三"),
+        (datetime(2000, 2, 4, 20, 40), 0, 2, ""),
+        (datetime(1990, 5, 15, 14, 30), 0, 2, ""),
+        (datetime(2023, 12, 31, 23, 30), 1, 2, ""),
+        (datetime(1850, 3, 1, 8, 0), 1, 1, ""),
+    ]
+    expected = [BaziCalculator().calculate_bazi_info(*request) for request in requests]
+    assert calc.calculate_bazi_info_batch(requests) == expected
+    # 第二次全部命中记忆表
+    assert calc.calculate_bazi_info_batch(requests) == expected
+
+def test_window_and_size_flush():
+    """凑满 max_batch 立即处理，不足时等窗口结束"""
+    sizes = []
+    batcher = MicroBatcher(lambda items: sizes.append(len(items)) or [item * 2 for item in items],
+                           max_batch=4, window_ms=50)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(batcher, range(8)))
+    assert results == [i * 2 for i in range(8)]
+    assert sum(sizes) == 8 and max(sizes) <= 4
+
+    start = time.perf_counter()
+    assert batcher(5) == 10
+    assert time.perf_counter() - start >= 0.04
+    batcher.close()
+
+    stats = batcher.stats()
+    assert stats["items"] == 9 and stats["batches"] == len(sizes)
+    assert stats["maxBatchSize"] <= 4 and stats["avgBatchMs"] >= 0
+
+def test_error_isolated():
+    """批内一条出错时只有这一条抛出异常"""
+    def process(items):
+        if "bad" in items:
+            raise ValueError("bad item")
+        return [item.upper() for item in items]
+
+    batcher = MicroBatcher(process, max_batch=8, window_ms=20)
+    futures = [batcher.submit(item) for item in ("a", "bad", "c")]
+    assert futures[0].result() == "A" and futures[2].result() == "C"
+    with pytest.raises(ValueError):
+        futures[1].result()
+    batcher.close()
@@ -0,0 +1,37 @@
+"""
+测试向量化四柱引擎
+"""
+
+import random
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from lunar_python import Solar
+
+from . import ganzhi
+from .pillar_engine import get_pillar_engine
+
+def test_pillars_match_lunar_python():
+    """随机时刻与 lunar_python 八字逐一对照"""
+    rng = random.Random(42)
+    dts = [datetime(1900, 1, 1) + timedelta(minutes=rng.randrange(201 * 365 * 1440)) for _ in range(300)]
+    dts += [datetime(1985, 3, 5, 23, 30), datetime(2024, 2, 4, 16, 26), datetime(2024, 2, 4, 16, 27)]
+    sects = np.array([rng.choice([1, 2]) for _ in dts])
+    genders = np.array([rng.choice([1, 2]) for _ in dts])
+    
+    result = get_pillar_engine().compute(np.array(dts, dtype="datetime64[m]"), sects, genders)
+    
+    for i, dt in enumerate(dts):
+        eight_char = Solar.fromYmdHms(dt.year, dt.month, dt.day, dt.hour, dt.minute, 0).getLunar().getEightChar()
+        eight_char.setSect(int(sects[i]))
+        expected = [eight_char.getYear(), eight_char.getMonth(), eight_char.getDay(), eight_char.getTime()]
+        actual = [ganzhi.PILLAR_NAMES[result[field][i]] for field in ("year", "month", "day", "time")]
+        assert actual == expected, dt
+        forward = eight_char.getYun(int(genders[i]), 1).isForward()
+        assert result["direction"][i] == (1 if forward else -1)
+
+def test_out_of_range():
+    """超出节气表范围报错"""
+    with pytest.raises(ValueError):
+        get_pillar_engine().compute(np.array(["1800-01-01T00:00"], dtype="datetime64[m]"))
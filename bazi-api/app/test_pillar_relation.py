@@ -0,0 +1,83 @@
+"""
+测试柱对关系表
+"""
+
+from datetime import datetime
+
+from lunar_python import Solar
+
+from . import ganzhi
+from .data_models import Constants
+from .luck_cycle import LuckCycle
+from .pillar_relation import (
+    FLAG_FAN_YIN, FLAG_FU_YIN, FLAG_ZHI_CHONG, RELATIONS, SHI_SHEN_PAIR_NAMES,
+    TAISUI_NAMES, describe, lookup
+)
+
+def test_relation_cells():
+    """十神、长生、太岁与现有映射一致"""
+    for natal in range(60):
+        for target in range(60):
+            cell = RELATIONS[natal, target]
+            assert SHI_SHEN_PAIR_NAMES[cell["shishen"]] == ganzhi.pillar_shi_shen_short(natal % 10, target)
+            assert cell["chang_sheng"] == ganzhi.CHANG_SHENG[natal % 10 * 12 + target % 12]
+            a, b = ganzhi.DI_ZHI[natal % 12], ganzhi.DI_ZHI[target % 12]
+            expected = Constants.TAISUI_RELATION.get(a + b) or Constants.TAISUI_RELATION.get(b + a) or ""
+            assert TAISUI_NAMES[cell["taisui"]] == expected
+            assert bool(cell["flags"] & FLAG_FU_YIN) == (natal == target)
+
+def test_describe():
+    """甲子见庚午：天克地冲"""
+    info = describe(ganzhi.PILLAR_INDEX["甲子"], ganzhi.PILLAR_INDEX["庚午"])
+    assert info["shishen"] == "杀伤"
+    assert info["changSheng"] == "死"
+    assert info["taisui"] == "冲太岁"
+    assert info["relations"] == ["天干相冲", "地支六冲", "反吟"]
+
+def test_timeline_gather():
+    """大运 x 流年 x 流月一次取出，干支与 lunar_python 流月一致"""
+    dt = datetime(1988, 7, 9, 13, 20)
+    timeline = LuckCycle(dt, 2, 1).timeline()
+    da_yun = Solar.fromDate(dt).getLunar().getEightChar().getYun(2, 1).getDaYun()
+    for step in (1, 6):
+        liu_nian = da_yun[step].getLiuNian()
+        assert [ganzhi.PILLAR_NAMES[p] for p in timeline["liu_nian"][step - 1]] == [n.getGanZhi() for n in liu_nian]
+        expected = [m.getGanZhi() for m in liu_nian[3].getLiuYue()]
+        assert [ganzhi.PILLAR_NAMES[p] for p in timeline["liu_yue"][step - 1, 3]] == expected
+
+    day_pillar = ganzhi.PILLAR_INDEX["丙午"]
+    cells = lookup(day_pillar, timeline["liu_yue"])
+    assert cells.shape == (10, 10, 12)
+    clash = (cells["flags"] & FLAG_ZHI_CHONG) != 0
+    assert (clash == (timeline["liu_yue"] % 12 == 0)).all()
+    fan_yin = (cells["flags"] & FLAG_FAN_YIN) != 0
+    assert (fan_yin == (timeline["liu_yue"] == ganzhi.PILLAR_INDEX["壬子"])).all()
+
+def test_prediction_fields():
+    """预测响应中大运、流年、流月的关系字段与逐格查表一致（日柱定十神、长生、冲合，年柱定太岁）"""
+    from .bazi_calculator import BaziCalculator as LegacyCalculator
+    from .bazi_calculator_new import BaziCalculator
+
+    def check(items, day_p, year_p):
+        for item in items:
+            if item["pillar"] == "童限":
+                assert item["shishen"] == "童限" and item["relations"] == []
+                continue
+            target = ganzhi.PILLAR_INDEX[item["pillar"]]
+            info = describe(day_p, target)
+            assert (item["shishen"], item["changSheng"], item["relations"]) == \
+                (info["shishen"], info["changSheng"], info["relations"])
+            assert item["taisui"] == describe(year_p, target)["taisui"]
+
+    dt = datetime(1990, 5, 15, 14, 30)
+    bazi = Solar.fromDate(dt).getLunar().getEightChar()
+    legacy = LegacyCalculator()
+    # 旧版计算器的本命四柱来自其自身的 lunar_calc
+    year_gan, year_zhi, _, _, day_gan, day_zhi, _, _ = legacy.lunar_calc.get_gan_zhi_from_date(dt)
+    for result, day, year in (
+        (BaziCalculator().calculate_bazi_prediction(dt, 1, 1), bazi.getDay(), bazi.getYear()),
+        (legacy.calculate_bazi_prediction(dt, 1, 1), day_gan + day_zhi, year_gan + year_zhi),
+    ):
+        for key in ("dayunList", "yearList", "monthList"):
+            check(result[key], ganzhi.PILLAR_INDEX[day], ganzhi.PILLAR_INDEX[year])
+        assert any(item["taisui"] for item in result["yearList"])
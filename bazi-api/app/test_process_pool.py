@@ -0,0 +1,53 @@
+"""
+测试排盘进程池
+"""
+
+import json
+from concurrent.futures import Future
+from datetime import datetime
+
+import pytest
+
+from .bazi_calculator_new import BaziCalculator
+from .process_pool import ChartProcessPool, PoolBusy, PoolTimeout
+
+def test_pool_results():
+    """工作进程返回的 JSON 与进程内计算一致；超时抛出 PoolTimeout"""
+    pool = ChartProcessPool(1, max_pending=1)
+    try:
+        dt = datetime(1990, 5, 15, 14, 30)
+        first = pool.submit("info", dt, 1, 1, "张三")
+        calc = BaziCalculator()
+        assert json.loads(first.result(60)) == calc.calculate_bazi_info(dt, 1, 1, "张三")
+        assert json.loads(pool.run("prediction", dt, 2, 2)) == calc.calculate_bazi_prediction(dt, 2, 2)
+
+        with pytest.raises(PoolTimeout):
+            pool.run("info", datetime(2001, 1, 1), 1, 1, timeout=0)
+        assert pool.stats()["timeouts"] == 1
+    finally:
+        pool.close()
+    assert pool.stats()["pending"] == 0
+
+class _IdleExecutor:
+    """只收任务不执行的执行器（任务一直在排队）"""
+
+    def submit(self, *args):
+        return Future()
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        pass
+
+class _IdlePool(ChartProcessPool):
+    def _create_executor(self):
+        return _IdleExecutor()
+
+def test_pool_busy():
+    """排队已满时立即拒绝（不依赖工作进程的处理速度）"""
+    pool = _IdlePool(1, max_pending=2)
+    dt = datetime(1990, 5, 15, 14, 30)
+    pool.submit("info", dt, 1, 1)
+    pool.submit("prediction", dt, 1, 1)
+    with pytest.raises(PoolBusy):
+        pool.submit("info", dt, 2, 2)
+    stats = pool.stats()
+    assert stats["rejected"] == 1 and stats["pending"] == 2
@@ -0,0 +1,37 @@
+"""
+测试干支关系检测
+"""
+
+import numpy as np
+
+from . import ganzhi
+from .relation_detector import RULE_NAMES, detect, detect_batch, detect_pillars
+
+def _pillars(*names):
+    return [ganzhi.PILLAR_INDEX[name] for name in names]
+
+def test_known_charts():
+    """三会、三合压半合、自刑、天干五合"""
+    relations = detect_pillars(_pillars("甲寅", "丁卯", "戊辰", "庚申"))
+    assert "寅卯辰三会木" in relations
+    assert "寅申相冲" in relations
+
+    relations = detect_pillars(_pillars("甲申", "丙子", "庚辰", "庚辰"))
+    assert "申子辰三合水" in relations
+    assert "申子半合水" not in relations and "子辰半合水" not in relations
+    assert "辰辰自刑" in relations
+
+    assert detect_pillars(_pillars("甲子", "己丑", "庚辰", "庚辰")) == [
+        "甲己合土", "甲庚相冲", "子丑六合(土)", "丑辰相破", "辰辰自刑", "子辰半合水"]
+    assert detect((), [ganzhi.ZHI_INDEX[z] for z in "寅巳申"]) == [
+        "巳申六合(水)", "寅申相冲", "寅巳相刑", "巳申相刑", "申寅相刑", "寅巳相害", "巳申相破", "寅巳申三刑"]
+
+def test_batch_matches_single():
+    """批量结果与逐盘检测一致（四柱至六柱）"""
+    rng = np.random.default_rng(8)
+    for columns in (4, 5, 6):
+        pillars = rng.integers(0, 60, (500, columns))
+        hits = detect_batch(pillars)
+        assert hits.shape == (500, len(RULE_NAMES))
+        for row, hit in zip(pillars, hits):
+            assert [RULE_NAMES[i] for i in np.flatnonzero(hit)] == detect_pillars(row.tolist())
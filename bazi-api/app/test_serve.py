@@ -0,0 +1,17 @@
+"""
+测试预加载启动方式
+"""
+
+import gc
+
+from .serve import preload, process_memory
+
+def test_preload_and_memory():
+    """预加载后对象被冻结；内存报告给出 RSS 及共享、私有部分"""
+    try:
+        assert preload() > 0
+    finally:
+        gc.unfreeze()
+    memory = process_memory()
+    if memory is not None:
+        assert memory["rss"] > 0 and memory["shared"] + memory["private"] == memory["rss"]
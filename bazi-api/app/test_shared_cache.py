@@ -0,0 +1,79 @@
+"""
+测试跨 worker 共享内存缓存
+"""
+
+import multiprocessing
+import os
+from datetime import datetime, timedelta
+
+from .bazi_calculator_new import BaziCalculator
+from .shared_cache import BUCKET_SLOTS, SharedChartCache
+
+def _name():
+    return f"bazi_test_{os.getpid()}"
+
+def _worker(name, start, results):
+    """子进程写入一段键，再读取全部键"""
+    cache = SharedChartCache(name, 256, version="v1")
+    for i in range(start, start + 20):
+        cache.put("chart", [i, 0, 1], {"i": i, "name": "甲子" * 10})
+    results.put(start)
+    cache.close()
+
+def test_roundtrip_and_buckets():
+    """读写、覆盖同键、桶满覆盖、超长数据不缓存"""
+    cache = SharedChartCache(_name(), 64, version="v1")
+    try:
+        assert cache.get("chart", [1, 2, 1]) is None
+        assert cache.put("chart", [1, 2, 1], [3, {"lunar": "二〇二三年闰二月十一"}])
+        assert cache.get("chart", [1, 2, 1]) == [3, {"lunar": "二〇二三年闰二月十一"}]
+        cache.put("chart", [1, 2, 1], [4])
+        assert cache.get("chart", [1, 2, 1]) == [4]
+        for i in range(200):
+            cache.put("chart", [i], i)
+        assert cache.stats()["used"] <= 64 and cache.get("chart", [199]) == 199
+        assert not cache.put("chart", [0], "x" * 5000)
+
+        # 其他进程挂载同名共享内存即可读到；引擎版本不同时重新初始化
+        other = SharedChartCache(_name(), 64, version="v1")
+        assert other.get("chart", [199]) == 199
+        other.close()
+        upgraded = SharedChartCache(_name(), 64, version="v2")
+        assert upgraded.get("chart", [199]) is None and upgraded.slots % BUCKET_SLOTS == 0
+        upgraded.close()
+    finally:
+        cache.close()
+        cache.unlink()
+
+def test_cross_process():
+    """多个进程并发写入，主进程都能读到"""
+    name = _name()
+    cache = SharedChartCache(name, 256, version="v1")
+    try:
+        results = multiprocessing.Queue()
+        processes = [multiprocessing.Process(target=_worker, args=(name, start, results)) for start in (0, 20, 40)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(30)
+            assert process.exitcode == 0
+        found = sum(cache.get("chart", [i, 0, 1]) == {"i": i, "name": "甲子" * 10} for i in range(60))
+        assert found >= 55   # 个别桶满时允许覆盖
+    finally:
+        cache.close()
+        cache.unlink()
+
+def test_calculator_uses_shared_cache():
+    """一个计算器算出的分段结果，另一个计算器直接从共享内存取得"""
+    name = _name()
+    writer = BaziCalculator(shared_cache=SharedChartCache(name, 1024))
+    try:
+        births = [datetime(1985, 6, 1, 9) + timedelta(days=i) for i in range(10)]
+        expected = [writer.calculate_bazi_info(dt, 1, 1, "") for dt in births]
+        reader = BaziCalculator(shared_cache=SharedChartCache(name, 1024))
+        assert [reader.calculate_bazi_info(dt, 1, 1, "") for dt in births] == expected
+        assert reader.shared_cache.hits == 10
+        reader.shared_cache.close()
+    finally:
+        writer.shared_cache.close()
+        writer.shared_cache.unlink()
@@ -0,0 +1,56 @@
+"""
+测试神煞规则引擎
+"""
+
+import numpy as np
+
+from . import ganzhi
+from .shensha import (
+    ANCHOR_DAY_GAN, POS_HOUR, STAR_NAMES, STAR_TABLE, chart_star_names, chart_stars, star_masks, star_names
+)
+
+def _pillars(*names):
+    return [ganzhi.PILLAR_INDEX[name] for name in names]
+
+def test_rule_count():
+    """四十种以上神煞，且在 64 位掩码内"""
+    assert 40 <= len(STAR_NAMES) <= 64
+    assert len(set(STAR_NAMES)) == len(STAR_NAMES)
+
+def test_known_chart():
+    """甲子 丙寅 庚辰 丁丑"""
+    stars = chart_stars(_pillars("甲子", "丙寅", "庚辰", "丁丑"))
+    year, month, day, hour = stars
+    assert "将星" in year          # 日支辰，申子辰将星在子
+    assert "驿马" in month         # 年支子，驿马在寅
+    assert "月德贵人" in month     # 寅月月德在丙
+    assert "魁罡" in day and "十恶大败" in day
+    assert "华盖" in day           # 年支子，华盖在辰
+    assert "天乙贵人" in hour      # 庚日见丑
+    assert "天德贵人" in hour      # 寅月天德在丁
+    assert "华盖" not in year      # 地支不自查自中
+
+def test_day_gan_lookups():
+    """日干查天乙、文昌与口诀一致（旧表文昌癸见丑有误，应为卯）"""
+    tianyi = ("丑未", "子申", "亥酉", "亥酉", "丑未", "子申", "丑未", "寅午", "卯巳", "卯巳")
+    wenchang = "巳午申酉申酉亥子寅卯"
+    bits = {name: 1 << i for i, name in enumerate(STAR_NAMES)}
+    for gan in range(10):
+        for pillar in range(60):
+            cell = int(STAR_TABLE[ANCHOR_DAY_GAN, POS_HOUR, gan, pillar])
+            zhi = ganzhi.DI_ZHI[pillar % 12]
+            assert bool(cell & bits["天乙贵人"]) == (zhi in tianyi[gan])
+            assert bool(cell & bits["文昌贵人"]) == (zhi == wenchang[gan])
+
+def test_overlay_and_batch():
+    """叠加柱按叠加位查，批量结果与逐盘一致"""
+    natal = _pillars("甲子", "丙寅", "戊午", "壬子")
+    overlay = chart_stars(natal + _pillars("甲辰", "壬申"))
+    assert "魁罡" not in overlay[4] and "华盖" in overlay[4]
+    assert "驿马" in overlay[5]
+
+    pillars = np.random.default_rng(9).integers(0, 60, (300, 6))
+    masks = star_masks(pillars)
+    for row, mask in zip(pillars, masks):
+        assert [star_names(m) for m in mask] == chart_stars(row.tolist())
+        assert star_names(np.bitwise_or.reduce(mask)) == chart_star_names(row.tolist())
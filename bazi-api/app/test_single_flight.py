@@ -0,0 +1,75 @@
+"""
+测试相同请求合并
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from .single_flight import SingleFlight
+
+def test_concurrent_calls_share_result():
+    """同键并发只算一次，不同键各算一次"""
+    flight = SingleFlight()
+    calls = []
+    release = threading.Event()
+
+    def compute(key):
+        calls.append(key)
+        release.wait(5)
+        return {"key": key}
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        futures = [pool.submit(flight.do, key, lambda key=key: compute(key)) for key in ("a",) * 6 + ("b", "b")]
+        time.sleep(0.2)
+        release.set()
+        results = [future.result() for future in futures]
+    assert sorted(calls) == ["a", "b"]
+    assert results[0] is results[5] and results[6] is results[7]
+    assert flight.stats() == {"executed": 2, "saved": 6, "inFlight": 0, "savedRate": 0.75}
+
+    # 计算结束后再来的请求重新计算
+    assert flight.do("a", lambda: 1) == 1
+
+def test_error_propagates():
+    """计算异常传给所有等待者"""
+    flight = SingleFlight()
+    started = threading.Event()
+
+    def fail():
+        started.set()
+        time.sleep(0.2)
+        raise ValueError("日期超出范围")
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        leader = pool.submit(flight.do, "x", fail)
+        started.wait(5)
+        follower = pool.submit(flight.do, "x", lambda: "不应执行")
+        for future in (leader, follower):
+            with pytest.raises(ValueError):
+                future.result()
+    assert flight.stats()["inFlight"] == 0
+
+def test_endpoint_coalesces(monkeypatch):
+    """get-info 接口对同一规范化输入（公历、农历写法）合并计算"""
+    from . import main
+    original = main.bazi_calc.calculate_bazi_info
+    count = []
+
+    def slow(*args):
+        count.append(args)
+        time.sleep(0.3)
+        return original(*args)
+
+    monkeypatch.setattr(main.bazi_calc, "calculate_bazi_info", slow)
+    requests = [
+        main.BaziInfoRequest(datetime="2023-04-01 08:15:00"),
+        main.BaziInfoRequest(datetime="2023-02-11 08:15:00", calendar="lunar", isLeap=True),
+        main.BaziInfoRequest(datetime="2023-04-01 08:15:00"),
+    ]
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        results = list(pool.map(main.get_bazi_info, requests))
+    assert len(count) == 1
+    assert results[0]["data"] is results[1]["data"] is results[2]["data"]
@@ -0,0 +1,69 @@
+"""
+测试向量化节气计算
+"""
+
+import random
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import sxtwl
+from lunar_python import EightChar, Solar
+
+from . import ganzhi
+from .bazi_calculator_new import BaziCalculator
+from .luck_cycle import LuckCycle
+from .solar_longitude import compute_term_jd, compute_term_minutes, engine_for_years, lookup
+
+def _sxtwl_terms(year):
+    """逐日扫描 sxtwl 取某公历年 24 节气（北京时间儒略日，小寒起）"""
+    terms = {}
+    day = date(year, 1, 1)
+    while day.year == year:
+        info = sxtwl.fromSolar(day.year, day.month, day.day)
+        if info.hasJieQi():
+            terms[(info.getJieQi() - 1) % 24] = info.getJieQiJD()
+        day += timedelta(days=1)
+    return np.array([terms[i] for i in range(24)])
+
+def test_terms_match_sxtwl():
+    """与 sxtwl 交节时刻相差一分钟以内"""
+    years = [1901, 1949, 1984, 2024, 2050, 2099]
+    computed = compute_term_jd(years)
+    for i, year in enumerate(years):
+        diff = np.abs(computed[i] - _sxtwl_terms(year)) * 86400
+        assert diff.max() < 60, year
+
+def test_pillars_before_1900():
+    """1900 年前排盘与 lunar_python（默认流派 2）一致，交节前后两分钟内不计"""
+    rng = random.Random(7)
+    dts = [datetime(1700, 1, 1) + timedelta(minutes=rng.randrange(200 * 365 * 1440)) for _ in range(200)]
+    engine = engine_for_years(1700, 1899)
+    result = engine.compute(np.array(dts, dtype="datetime64[m]"), 2)
+
+    terms = compute_term_minutes(np.arange(1699, 1901)).ravel()
+    minutes = np.array(dts, dtype="datetime64[m]").astype(np.int64)
+    for i, dt in enumerate(dts):
+        if np.abs(terms - minutes[i]).min() <= 2:
+            continue
+        eight_char = Solar.fromYmdHms(dt.year, dt.month, dt.day, dt.hour, dt.minute, 0).getLunar().getEightChar()
+        expected = [eight_char.getYear(), eight_char.getMonth(), eight_char.getDay(), eight_char.getTime()]
+        actual = [ganzhi.PILLAR_NAMES[result[field][i]] for field in ("year", "month", "day", "time")]
+        assert actual == expected, dt
+
+def test_calculator_before_1900(monkeypatch):
+    """1900 年前的批量排盘、起运按推算节气计算，不再逐条取 lunar_python 四柱与运势"""
+    monkeypatch.setattr(EightChar, "getYun", lambda *args: (_ for _ in ()).throw(AssertionError("getYun")))
+    dts = [datetime(1850, 3, 1, 8, 0), datetime(1799, 8, 20, 23, 30), datetime(1688, 12, 5, 6, 10)]
+    requests = [(dt, 1 + i % 2, 1 + i % 2, "") for i, dt in enumerate(dts)]
+    results = BaziCalculator().calculate_bazi_info_batch(requests)
+    monkeypatch.undo()
+    for (dt, gender, sect, _), info in zip(requests, results):
+        eight_char = Solar.fromYmdHms(dt.year, dt.month, dt.day, dt.hour, dt.minute, 0).getLunar().getEightChar()
+        eight_char.setSect(sect)
+        assert [info["top"][field] + info["bottom"][field] for field in ("year", "month", "day", "time")] == [
+            eight_char.getYear(), eight_char.getMonth(), eight_char.getDay(), eight_char.getTime()]
+        expected = [(item.getStartYear(), item.getStartAge(), item.getGanZhi() or "童限")
+                    for item in eight_char.getYun(gender, sect).getDaYun()]
+        assert [(item["startYear"], item["startAge"], item["pillar"]) for item in info["dayunList"]] == expected
+    assert LuckCycle.from_birth(dts[0], 1).start_age == results[0]["dayunList"][1]["startAge"]
+    assert lookup(datetime(1500, 1, 1)) is None
@@ -0,0 +1,48 @@
+"""
+测试真太阳时
+"""
+
+import math
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from . import main
+from .jieqi_table import to_seconds
+from .solar_time import eot_minutes, from_seconds, true_solar_seconds, true_solar_time
+
+def test_eot_table():
+    """整日与公式一致，日内线性插值"""
+    for day in (1, 45, 81, 200, 306, 365):
+        b = math.radians((day - 81) * 360 / 365.242)
+        assert eot_minutes(day) == pytest.approx(9.87 * math.sin(2 * b) - 7.53 * math.cos(b) - 1.5 * math.sin(b))
+    assert eot_minutes(45.5) == pytest.approx((eot_minutes(45) + eot_minutes(46)) / 2)
+    # 二月中旬时差约 -14 分钟，十一月初约 +16 分钟
+    assert -15.5 < eot_minutes(45) < -13 and 15 < eot_minutes(306) < 17
+
+def test_true_solar_time():
+    """经度差方向：西部城市的真太阳时早于北京时间；批量结果与逐个一致"""
+    dt = datetime(1990, 5, 15, 23, 30)
+    urumqi = true_solar_time(dt, 87.6)
+    assert urumqi < dt and urumqi.hour == 21
+    assert true_solar_time(dt, 120.0) - dt == true_solar_time(dt, None) - dt
+
+    dts = [datetime(1900, 1, 1, 0, 5), datetime(1968, 12, 31, 23, 59, 30), dt, datetime(2100, 12, 31, 12)]
+    longitudes = np.array([73.5, 135.0, 87.6, 116.4])
+    seconds = true_solar_seconds([to_seconds(d) for d in dts], longitudes)
+    assert [from_seconds(s) for s in seconds] == [true_solar_time(d, lng) for d, lng in zip(dts, longitudes)]
+
+def test_true_solar_mode():
+    """开启真太阳时后由校正后的时刻排盘"""
+    clock = main.get_bazi_info(main.BaziInfoRequest(datetime="1990-05-15 23:30:00"))["data"]
+    solar = main.get_bazi_info(main.BaziInfoRequest(datetime="1990-05-15 23:30:00", trueSolarTime=True,
+                                                    city="乌鲁木齐"))["data"]
+    assert clock["bottom"]["time"] == "子" and solar["bottom"]["time"] == "亥"
+    assert solar["datetime"]["solar"].startswith("1990年05月15日 21时")
+    for city in (None, "Atlantis不存在市"):
+        with pytest.raises(main.HTTPException) as error:
+            main.get_bazi_info(main.BaziInfoRequest(datetime="1990-05-15 23:30:00", trueSolarTime=True, city=city))
+        assert error.value.status_code == 400
+    with pytest.raises(ValueError):
+        main.birth_datetime("1990-05-15 14:30:00", true_solar=True, city="Atlantis不存在市")